@@ -4,8 +4,10 @@ import zipfile
 import rarfile
 import io
 import re
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
 import seaborn as sns
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib import colors
@@ -17,9 +19,32 @@ import os
 from datetime import datetime
 from docx import Document
 from docx.shared import Inches
+from xml.sax.saxutils import escape
 import json
 from datetime import timedelta
-from thefuzz import process, fuzz
+from rapidfuzz import fuzz, process, utils as fuzz_utils
+from rapidfuzz.distance import JaroWinkler
+import contextvars
+import fnmatch
+import functools
+import hashlib
+import itertools
+import mmap
+import multiprocessing
+import openpyxl
+import shutil
+import stat
+import sys
+import threading
+import time
+import tracemalloc
+import types
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 # 🎨 Configure Streamlit Page
 # --- Page Configuration ---
@@ -64,12 +89,637 @@ if main_category == "🔐 Network Security":
 else:  # Identity & Access Management
     page = st.sidebar.radio(
         "👤 IAM Tools:",
-        ["🏠 IAM Main", "🔁 Duplicate User Provisioning", "📂 Database Groups", "🔑 Database Privilege Users", "🗂 Database Profiles"]
+        ["🏠 IAM Main", "🔁 Duplicate User Provisioning", "🧬 Identity Resolution", "📂 Database Groups", "🛰️ Database Fleet Audit", "🔑 Database Privilege Users", "🗂 Database Profiles", "🧩 Oracle Account Model"]
     )
 
 st.sidebar.markdown("---")
 st.sidebar.info("**Use this comprehensive tool to manage network security and user access!**")
 
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+JOB_WORKERS = int(os.environ.get("IT_AUDITOR_JOB_WORKERS", os.cpu_count() or 4))
+JOB_RETENTION_SECONDS = 3600
+
+# The job the current worker thread is running, so long-running functions can
+# report progress without taking a callback argument
+_current_job = ContextVar("current_job", default=None)
+
+def report_job_progress(fraction, message=""):
+    """Update the progress of the job running in this thread (no-op outside a job)."""
+    job = _current_job.get()
+    if job is not None:
+        job["progress"] = min(max(float(fraction), 0.0), 1.0)
+        job["message"] = message
+
+def on_job_pruned(cleanup):
+    """Run cleanup() when the job running in this thread is pruned from the queue (no-op outside a job)."""
+    job = _current_job.get()
+    if job is not None:
+        job["cleanup"].append(cleanup)
+
+class JobQueue:
+    """Process-wide worker pool for audits, matching runs and report builds.
+
+    Jobs live outside the Streamlit script run that submitted them, so a widget
+    rerun re-attaches to a job by ID instead of abandoning its work, and jobs
+    from several sessions run side by side.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audit-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, label, fn, *args, **kwargs):
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id, "label": label, "state": "queued", "progress": 0.0, "message": "",
+            "result": None, "error": None, "submitted": time.time(), "finished": None, "cleanup": []
+        }
+        with self._lock:
+            pruned = self._prune()
+            self._jobs[job_id] = job
+        for cleanup in (cleanup for old in pruned for cleanup in old["cleanup"]):
+            cleanup()
+        # Run in a copy of the submitter's context so its profiler follows the job
+        self._executor.submit(contextvars.copy_context().run, self._run, job, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        token = _current_job.set(job)
+        job["state"] = "running"
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["state"] = "done"
+            job["progress"] = 1.0
+        except Exception as e:
+            job["error"] = str(e)
+            job["state"] = "failed"
+        finally:
+            job["finished"] = time.time()
+            _current_job.reset(token)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        return [self._jobs.pop(j) for j, job in list(self._jobs.items()) if job["finished"] and job["finished"] < cutoff]
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(JOB_WORKERS)
+
+PARSE_WORKERS = int(os.environ.get("IT_AUDITOR_PARSE_WORKERS", os.cpu_count() or 4))
+
+@st.cache_resource
+def get_parse_pool():
+    """Process pool for workbook parsing: openpyxl holds the GIL, so parsing threads would run one at a time."""
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+# Spawned workers re-run the parent's __main__ before taking work, and under
+# `streamlit run` that is this script (sidebar, pages and all); new workers are
+# started inside submit(), so they are handed this blank module instead
+_PARSE_WORKER_MAIN = types.ModuleType("__main__")
+_parse_submit_lock = threading.Lock()
+
+def submit_parse(fn, *args):
+    """Submit to the parse pool without letting the workers it starts import app.py."""
+    pool = get_parse_pool()
+    with _parse_submit_lock:
+        script_main = sys.modules.get("__main__")
+        sys.modules["__main__"] = _PARSE_WORKER_MAIN
+        try:
+            return pool.submit(fn, *args)
+        finally:
+            # Unless a new script run has installed its own module meanwhile
+            if sys.modules.get("__main__") is _PARSE_WORKER_MAIN:
+                sys.modules["__main__"] = script_main
+
+def content_digest(*parts):
+    """SHA-256 over strings/bytes, used to tell whether a job's inputs changed."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def start_job(slot, key, label, fn, *args, **kwargs):
+    """Submit a background job for this session under a named slot, replacing any previous one."""
+    jobs = st.session_state.setdefault("jobs", {})
+    results = st.session_state.setdefault("job_results", {})
+    previous = jobs.get(slot)
+    if previous is not None:
+        results.pop(previous["id"], None)
+    job_id = get_job_queue().submit(label, fn, *args, **kwargs)
+    jobs[slot] = {"id": job_id, "key": key, "label": label}
+    return job_id
+
+def ensure_job(slot, key, label, fn, *args, **kwargs):
+    """Start a job unless this session already has one in 'slot' for the same key; see job_result()."""
+    entry = st.session_state.setdefault("jobs", {}).get(slot)
+    if entry is None or entry["key"] != key:
+        start_job(slot, key, label, fn, *args, **kwargs)
+    return job_result(slot, key)
+
+def job_status(slot):
+    """State of this session's job in 'slot' ('queued', 'running', 'done', 'failed'), or None."""
+    entry = st.session_state.setdefault("jobs", {}).get(slot)
+    job = get_job_queue().get(entry["id"]) if entry else None
+    return job["state"] if job else None
+
+def clear_job(slot):
+    """Forget this session's job in 'slot' and its stored result."""
+    entry = st.session_state.setdefault("jobs", {}).pop(slot, None)
+    if entry is not None:
+        st.session_state.setdefault("job_results", {}).pop(entry["id"], None)
+
+@st.fragment(run_every=1.0)
+def poll_job_progress(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None or job["state"] in ("done", "failed"):
+        st.rerun()
+    st.progress(job["progress"], text=f"⏳ {job['label']}: {job['message'] or job['state']}")
+
+def job_result(slot, key=None):
+    """Return the result of this session's job in 'slot', or None while it is pending.
+
+    Shows a self-refreshing progress bar while the job runs. Finished results are
+    kept in session state keyed by job ID. Returns None when no job exists for
+    the slot or it was started for a different key.
+    """
+    entry = st.session_state.setdefault("jobs", {}).get(slot)
+    if entry is None or (key is not None and entry["key"] != key):
+        return None
+    results = st.session_state.setdefault("job_results", {})
+    if entry["id"] in results:
+        return results[entry["id"]]
+    job = get_job_queue().get(entry["id"])
+    if job is None:
+        st.warning(f"{entry['label']} is no longer available; please run it again.")
+        del st.session_state["jobs"][slot]
+        return None
+    if job["state"] == "done":
+        results[entry["id"]] = job["result"]
+        return job["result"]
+    if job["state"] == "failed":
+        st.error(f"❌ {entry['label']} failed: {job['error']}")
+        return None
+    poll_job_progress(entry["id"])
+    return None
+
+# =============================================================================
+# SHARED RESULT CACHE
+# =============================================================================
+
+SHARED_CACHE_MB = int(os.environ.get("IT_AUDITOR_CACHE_MB", 512))
+# Frames one session may keep in memory before the least recently used go to disk
+SESSION_MEMORY_MB = int(os.environ.get("IT_AUDITOR_SESSION_MB", 256))
+SPILL_ROOT = os.path.join(tempfile.gettempdir(), "it_auditor_spill")
+
+def estimate_nbytes(obj):
+    """Rough in-memory size of a cached value (deep for DataFrames and containers)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+class SharedResultCache:
+    """Process-wide, content-addressed cache of parsed uploads and analysis results.
+
+    Values are computed once per key even when several sessions ask at the same
+    time, kept in LRU order within a byte budget, and handed out as shared
+    objects: callers must treat them as read-only.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._inflight = {}  # key -> threading.Event set when the owner finishes
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+            if not owner:
+                # Another session is computing the same input; wait and pick it up
+                event.wait()
+                continue
+            try:
+                value = compute()
+                self._store(key, value)
+                return value
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                event.set()
+
+    def _store(self, key, value):
+        nbytes = estimate_nbytes(value)
+        if nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.budget_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_bytes
+                self.evictions += 1
+
+    def holds(self, key, value):
+        """Whether value is the object cached under key; no LRU update."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] is value
+
+    def peek(self, key):
+        """The cached value for key, or None; never computes and is not counted as a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_mb": self.nbytes / 2**20,
+                "budget_mb": self.budget_bytes / 2**20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+@st.cache_resource
+def get_shared_cache():
+    return SharedResultCache(SHARED_CACHE_MB * 2**20)
+
+class SessionMemory:
+    """The frames one session keeps between reruns, held within a per-session byte budget.
+
+    Frames are content-addressed by the same keys as the shared result cache.
+    A frame the shared cache holds too is not charged to the session, since
+    dropping it here would free nothing. Over budget, the least recently used
+    charged frames are written to this session's private spill directory and
+    dropped; get() reads them back and deletes the file. The directory goes
+    when the session does. Small per-session state such as row-index arrays is
+    declared with track() so that the budget covers all the session holds.
+    """
+
+    def __init__(self, session_id, budget_bytes):
+        self.session_id = session_id
+        self.budget_bytes = budget_bytes
+        self.spill_dir = None  # created on first spill
+        self._resident = OrderedDict()  # key -> (frame, nbytes)
+        self._spilled = {}  # key -> (path, bytes on disk)
+        self._tracked = {}  # name -> nbytes
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.reloads = 0
+        self.last_used = time.time()
+
+    def put(self, key, frame):
+        with self._lock:
+            self._discard_spill(key)
+            self._resident[key] = (frame, estimate_nbytes(frame))
+            self._resident.move_to_end(key)
+            self._evict()
+        return frame
+
+    def get(self, key):
+        self.last_used = time.time()
+        with self._lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                return self._resident[key][0]
+            spilled = self._spilled.get(key)
+        if spilled is None:
+            frame = get_shared_cache().peek(key)
+            if frame is None:
+                raise KeyError(key)
+        else:
+            frame = pd.read_pickle(spilled[0])
+            self.reloads += 1
+        return self.put(key, frame)
+
+    def release(self, key):
+        """Forget a frame the session no longer refers to, in memory and on disk."""
+        with self._lock:
+            self._resident.pop(key, None)
+            self._discard_spill(key)
+
+    def track(self, name, nbytes):
+        with self._lock:
+            self._tracked[name] = nbytes
+            self._evict()
+
+    def _charged(self, key):
+        frame, nbytes = self._resident[key]
+        return 0 if get_shared_cache().holds(key, frame) else nbytes
+
+    def _evict(self):
+        charged = {key: self._charged(key) for key in self._resident}
+        used = sum(charged.values()) + sum(self._tracked.values())
+        # Least recently used first; the frame just used stays even on its own over budget
+        for key in list(self._resident)[:-1]:
+            if used <= self.budget_bytes:
+                break
+            if charged[key]:
+                self._spill(key)
+                used -= charged[key]
+
+    def _spill(self, key):
+        if self.spill_dir is None:
+            os.makedirs(SPILL_ROOT, mode=0o700, exist_ok=True)
+            self.spill_dir = tempfile.mkdtemp(prefix=f"session-{self.session_id[:8]}-", dir=SPILL_ROOT)
+            weakref.finalize(self, shutil.rmtree, self.spill_dir, ignore_errors=True)
+        frame, _ = self._resident.pop(key)
+        path = os.path.join(self.spill_dir, f"{key}.pkl")
+        frame.to_pickle(path)
+        self._spilled[key] = (path, os.path.getsize(path))
+        self.evictions += 1
+
+    def _discard_spill(self, key):
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None and os.path.exists(spilled[0]):
+            os.remove(spilled[0])
+
+    def stats(self):
+        with self._lock:
+            charged = sum(self._charged(key) for key in self._resident)
+            return {
+                "session": self.session_id[:8],
+                "resident_frames": len(self._resident),
+                "resident_mb": charged / 2**20,
+                "shared_mb": (sum(nbytes for _, nbytes in self._resident.values()) - charged) / 2**20,
+                "index_mb": sum(self._tracked.values()) / 2**20,
+                "budget_mb": self.budget_bytes / 2**20,
+                "spilled_frames": len(self._spilled),
+                "spilled_mb": sum(size for _, size in self._spilled.values()) / 2**20,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "idle_s": time.time() - self.last_used,
+            }
+
+@st.cache_resource
+def get_session_registry():
+    # Entries disappear with their session's state
+    return weakref.WeakValueDictionary()
+
+def session_memory():
+    """This session's SessionMemory, created and registered on first use."""
+    memory = st.session_state.get("session_memory")
+    if memory is None:
+        memory = st.session_state["session_memory"] = SessionMemory(uuid.uuid4().hex, SESSION_MEMORY_MB * 2**20)
+        get_session_registry()[memory.session_id] = memory
+    return memory
+
+def render_cache_stats():
+    stats = get_shared_cache().stats()
+    with st.sidebar.expander("🧠 Shared Result Cache"):
+        st.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+        st.caption(
+            f"{stats['hits']} hits · {stats['misses']} misses · {stats['evictions']} evictions  \n"
+            f"{stats['entries']} entries · {stats['size_mb']:.1f} / {stats['budget_mb']:.0f} MB"
+        )
+
+# =============================================================================
+# SERVER-SIDE FILES
+# =============================================================================
+
+# Inputs read straight from the server's disk must lie under this directory;
+# while it is unset those inputs are not shown at all
+DATA_ROOT = os.environ.get("IT_AUDITOR_DATA_ROOT", "")
+
+def resolve_data_path(path):
+    """Real path of path (absolute, or relative to DATA_ROOT); raises ValueError if it is not under DATA_ROOT."""
+    root = os.path.realpath(DATA_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if not DATA_ROOT or os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path} is outside the data directory {DATA_ROOT or '(not set)'}")
+    return resolved
+
+def data_path_input(label, key):
+    """Text input for a file or folder under DATA_ROOT; returns its real path, or '' when empty or rejected."""
+    path = st.text_input(label, key=key, help=f"Absolute, or relative to {DATA_ROOT}").strip()
+    if not path:
+        return ""
+    try:
+        return resolve_data_path(path)
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        return ""
+
+# =============================================================================
+# PROFILING & DIAGNOSTICS
+# =============================================================================
+
+# The profiler of the session that started the current script run or job, and
+# the stack of stages open in this context
+_current_profiler = ContextVar("current_profiler", default=None)
+_stage_stack = ContextVar("stage_stack", default=())
+
+class StageProfiler:
+    """Wall time and traced peak memory per pipeline stage, aggregated by stage path.
+
+    Stages nest, so a path like ('run_config_audit', 'audit_config', 'rule:telnet')
+    identifies one rule inside one stage. Memory is only recorded while tracemalloc
+    is tracing and is process-wide, so it is exact only when one job runs at a time.
+    """
+
+    def __init__(self):
+        self.stats = {}  # path tuple -> {"calls", "seconds", "peak_bytes"}
+        self._lock = threading.Lock()
+
+    def record(self, path, seconds, peak_bytes=None):
+        with self._lock:
+            entry = self.stats.setdefault(path, {"calls": 0, "seconds": 0.0, "peak_bytes": None})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            if peak_bytes is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak_bytes)
+
+    def rows(self):
+        with self._lock:
+            stats = {path: dict(entry) for path, entry in self.stats.items()}
+        child_seconds = defaultdict(float)
+        for path, entry in stats.items():
+            if len(path) > 1:
+                child_seconds[path[:-1]] += entry["seconds"]
+        return [
+            {
+                "stage": " › ".join(path),
+                "path": list(path),
+                "calls": entry["calls"],
+                "total_ms": entry["seconds"] * 1000,
+                "self_ms": max(entry["seconds"] - child_seconds[path], 0.0) * 1000,
+                "peak_mb": None if entry["peak_bytes"] is None else entry["peak_bytes"] / 2**20,
+            }
+            for path, entry in sorted(stats.items())
+        ]
+
+    def to_json(self):
+        return json.dumps({"generated": datetime.now().isoformat(), "stages": self.rows()}, indent=2)
+
+    def to_collapsed(self):
+        """Collapsed-stack lines ('a;b;c <self microseconds>') for flamegraph.pl or speedscope."""
+        return "\n".join(
+            f"{';'.join(row['path'])} {int(round(row['self_ms'] * 1000))}" for row in self.rows()
+        )
+
+@contextmanager
+def profile_stage(name):
+    """Time a block as a named stage under whatever stage is currently open."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield
+        return
+    parent = _stage_stack.get()
+    frame = {"peak": 0, "start_mem": 0}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # reset_peak() is global, so hand the parent the peak it has seen so far first
+        current, peak = tracemalloc.get_traced_memory()
+        if parent:
+            parent[-1][1]["peak"] = max(parent[-1][1]["peak"], peak)
+        frame["start_mem"] = current
+        tracemalloc.reset_peak()
+    token = _stage_stack.set(parent + ((name, frame),))
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        peak_bytes = None
+        if tracing and tracemalloc.is_tracing():
+            abs_peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            peak_bytes = max(abs_peak - frame["start_mem"], 0)
+            if parent:
+                parent[-1][1]["peak"] = max(parent[-1][1]["peak"], abs_peak)
+        _stage_stack.reset(token)
+        profiler.record(tuple(n for n, _ in parent) + (name,), elapsed, peak_bytes)
+
+def profiled(name):
+    """Decorator form of profile_stage()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record_substage(name, seconds):
+    """Add a timing measured by the caller as a child of the open stage (used per rule)."""
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.record(tuple(n for n, _ in _stage_stack.get()) + (name,), seconds)
+
+class MemoryTracing:
+    """Reference count of the sessions that want tracemalloc, which is process-wide.
+
+    Tracing starts with the first holder and stops when the last one lets go, so
+    no session can switch it off under another. Holders are weakly referenced:
+    a session that ends with tracing on stops holding it.
+    """
+
+    def __init__(self):
+        self._holders = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def hold(self, holder, wanted):
+        """Record whether holder wants tracing and start or stop it to match; returns the holder count."""
+        with self._lock:
+            if wanted:
+                self._holders.add(holder)
+            else:
+                self._holders.discard(holder)
+            if self._holders and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            elif not self._holders and self._started:
+                # Only stop tracing this class started (not e.g. python -X tracemalloc)
+                tracemalloc.stop()
+                self._started = False
+            return len(self._holders)
+
+@st.cache_resource
+def get_memory_tracing():
+    return MemoryTracing()
+
+def diagnostics_profiler():
+    """Sidebar switch for diagnostics; returns this session's profiler when enabled."""
+    enabled = st.sidebar.toggle("🩺 Diagnostics", key="diagnostics_enabled")
+    if not enabled:
+        if "profiler" in st.session_state:
+            get_memory_tracing().hold(st.session_state["profiler"], False)
+        return None
+    if "profiler" not in st.session_state:
+        st.session_state["profiler"] = StageProfiler()
+    trace_memory = st.sidebar.checkbox("Trace memory (slower, process-wide)", key="diagnostics_trace_memory")
+    holders = get_memory_tracing().hold(st.session_state["profiler"], trace_memory)
+    if holders:
+        st.sidebar.caption(f"Memory tracing is on for {holders} session(s).")
+    return st.session_state["profiler"]
+
+def render_diagnostics(profiler):
+    st.markdown("---")
+    with st.expander("🩺 Diagnostics: time and memory per stage", expanded=True):
+        rows = profiler.rows()
+        if not rows:
+            st.info("No stages recorded yet. Run an audit or check with diagnostics enabled.")
+            return
+        diag_df = pd.DataFrame(rows).drop(columns=["path"]).sort_values("total_ms", ascending=False)
+        st.dataframe(diag_df, width='stretch', hide_index=True)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("📥 Export JSON", profiler.to_json(), file_name="it_auditor_profile.json", mime="application/json")
+        with col2:
+            st.download_button("📥 Export Collapsed Stacks", profiler.to_collapsed(), file_name="it_auditor_profile.folded", mime="text/plain")
+        with col3:
+            if st.button("🔄 Reset"):
+                get_memory_tracing().hold(st.session_state["profiler"], False)
+                st.session_state["profiler"] = StageProfiler()
+                st.rerun()
+
+def render_session_memory():
+    with st.expander("🧠 Diagnostics: memory per session"):
+        memory = session_memory()
+        sessions = [session.stats() for session in list(get_session_registry().values())]
+        st.caption(f"Budget {SESSION_MEMORY_MB} MB per session (IT_AUDITOR_SESSION_MB). Frames also held by the "
+                   f"shared result cache are not charged; over budget, the rest spill to a private directory per session. "
+                   f"This session is {memory.session_id[:8]}.")
+        sessions_df = pd.DataFrame(sessions).sort_values("resident_mb", ascending=False)
+        st.dataframe(sessions_df, width='stretch', hide_index=True)
+
 # =============================================================================
 # NETWORK SECURITY FUNCTIONS
 # =============================================================================
@@ -423,112 +1073,1035 @@ def generate_audit_plan_word(audit_plan):
 # ---------------------------
 # Network Config Audit Functions (Existing Code)
 # ---------------------------
-def audit_config(filename, content):
-    findings = []
-    # ... (include all your existing audit_config function code here)
-    # Normalize content for easier regex
-    # (we'll still use case-insensitive but keep content as-is)
+# Cisco IOS rule pack for audit_config(); other platforms have their own packs in
+# CONFIG_VENDORS below with the same rule shape. "when" says whether a rule raises its finding when
+# the pattern is present or missing. Patterns are line-local (no match spans a newline)
+# so a whole-file search agrees with a per-section one, and "keywords" are lowercase
+# literals every match contains, used to tell which sections a rule depends on.
+# Block rules ("block" key) are evaluated per section of that kind instead.
+CONFIG_AUDIT_RULES = [
     # --- 1. Layer 2 Security ---
-    if not re.search(r"\bip dhcp snooping\b", content, re.IGNORECASE):
-        findings.append(("DHCP Snooping Disabled", filename, "DHCP attacks possible", "Enable DHCP Snooping", "Layer 2"))
+    {"id": "dhcp_snooping", "pattern": r"\bip dhcp snooping\b", "when": "missing",
+     "keywords": ("ip dhcp snooping",),
+     "finding": ("DHCP Snooping Disabled", "DHCP attacks possible", "Enable DHCP Snooping", "Layer 2")},
+    {"id": "arp_inspection", "pattern": r"\bip arp inspection\b", "when": "missing",
+     "keywords": ("ip arp inspection",),
+     "finding": ("Dynamic ARP Inspection Missing", "ARP spoofing possible", "Enable Dynamic ARP Inspection", "Layer 2")},
+    {"id": "port_security", "pattern": r"\bswitchport port-security\b", "when": "missing",
+     "keywords": ("switchport port-security",),
+     "finding": ("Port Security Not Configured", "MAC flooding risk", "Enable Port Security", "Layer 2")},
+    # Heuristic: an interface block without 'shutdown' may be an unused port left active
+    {"id": "unused_interfaces", "block": "interface", "pattern": r"^[ \t]*shutdown\b", "when": "missing",
+     "keywords": (),
+     "finding": ("Unused Interfaces Active (heuristic)", "Potential unused interfaces not administratively shutdown", "Review & administratively shutdown unused interfaces", "Layer 2")},
+    {"id": "native_vlan_1", "pattern": r"\bswitchport trunk native vlan[ \t]+1\b", "when": "present",
+     "keywords": ("switchport trunk native vlan",),
+     "finding": ("Default Native VLAN in Use", "VLAN hopping risk", "Change native VLAN from 1", "Layer 2")},
 
-    if not re.search(r"\bip arp inspection\b", content, re.IGNORECASE):
-        findings.append(("Dynamic ARP Inspection Missing", filename, "ARP spoofing possible", "Enable Dynamic ARP Inspection", "Layer 2"))
+    # --- 2. Access Control ---
+    {"id": "telnet", "pattern": r"^[ \t]*transport input .*telnet", "when": "present",
+     "keywords": ("transport input",),
+     "finding": ("Telnet Enabled", "Credentials exposed in cleartext", "Disable Telnet and use SSH only", "Access Control")},
+    {"id": "snmp_default_community", "pattern": r"\bsnmp-server community[ \t]+(public|private)\b", "when": "present",
+     "keywords": ("snmp-server community",),
+     "finding": ("Default SNMP Community", "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control")},
+    {"id": "acls", "pattern": r"\b(access-list|ip access-list|ip prefix-list|ipv6 access-list)\b", "when": "missing",
+     "keywords": ("access-list", "prefix-list"),
+     "finding": ("No ACLs Found", "Unrestricted traffic flows", "Implement ACLs where needed", "Access Control")},
 
-    if not re.search(r"\bswitchport port-security\b", content, re.IGNORECASE):
-        findings.append(("Port Security Not Configured", filename, "MAC flooding risk", "Enable Port Security", "Layer 2"))
+    # --- 3. Authentication & Authorization ---
+    {"id": "aaa", "pattern": r"\baaa new-model\b", "when": "missing",
+     "keywords": ("aaa new-model",),
+     "finding": ("No AAA Configured", "No centralized authentication", "Enable AAA (TACACS+/RADIUS)", "AAA")},
+    {"id": "local_users", "pattern": r"^[ \t]*username[ \t]+\S+[ \t]+(?:password|privilege)\b", "when": "present",
+     "keywords": ("username",),
+     "finding": ("Local User Accounts with Passwords", "Local credential management; possible weak auth", "Use AAA and avoid plaintext local passwords", "AAA")},
 
-    # Heuristic: detect interface blocks that may not include shutdown
-    try:
-        # find interface blocks; heuristic: interface <name> ... (if no 'shutdown' in block, flag)
-        iface_blocks = re.findall(r'(?ms)^(interface\s+\S+.*?)(?=^interface\s+\S+|\Z)', content, re.IGNORECASE)
-        for block in iface_blocks:
-            if not re.search(r'(?m)^\s*shutdown\b', block):
-                # don't spam for each interface; append once per file as heuristic
-                findings.append(("Unused Interfaces Active (heuristic)", filename, "Potential unused interfaces not administratively shutdown", "Review & administratively shutdown unused interfaces", "Layer 2"))
-                break
-    except Exception:
-        pass
+    # --- 4. Logging & Monitoring ---
+    {"id": "syslog", "pattern": r"\blogging[ \t]+\S+", "when": "missing",
+     "keywords": ("logging",),
+     "finding": ("No Syslog Configured", "No centralized log collection", "Configure Syslog servers", "Logging")},
+    {"id": "ntp", "pattern": r"\b(ntp server|clock set|ntp peer)\b", "when": "missing",
+     "keywords": ("ntp server", "clock set", "ntp peer"),
+     "finding": ("No NTP Configured", "Logs not time-synced", "Configure NTP servers", "Logging")},
+    {"id": "snmpv3", "pattern": r"snmp-server group .* v3", "when": "missing",
+     "keywords": ("snmp-server group",),
+     "finding": ("SNMPv3 Not Configured", "Monitoring unencrypted", "Use SNMPv3 with authentication & privacy", "Logging")},
 
-    if re.search(r"\bswitchport trunk native vlan\s+1\b", content, re.IGNORECASE):
-        findings.append(("Default Native VLAN in Use", filename, "VLAN hopping risk", "Change native VLAN from 1", "Layer 2"))
+    # --- 5. Cryptographic & Protocol Risks ---
+    {"id": "ftp", "pattern": r"^[ \t]*(service ftp|ftp server|ip ftp)\b", "when": "present",
+     "keywords": ("service ftp", "ftp server", "ip ftp"),
+     "finding": ("FTP Enabled", "Credentials exposed in cleartext", "Disable FTP; use SFTP/SCP/FTPS", "Crypto")},
+    {"id": "http_server", "pattern": r"^[ \t]*ip http\b", "when": "present",
+     "keywords": ("ip http",),
+     "finding": ("HTTP Server Enabled", "Management traffic unencrypted", "Disable HTTP; enable HTTPS (ip http secure-server)", "Crypto")},
+    {"id": "ssh", "pattern": r"\bip ssh\b", "when": "missing",
+     "keywords": ("ip ssh",),
+     "finding": ("SSH Not Configured", "Secure remote management not enforced", "Enable SSH v2 and restrict vty to SSH", "Crypto")},
 
-    # --- 2. Access Control ---
-    # Telnet detection across vty or transport input
-    if re.search(r'(?mi)^\s*transport input .*telnet', content) or re.search(r'(?ms)^line vty.*?transport input .*telnet', content):
-        findings.append(("Telnet Enabled", filename, "Credentials exposed in cleartext", "Disable Telnet and use SSH only", "Access Control"))
+    # --- 6. Resilience & Availability ---
+    {"id": "fhrp", "pattern": r"\b(standby\b|vrrp\b|hsrp\b)", "when": "missing",
+     "keywords": ("standby", "vrrp", "hsrp"),
+     "finding": ("No First-Hop Redundancy (HSRP/VRRP)", "Single point of failure for gateway", "Implement HSRP/VRRP where required", "Resilience")},
+    {"id": "storm_control", "pattern": r"\bstorm-control\b", "when": "missing",
+     "keywords": ("storm-control",),
+     "finding": ("No Storm Control", "Broadcast/multicast flood risk", "Enable storm-control on access ports", "Resilience")},
+    {"id": "spanning_tree", "pattern": r"\bspanning-tree\b", "when": "missing",
+     "keywords": ("spanning-tree",),
+     "finding": ("Spanning Tree Not Configured", "Switching loops possible", "Enable STP and configure root guard/portfast", "Resilience")},
 
-    if re.search(r"\bsnmp-server community\s+(public|private)\b", content, re.IGNORECASE):
-        findings.append(("Default SNMP Community", filename, "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control"))
+    # --- 7. Configuration Management ---
+    {"id": "password_type7", "pattern": r"\bpassword 7\b", "when": "present",
+     "keywords": ("password 7",),
+     "finding": ("Weak Password Encryption (Type 7)", "Easily reversible encryption", "Avoid type 7; use enable secret / stronger hashes", "Config Mgmt")},
+    {"id": "archive", "pattern": r"\barchive\b", "when": "missing",
+     "keywords": ("archive",),
+     "finding": ("No Config Archiving", "No config backup/versioning", "Enable config archive/backup/versioning", "Config Mgmt")},
+    {"id": "password_encryption", "pattern": r"\bservice password-encryption\b", "when": "missing",
+     "keywords": ("service password-encryption",),
+     "finding": ("Passwords Not Encrypted", "Plaintext passwords in config", "Enable 'service password-encryption' and use secrets", "Config Mgmt")},
+]
 
-    if not re.search(r"\b(access-list|ip access-list|ip prefix-list|ipv6 access-list)\b", content, re.IGNORECASE):
-        findings.append(("No ACLs Found", filename, "Unrestricted traffic flows", "Implement ACLs where needed", "Access Control"))
+# ---------------------------
+# Vendor rule packs & parsers
+# ---------------------------
+# NX-OS and EOS keep IOS-style indentation and are audited as-is. Junos (set or
+# hierarchical) and FortiOS are first flattened by a one-pass parser into full-path
+# 'set ...' lines, grouped under a two-level header so parse_config_sections() and the
+# block rules see the same header + indented-lines shape as IOS.
 
-    # --- 3. Authentication & Authorization ---
-    if not re.search(r"\baaa new-model\b", content, re.IGNORECASE):
-        findings.append(("No AAA Configured", filename, "No centralized authentication", "Enable AAA (TACACS+/RADIUS)", "AAA"))
+NXOS_AUDIT_RULES = [
+    {"id": "dhcp_snooping", "pattern": r"\bip dhcp snooping\b", "when": "missing",
+     "keywords": ("ip dhcp snooping",),
+     "finding": ("DHCP Snooping Disabled", "DHCP attacks possible", "Enable 'feature dhcp' and 'ip dhcp snooping'", "Layer 2")},
+    {"id": "arp_inspection", "pattern": r"\bip arp inspection\b", "when": "missing",
+     "keywords": ("ip arp inspection",),
+     "finding": ("Dynamic ARP Inspection Missing", "ARP spoofing possible", "Enable Dynamic ARP Inspection", "Layer 2")},
+    {"id": "port_security", "pattern": r"\bswitchport port-security\b", "when": "missing",
+     "keywords": ("switchport port-security",),
+     "finding": ("Port Security Not Configured", "MAC flooding risk", "Enable 'feature port-security' on access ports", "Layer 2")},
+    {"id": "unused_interfaces", "block": "interface", "pattern": r"^[ \t]*shutdown\b", "when": "missing",
+     "keywords": (),
+     "finding": ("Unused Interfaces Active (heuristic)", "Potential unused interfaces not administratively shutdown", "Review & administratively shutdown unused interfaces", "Layer 2")},
+    {"id": "native_vlan_1", "pattern": r"\bswitchport trunk native vlan[ \t]+1\b", "when": "present",
+     "keywords": ("switchport trunk native vlan",),
+     "finding": ("Default Native VLAN in Use", "VLAN hopping risk", "Change native VLAN from 1", "Layer 2")},
+    {"id": "telnet", "pattern": r"^[ \t]*feature telnet\b", "when": "present",
+     "keywords": ("feature telnet",),
+     "finding": ("Telnet Enabled", "Credentials exposed in cleartext", "Run 'no feature telnet' and use SSH only", "Access Control")},
+    {"id": "snmp_default_community", "pattern": r"\bsnmp-server community[ \t]+(public|private)\b", "when": "present",
+     "keywords": ("snmp-server community",),
+     "finding": ("Default SNMP Community", "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control")},
+    {"id": "acls", "pattern": r"\b(ip access-list|ipv6 access-list|ip prefix-list)\b", "when": "missing",
+     "keywords": ("access-list", "prefix-list"),
+     "finding": ("No ACLs Found", "Unrestricted traffic flows", "Implement ACLs where needed", "Access Control")},
+    {"id": "aaa", "pattern": r"^[ \t]*(aaa authentication login|tacacs-server host|radius-server host)\b", "when": "missing",
+     "keywords": ("aaa authentication login", "tacacs-server host", "radius-server host"),
+     "finding": ("No AAA Configured", "No centralized authentication", "Enable 'feature tacacs+' and AAA login groups", "AAA")},
+    {"id": "local_users", "pattern": r"^[ \t]*username[ \t]+\S+[ \t]+password\b", "when": "present",
+     "keywords": ("username",),
+     "finding": ("Local User Accounts with Passwords", "Local credential management; possible weak auth", "Use AAA and keep only a break-glass local account", "AAA")},
+    {"id": "password_strength", "pattern": r"^[ \t]*no password strength-check\b", "when": "present",
+     "keywords": ("no password strength-check",),
+     "finding": ("Password Strength Check Disabled", "Weak local passwords accepted", "Re-enable 'password strength-check'", "AAA")},
+    {"id": "syslog", "pattern": r"^[ \t]*logging server\b", "when": "missing",
+     "keywords": ("logging server",),
+     "finding": ("No Syslog Configured", "No centralized log collection", "Configure 'logging server'", "Logging")},
+    {"id": "ntp", "pattern": r"^[ \t]*ntp (server|peer)\b", "when": "missing",
+     "keywords": ("ntp server", "ntp peer"),
+     "finding": ("No NTP Configured", "Logs not time-synced", "Configure NTP servers", "Logging")},
+    {"id": "snmpv3", "pattern": r"^[ \t]*snmp-server user[ \t]+\S+.*\bpriv\b", "when": "missing",
+     "keywords": ("snmp-server user",),
+     "finding": ("SNMPv3 Not Configured", "Monitoring unencrypted", "Use SNMPv3 users with auth & priv", "Logging")},
+    {"id": "http_server", "pattern": r"^[ \t]*nxapi http\b", "when": "present",
+     "keywords": ("nxapi http",),
+     "finding": ("HTTP Server Enabled", "Management traffic unencrypted", "Disable 'nxapi http'; use 'nxapi https'", "Crypto")},
+    {"id": "ssh", "pattern": r"^[ \t]*no feature ssh\b", "when": "present",
+     "keywords": ("no feature ssh",),
+     "finding": ("SSH Not Configured", "Secure remote management not enforced", "Enable 'feature ssh'", "Crypto")},
+    {"id": "fhrp", "pattern": r"^[ \t]*(hsrp|vrrp)[ \t]+\d+", "when": "missing",
+     "keywords": ("hsrp", "vrrp"),
+     "finding": ("No First-Hop Redundancy (HSRP/VRRP)", "Single point of failure for gateway", "Implement HSRP/VRRP where required", "Resilience")},
+    {"id": "storm_control", "pattern": r"\bstorm-control\b", "when": "missing",
+     "keywords": ("storm-control",),
+     "finding": ("No Storm Control", "Broadcast/multicast flood risk", "Enable storm-control on access ports", "Resilience")},
+    {"id": "spanning_tree", "pattern": r"\bspanning-tree\b", "when": "missing",
+     "keywords": ("spanning-tree",),
+     "finding": ("Spanning Tree Not Configured", "Switching loops possible", "Enable STP and configure root guard/portfast", "Resilience")},
+]
 
-    if re.search(r'(?mi)^\s*username\s+\S+\s+(?:password|privilege)\b', content):
-        findings.append(("Local User Accounts with Passwords", filename, "Local credential management; possible weak auth", "Use AAA and avoid plaintext local passwords", "AAA"))
+EOS_AUDIT_RULES = [
+    {"id": "dhcp_snooping", "pattern": r"\bip dhcp snooping\b", "when": "missing",
+     "keywords": ("ip dhcp snooping",),
+     "finding": ("DHCP Snooping Disabled", "DHCP attacks possible", "Enable DHCP Snooping", "Layer 2")},
+    {"id": "port_security", "pattern": r"\bswitchport port-security\b", "when": "missing",
+     "keywords": ("switchport port-security",),
+     "finding": ("Port Security Not Configured", "MAC flooding risk", "Enable Port Security", "Layer 2")},
+    {"id": "unused_interfaces", "block": "interface", "pattern": r"^[ \t]*shutdown\b", "when": "missing",
+     "keywords": (),
+     "finding": ("Unused Interfaces Active (heuristic)", "Potential unused interfaces not administratively shutdown", "Review & administratively shutdown unused interfaces", "Layer 2")},
+    {"id": "native_vlan_1", "pattern": r"\bswitchport trunk native vlan[ \t]+1\b", "when": "present",
+     "keywords": ("switchport trunk native vlan",),
+     "finding": ("Default Native VLAN in Use", "VLAN hopping risk", "Change native VLAN from 1", "Layer 2")},
+    {"id": "telnet", "pattern": r"^management telnet\b", "when": "present",
+     "keywords": ("management telnet",),
+     "finding": ("Telnet Enabled", "Credentials exposed in cleartext", "Shut down 'management telnet' and use SSH only", "Access Control")},
+    {"id": "snmp_default_community", "pattern": r"\bsnmp-server community[ \t]+(public|private)\b", "when": "present",
+     "keywords": ("snmp-server community",),
+     "finding": ("Default SNMP Community", "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control")},
+    {"id": "acls", "pattern": r"\b(ip access-list|ipv6 access-list|ip prefix-list)\b", "when": "missing",
+     "keywords": ("access-list", "prefix-list"),
+     "finding": ("No ACLs Found", "Unrestricted traffic flows", "Implement ACLs where needed", "Access Control")},
+    {"id": "aaa", "pattern": r"^[ \t]*(aaa authentication login|tacacs-server host|radius-server host)\b", "when": "missing",
+     "keywords": ("aaa authentication login", "tacacs-server host", "radius-server host"),
+     "finding": ("No AAA Configured", "No centralized authentication", "Enable AAA (TACACS+/RADIUS)", "AAA")},
+    {"id": "nopassword_users", "pattern": r"^[ \t]*username[ \t]+\S+.*\bnopassword\b", "when": "present",
+     "keywords": ("nopassword",),
+     "finding": ("Local Account Without Password", "Account can log in without credentials", "Set a secret or remove the account", "AAA")},
+    {"id": "syslog", "pattern": r"^[ \t]*logging host\b", "when": "missing",
+     "keywords": ("logging host",),
+     "finding": ("No Syslog Configured", "No centralized log collection", "Configure 'logging host'", "Logging")},
+    {"id": "ntp", "pattern": r"^[ \t]*ntp server\b", "when": "missing",
+     "keywords": ("ntp server",),
+     "finding": ("No NTP Configured", "Logs not time-synced", "Configure NTP servers", "Logging")},
+    {"id": "snmpv3", "pattern": r"snmp-server group .* v3", "when": "missing",
+     "keywords": ("snmp-server group",),
+     "finding": ("SNMPv3 Not Configured", "Monitoring unencrypted", "Use SNMPv3 with authentication & privacy", "Logging")},
+    {"id": "http_server", "pattern": r"^[ \t]*protocol http\b", "when": "present",
+     "keywords": ("protocol http",),
+     "finding": ("HTTP Server Enabled", "Management traffic unencrypted", "Use 'protocol https' for management APIs", "Crypto")},
+    {"id": "fhrp", "pattern": r"^[ \t]*(vrrp[ \t]+\d+|ip virtual-router address)\b", "when": "missing",
+     "keywords": ("vrrp", "ip virtual-router address"),
+     "finding": ("No First-Hop Redundancy (VRRP/VARP)", "Single point of failure for gateway", "Implement VRRP or VARP where required", "Resilience")},
+    {"id": "storm_control", "pattern": r"\bstorm-control\b", "when": "missing",
+     "keywords": ("storm-control",),
+     "finding": ("No Storm Control", "Broadcast/multicast flood risk", "Enable storm-control on access ports", "Resilience")},
+    {"id": "spanning_tree", "pattern": r"\bspanning-tree\b", "when": "missing",
+     "keywords": ("spanning-tree",),
+     "finding": ("Spanning Tree Not Configured", "Switching loops possible", "Enable STP and configure root guard/portfast", "Resilience")},
+]
 
-    # --- 4. Logging & Monitoring ---
-    if not re.search(r"\blogging\s+\S+", content, re.IGNORECASE):
-        findings.append(("No Syslog Configured", filename, "No centralized log collection", "Configure Syslog servers", "Logging"))
+# Evaluated against the flattened 'set ...' form produced by parse_junos_config()
+JUNOS_AUDIT_RULES = [
+    {"id": "dhcp_snooping", "pattern": r"\b(dhcp-security|examine-dhcp)\b", "when": "missing",
+     "keywords": ("dhcp-security", "examine-dhcp"),
+     "finding": ("DHCP Snooping Disabled", "DHCP attacks possible", "Enable dhcp-security on access VLANs", "Layer 2")},
+    {"id": "unused_interfaces", "block": "interfaces", "pattern": r"^[ \t]*set interfaces \S+ disable\b", "when": "missing",
+     "keywords": (),
+     "finding": ("Unused Interfaces Active (heuristic)", "Potential unused interfaces not administratively disabled", "Review & disable unused interfaces", "Layer 2")},
+    {"id": "telnet", "pattern": r"^[ \t]*set system services telnet\b", "when": "present",
+     "keywords": ("set system services telnet",),
+     "finding": ("Telnet Enabled", "Credentials exposed in cleartext", "Delete 'system services telnet' and use SSH only", "Access Control")},
+    {"id": "snmp_default_community", "pattern": r"^[ \t]*set snmp community[ \t]+\"?(public|private)\b", "when": "present",
+     "keywords": ("set snmp community",),
+     "finding": ("Default SNMP Community", "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control")},
+    {"id": "acls", "pattern": r"^[ \t]*set firewall (family \S+ )?filter\b", "when": "missing",
+     "keywords": ("set firewall",),
+     "finding": ("No Firewall Filters Found", "Unrestricted traffic flows", "Apply firewall filters (including lo0 protection)", "Access Control")},
+    {"id": "aaa", "pattern": r"^[ \t]*set system (authentication-order|tacplus-server|radius-server)\b", "when": "missing",
+     "keywords": ("authentication-order", "tacplus-server", "radius-server"),
+     "finding": ("No AAA Configured", "No centralized authentication", "Configure TACACS+/RADIUS and authentication-order", "AAA")},
+    {"id": "ssh_root_login", "pattern": r"^[ \t]*set system services ssh root-login allow\b", "when": "present",
+     "keywords": ("root-login allow",),
+     "finding": ("SSH Root Login Allowed", "Direct root access over SSH", "Set 'root-login deny' and use named accounts", "AAA")},
+    {"id": "syslog", "pattern": r"^[ \t]*set system syslog host\b", "when": "missing",
+     "keywords": ("set system syslog host",),
+     "finding": ("No Syslog Configured", "No centralized log collection", "Configure 'system syslog host'", "Logging")},
+    {"id": "ntp", "pattern": r"^[ \t]*set system ntp (server|peer)\b", "when": "missing",
+     "keywords": ("set system ntp",),
+     "finding": ("No NTP Configured", "Logs not time-synced", "Configure NTP servers", "Logging")},
+    {"id": "snmpv3", "pattern": r"^[ \t]*set snmp v3\b", "when": "missing",
+     "keywords": ("set snmp v3",),
+     "finding": ("SNMPv3 Not Configured", "Monitoring unencrypted", "Use SNMPv3 with authentication & privacy", "Logging")},
+    {"id": "ftp", "pattern": r"^[ \t]*set system services ftp\b", "when": "present",
+     "keywords": ("set system services ftp",),
+     "finding": ("FTP Enabled", "Credentials exposed in cleartext", "Delete 'system services ftp'; use SCP/SFTP", "Crypto")},
+    {"id": "http_server", "pattern": r"^[ \t]*set system services web-management http\b", "when": "present",
+     "keywords": ("web-management http",),
+     "finding": ("HTTP Server Enabled", "Management traffic unencrypted", "Use 'web-management https' only", "Crypto")},
+    {"id": "ssh", "pattern": r"^[ \t]*set system services ssh\b", "when": "missing",
+     "keywords": ("set system services ssh",),
+     "finding": ("SSH Not Configured", "Secure remote management not enforced", "Enable 'system services ssh'", "Crypto")},
+    {"id": "fhrp", "pattern": r"\bvrrp-group\b", "when": "missing",
+     "keywords": ("vrrp-group",),
+     "finding": ("No First-Hop Redundancy (VRRP)", "Single point of failure for gateway", "Implement VRRP where required", "Resilience")},
+    {"id": "storm_control", "pattern": r"\bstorm-control\b", "when": "missing",
+     "keywords": ("storm-control",),
+     "finding": ("No Storm Control", "Broadcast/multicast flood risk", "Enable storm-control on access ports", "Resilience")},
+    {"id": "spanning_tree", "pattern": r"^[ \t]*set protocols (rstp|mstp|vstp|stp)\b", "when": "missing",
+     "keywords": ("set protocols",),
+     "finding": ("Spanning Tree Not Configured", "Switching loops possible", "Enable RSTP/MSTP on switching interfaces", "Resilience")},
+    {"id": "password_type9", "pattern": r"\"\$9\$", "when": "present",
+     "keywords": ("$9$",),
+     "finding": ("Weak Password Encryption ($9$)", "Easily reversible encryption", "Replace $9$ secrets with hashed or external credentials", "Config Mgmt")},
+    {"id": "archive", "pattern": r"^[ \t]*set system archival\b", "when": "missing",
+     "keywords": ("set system archival",),
+     "finding": ("No Config Archiving", "No config backup/versioning", "Configure 'system archival' transfer-on-commit", "Config Mgmt")},
+]
 
-    if not re.search(r"\b(ntp server|clock set|ntp peer)\b", content, re.IGNORECASE):
-        findings.append(("No NTP Configured", filename, "Logs not time-synced", "Configure NTP servers", "Logging"))
+# Evaluated against the flattened 'set ...' form produced by parse_fortios_config()
+FORTIOS_AUDIT_RULES = [
+    {"id": "unused_interfaces", "block": "system interface", "pattern": r"^[ \t]*set system interface \S+ status down\b", "when": "missing",
+     "keywords": (),
+     "finding": ("Unused Interfaces Active (heuristic)", "Potential unused interfaces not administratively down", "Set 'status down' on unused interfaces", "Layer 2")},
+    {"id": "telnet", "pattern": r"\ballowaccess\b[^\n]*\btelnet\b", "when": "present",
+     "keywords": ("allowaccess",),
+     "finding": ("Telnet Enabled", "Credentials exposed in cleartext", "Remove telnet from interface allowaccess", "Access Control")},
+    {"id": "snmp_default_community", "pattern": r"^[ \t]*set system snmp community \S+ name \"?(public|private)\b", "when": "present",
+     "keywords": ("set system snmp community",),
+     "finding": ("Default SNMP Community", "Unauthorized SNMP access risk", "Use SNMPv3 with strong credentials", "Access Control")},
+    {"id": "acls", "pattern": r"^[ \t]*set firewall policy\b", "when": "missing",
+     "keywords": ("set firewall policy",),
+     "finding": ("No Firewall Policies Found", "Unrestricted traffic flows", "Define explicit firewall policies", "Access Control")},
+    {"id": "aaa", "pattern": r"^[ \t]*set user (tacacs\+|radius|ldap)\b", "when": "missing",
+     "keywords": ("set user tacacs+", "set user radius", "set user ldap"),
+     "finding": ("No AAA Configured", "No centralized authentication", "Configure TACACS+/RADIUS/LDAP for admins", "AAA")},
+    {"id": "password_policy", "pattern": r"^[ \t]*set system password-policy status enable\b", "when": "missing",
+     "keywords": ("set system password-policy",),
+     "finding": ("No Admin Password Policy", "Weak administrator passwords accepted", "Enable system password-policy", "AAA")},
+    {"id": "syslog", "pattern": r"^[ \t]*set log (syslogd\d?|fortianalyzer\d?) setting status enable\b", "when": "missing",
+     "keywords": ("set log",),
+     "finding": ("No Syslog Configured", "No centralized log collection", "Enable syslogd or FortiAnalyzer logging", "Logging")},
+    {"id": "ntp", "pattern": r"^[ \t]*set system ntp ntpsync enable\b", "when": "missing",
+     "keywords": ("ntpsync",),
+     "finding": ("No NTP Configured", "Logs not time-synced", "Enable 'ntpsync' with trusted servers", "Logging")},
+    {"id": "snmpv3", "pattern": r"^[ \t]*set system snmp user\b", "when": "missing",
+     "keywords": ("set system snmp user",),
+     "finding": ("SNMPv3 Not Configured", "Monitoring unencrypted", "Use SNMPv3 users with auth & priv", "Logging")},
+    {"id": "http_server", "pattern": r"\ballowaccess\b[^\n]*\bhttp\b", "when": "present",
+     "keywords": ("allowaccess",),
+     "finding": ("HTTP Server Enabled", "Management traffic unencrypted", "Remove http from interface allowaccess; use https", "Crypto")},
+    {"id": "strong_crypto", "pattern": r"^[ \t]*set system global strong-crypto disable\b", "when": "present",
+     "keywords": ("strong-crypto disable",),
+     "finding": ("Strong Crypto Disabled", "Weak ciphers allowed for management", "Set 'strong-crypto enable'", "Crypto")},
+    {"id": "ha", "pattern": r"^[ \t]*set system ha mode (a-p|a-a)\b", "when": "missing",
+     "keywords": ("set system ha mode",),
+     "finding": ("No High Availability Cluster", "Single point of failure for gateway", "Configure FortiGate HA (a-p or a-a)", "Resilience")},
+    {"id": "archive", "pattern": r"^[ \t]*set system global revision-backup-on-logout enable\b", "when": "missing",
+     "keywords": ("revision-backup-on-logout",),
+     "finding": ("No Config Archiving", "No config backup/versioning", "Enable revision backups or central config management", "Config Mgmt")},
+]
 
-    if not re.search(r"snmp-server group .* v3", content, re.IGNORECASE):
-        findings.append(("SNMPv3 Not Configured", filename, "Monitoring unencrypted", "Use SNMPv3 with authentication & privacy", "Logging"))
+def group_set_lines(entries):
+    """Render (header, line) pairs as header + indented lines, grouping by header in first-seen order."""
+    groups = {}
+    for header, line in entries:
+        groups.setdefault(header, []).append(line)
+    return "".join(header + "\n" + "".join(f" {line}\n" for line in lines) for header, lines in groups.items())
 
-    # --- 5. Cryptographic & Protocol Risks ---
-    if re.search(r'(?mi)^\s*(service ftp|ftp server|ip ftp)\b', content):
-        findings.append(("FTP Enabled", filename, "Credentials exposed in cleartext", "Disable FTP; use SFTP/SCP/FTPS", "Crypto"))
+def junos_entry(path):
+    return " ".join(path.split(None, 2)[:2]), "set " + path
 
-    if re.search(r'(?mi)^\s*ip http\b', content):
-        findings.append(("HTTP Server Enabled", filename, "Management traffic unencrypted", "Disable HTTP; enable HTTPS (ip http secure-server)", "Crypto"))
+def parse_junos_config(content):
+    """Flatten set-style or hierarchical Junos into grouped 'set <path>' lines in one pass."""
+    entries = []
+    stack = []
+    for raw in content.splitlines():
+        line = raw.split(" ## ", 1)[0].strip()
+        if not line or line.startswith(("#", "/*", "*")):
+            continue
+        if line.startswith("inactive: "):
+            line = line[len("inactive: "):]
+        if line.startswith("set "):
+            entries.append(junos_entry(line[4:]))
+        elif line.endswith("{"):
+            stack.append(line[:-1].strip())
+        elif line.startswith("}"):
+            if stack:
+                stack.pop()
+        elif line.endswith(";"):
+            entries.append(junos_entry(" ".join(stack + [line[:-1].strip()])))
+    return group_set_lines(entries)
 
-    if not re.search(r"\bip ssh\b", content, re.IGNORECASE):
-        findings.append(("SSH Not Configured", filename, "Secure remote management not enforced", "Enable SSH v2 and restrict vty to SSH", "Crypto"))
+def parse_fortios_config(content):
+    """Flatten FortiOS config/edit/set blocks into grouped 'set <path> <key> <value>' lines in one pass.
 
-    # --- 6. Resilience & Availability ---
-    if not re.search(r"\b(standby\b|vrrp\b|hsrp\b)", content, re.IGNORECASE):
-        findings.append(("No First-Hop Redundancy (HSRP/VRRP)", filename, "Single point of failure for gateway", "Implement HSRP/VRRP where required", "Resilience"))
+    The header is the config path up to the first 'edit' (e.g. 'system interface "port1"').
+    """
+    entries = []
+    stack = []  # (kind, name) with kind 'config' or 'edit'
+    for raw in content.splitlines():
+        line = raw.strip()
+        word, _, rest = line.partition(" ")
+        if word == "config":
+            stack.append(("config", rest))
+        elif word == "edit":
+            stack.append(("edit", rest))
+        elif word == "next":
+            if stack and stack[-1][0] == "edit":
+                stack.pop()
+        elif word == "end":
+            while stack and stack.pop()[0] != "config":
+                pass
+        elif word in ("set", "unset") and stack:
+            header_parts = []
+            for kind, name in stack:
+                header_parts.append(name)
+                if kind == "edit":
+                    break
+            path = " ".join(name for _, name in stack)
+            entries.append((" ".join(header_parts), f"{word} {path} {rest}"))
+    return group_set_lines(entries)
 
-    if not re.search(r"\bstorm-control\b", content, re.IGNORECASE):
-        findings.append(("No Storm Control", filename, "Broadcast/multicast flood risk", "Enable storm-control on access ports", "Resilience"))
+# Per-interface features: one finditer over an interface block yields the set of named
+# groups that matched, which every interface-scoped rule is then checked against.
+SWITCHPORT_FEATURES = (
+    r"^[ \t]*(?:(?P<shutdown>shutdown\b)|(?P<description>description\b)"
+    r"|(?P<mode_access>switchport (?:mode )?access\b)|(?P<mode_trunk>switchport mode trunk\b)"
+    r"|(?P<port_security>switchport port-security\b)|(?P<storm_control>storm-control\b)"
+    r"|(?P<native_vlan_1>switchport trunk native vlan[ \t]+1\b))"
+)
+JUNOS_INTERFACE_FEATURES = (
+    r"^[ \t]*set interfaces \S+ (?:(?P<shutdown>disable\b)|(?P<description>description\b)"
+    r"|unit \S+ family ethernet-switching (?:(?P<mode_access>(?:interface|port)-mode access\b)"
+    r"|(?P<mode_trunk>(?:interface|port)-mode trunk\b))|(?P<native_vlan_1>native-vlan-id 1\b))"
+)
+FORTIOS_INTERFACE_FEATURES = (
+    r"^[ \t]*set system interface \S+ (?:(?P<shutdown>status down\b)|(?P<description>(?:description|alias)\b))"
+)
 
-    if not re.search(r"\bspanning-tree\b", content, re.IGNORECASE):
-        findings.append(("Spanning Tree Not Configured", filename, "Switching loops possible", "Enable STP and configure root guard/portfast", "Resilience"))
+# Cheap vendor detection: each vendor lists case-sensitive line-start signatures, searched
+# in the first CONFIG_SNIFF_CHARS of a file in this order; anything unrecognised is Cisco IOS.
+# They are compiled as '\n(?:...)' so the regex engine can skip ahead on the literal newline,
+# which is far cheaper than a MULTILINE '^' tried at every position.
+CONFIG_SNIFF_CHARS = 4096
 
-    # --- 7. Configuration Management ---
-    if re.search(r"\bpassword 7\b", content, re.IGNORECASE):
-        findings.append(("Weak Password Encryption (Type 7)", filename, "Easily reversible encryption", "Avoid type 7; use enable secret / stronger hashes", "Config Mgmt"))
+CONFIG_VENDORS = {
+    "fortios": {"label": "FortiOS",
+                "detect": (r"#config-version=", r"config system (global|interface|admin)\b"),
+                "parse": parse_fortios_config, "rules": FORTIOS_AUDIT_RULES,
+                "interfaces": ("system interface", FORTIOS_INTERFACE_FEATURES)},
+    "junos": {"label": "Junos",
+              "detect": (r"set (version|system|interfaces|protocols|groups|apply-groups)\b", r"version [^\n;]+;",
+                         r"(system|interfaces|groups) \{"),
+              "parse": parse_junos_config, "rules": JUNOS_AUDIT_RULES,
+              "interfaces": ("interfaces", JUNOS_INTERFACE_FEATURES)},
+    "nxos": {"label": "Cisco NX-OS",
+             "detect": (r"!Command: show running-config", r"!Time: ", r"feature \S+", r"boot nxos\b",
+                        r"version \d+\.\d+\(\d+\)[^\n]* Bios:"),
+             "parse": None, "rules": NXOS_AUDIT_RULES, "interfaces": ("interface", SWITCHPORT_FEATURES)},
+    "eos": {"label": "Arista EOS",
+            "detect": (r"! device: \S+ \(.*EOS-", r"! Command: show running-config", r"management api http-commands\b",
+                       r"daemon TerminAttr\b", r"transceiver qsfp default-mode\b"),
+            "parse": None, "rules": EOS_AUDIT_RULES, "interfaces": ("interface", SWITCHPORT_FEATURES)},
+    "ios": {"label": "Cisco IOS", "detect": None, "parse": None, "rules": CONFIG_AUDIT_RULES,
+            "interfaces": ("interface", SWITCHPORT_FEATURES)},
+}
+
+def compile_block_regex(block):
+    # The block header plus its indented lines (bare '!' and blank lines do not end
+    # a block, matching parse_config_sections)
+    return r"^" + re.escape(block) + r"[ \t][^\n]*(?:\n(?:[ \t][^\n]*|!?[ \t\r]*(?=\n|\Z)))*"
+
+def compile_both(pattern):
+    """Compile a str pattern and its bytes twin (for scanning undecoded/mmapped configs)."""
+    return (re.compile(pattern, re.IGNORECASE | re.MULTILINE),
+            re.compile(pattern.encode("ascii"), re.IGNORECASE | re.MULTILINE))
+
+def compile_rule_pack(rules):
+    for rule in rules:
+        rule["regex"], rule["bregex"] = compile_both(rule["pattern"])
+        if "block" in rule:
+            rule["block_regex"], rule["block_bregex"] = compile_both(compile_block_regex(rule["block"]))
+
+for _vendor in CONFIG_VENDORS.values():
+    if _vendor["detect"]:
+        _vendor["detect"] = re.compile(r"\n(?:" + "|".join(_vendor["detect"]) + ")")
+    compile_rule_pack(_vendor["rules"])
+    block, features = _vendor["interfaces"]
+    _vendor["interface_block_regex"], _vendor["interface_block_bregex"] = compile_both(compile_block_regex(block))
+    _vendor["interface_features"], _vendor["interface_bfeatures"] = compile_both(features)
+
+def detect_vendor(content):
+    """Return the CONFIG_VENDORS key for a config (str, bytes or mmap), looking only at its first few KB."""
+    sample = content[:CONFIG_SNIFF_CHARS]
+    if not isinstance(sample, str):
+        sample = sample.decode("utf-8", errors="ignore")
+    sample = "\n" + sample
+    for vendor, spec in CONFIG_VENDORS.items():
+        if spec["detect"] is not None and spec["detect"].search(sample):
+            return vendor
+    return "ios"
+
+def prepare_config(content, vendor=None):
+    """Detect the vendor and return (vendor, text in the form its rule pack expects).
+
+    Vendors audited as-is keep bytes/mmap content undecoded; vendors with a parser
+    need text, so their content is decoded first.
+    """
+    if vendor is None:
+        vendor = detect_vendor(content)
+    parse = CONFIG_VENDORS[vendor]["parse"]
+    if parse is None:
+        return vendor, content
+    if not isinstance(content, str):
+        content = decode_config(bytes(content))
+    return vendor, parse(content)
+
+def config_finding(rule, filename):
+    finding, risk_desc, recommendation, category = rule["finding"]
+    return (finding, filename, risk_desc, recommendation, category)
+
+def build_line_index(content):
+    """Sorted offsets of every newline in a config (str, bytes or mmap).
+
+    Built once per file, so offset -> line lookups are a binary search.
+    """
+    if isinstance(content, str):
+        if content.isascii():
+            codes = np.frombuffer(content.encode("ascii"), dtype=np.uint8)
+        else:
+            # one uint32 per character keeps offsets in characters, not bytes
+            codes = np.frombuffer(content.encode("utf-32-le"), dtype=np.uint32)
+    else:
+        codes = np.frombuffer(content, dtype=np.uint8)
+    # chunked so the comparison mask stays small for very large (mmapped) files
+    step = 1 << 20
+    return np.concatenate([np.flatnonzero(codes[i:i + step] == 10) + i for i in range(0, len(codes), step)]
+                          or [np.empty(0, dtype=np.intp)])
 
-    if not re.search(r"\barchive\b", content, re.IGNORECASE):
-        findings.append(("No Config Archiving", filename, "No config backup/versioning", "Enable config archive/backup/versioning", "Config Mgmt"))
+def line_at(content, line_index, offset, max_chars=160):
+    """Return (1-based line number, stripped line text) for an offset into content."""
+    i = int(np.searchsorted(line_index, offset))  # newlines before offset
+    start = int(line_index[i - 1]) + 1 if i else 0
+    end = int(line_index[i]) if i < len(line_index) else len(content)
+    text = content[start:end]
+    if not isinstance(text, str):
+        text = text.decode("utf-8", errors="ignore")
+    return i + 1, text.strip()[:max_chars]
 
-    if not re.search(r"\bservice password-encryption\b", content, re.IGNORECASE):
-        findings.append(("Passwords Not Encrypted", filename, "Plaintext passwords in config", "Enable 'service password-encryption' and use secrets", "Config Mgmt"))
+@profiled("audit_config")
+def audit_config(filename, content, vendor=None, prepared=False, evidence=None):
+    """Audit one config with the rule pack of its (auto-detected) vendor.
 
+    'prepared' means content is already in prepare_config() form for 'vendor'. If an
+    'evidence' dict is given, it is filled with {finding: (line, snippet)} for rules
+    that fire on a match, taken from that match; line is None for vendors whose
+    content is flattened first, as it would point into the flattened form.
+    """
+    findings = []
+    timed = _current_profiler.get() is not None
+    if not prepared:
+        if timed:
+            started = time.perf_counter()
+        vendor, content = prepare_config(content, vendor)
+        if timed:
+            record_substage(f"parse:{vendor}", time.perf_counter() - started)
+    # str content uses the str patterns; bytes/mmap content is scanned without decoding
+    regex, block_regex = ("regex", "block_regex") if isinstance(content, str) else ("bregex", "block_bregex")
+    blocks = {}
+    line_index = None
+    for rule in CONFIG_VENDORS[vendor]["rules"]:
+        if timed:
+            started = time.perf_counter()
+        if "block" in rule:
+            # don't spam for each interface; one finding per file as heuristic
+            if rule["block"] not in blocks:
+                blocks[rule["block"]] = rule[block_regex].findall(content)
+            hit = any(not rule[regex].search(block) for block in blocks[rule["block"]])
+        else:
+            match = rule[regex].search(content)
+            hit = match is not None if rule["when"] == "present" else match is None
+            if hit and match is not None and evidence is not None:
+                if line_index is None:
+                    line_index = build_line_index(content)
+                line, snippet = line_at(content, line_index, match.start())
+                evidence[rule["finding"][0]] = (None if CONFIG_VENDORS[vendor]["parse"] else line, snippet)
+        if hit:
+            findings.append(config_finding(rule, filename))
+        if timed:
+            record_substage(f"rule:{rule['id']}", time.perf_counter() - started)
     return findings
 
-def get_risk_score(num_findings):
-    if num_findings == 0:
-        return "No Risk"
-    elif num_findings <= 2:
-        return "Low"
-    elif num_findings <= 5:
-        return "Medium"
+# ---------------------------
+# Per-interface (block-level) evaluation
+# ---------------------------
+# Interface-scoped rules: a port is flagged when it has every feature in "all" and none
+# in "none" (feature names are the named groups of the vendor's interface regex). Rules
+# whose features a vendor's regex doesn't define are skipped for that vendor.
+INTERFACE_AUDIT_RULES = [
+    {"id": "port_security", "all": ("mode_access",), "none": ("port_security", "shutdown"),
+     "finding": ("Access Port Without Port Security", "MAC flooding risk", "Enable port security on these ports", "Layer 2")},
+    {"id": "storm_control", "all": ("mode_access",), "none": ("storm_control", "shutdown"),
+     "finding": ("Access Port Without Storm Control", "Broadcast/multicast flood risk", "Enable storm-control on these ports", "Resilience")},
+    {"id": "native_vlan_1", "all": ("mode_trunk", "native_vlan_1"), "none": ("shutdown",),
+     "finding": ("Trunk Uses Native VLAN 1", "VLAN hopping risk", "Change the native VLAN from 1", "Layer 2")},
+    {"id": "unused_interfaces", "all": (), "none": ("shutdown", "description", "virtual"),
+     "finding": ("Active Port Without Description (possibly unused)", "Unused ports left active can be patched into", "Describe in-use ports and shut down the rest", "Layer 2")},
+]
+
+# Logical interfaces are never 'unused ports'
+VIRTUAL_INTERFACE_RE = re.compile(
+    r"(vlan|loopback|lo|tunnel|port-channel|po|bvi|nve|mgmt|management|irb|ae|vme|em|fxp|me|null)[\d./:]*$",
+    re.IGNORECASE
+)
+
+def interface_rules_for(vendor):
+    groups = set(CONFIG_VENDORS[vendor]["interface_features"].groupindex) | {"virtual"}
+    return [rule for rule in INTERFACE_AUDIT_RULES if groups.issuperset(rule["all"] + rule["none"])]
+
+@profiled("audit_interfaces")
+def audit_interfaces(content, vendor=None, prepared=False):
+    """Evaluate every interface block once against all interface-scoped rules.
+
+    Returns compact per-port findings as a list of (rule_id, [interface names]) in
+    rule order, only for rules that flagged at least one port.
+    """
+    if not prepared:
+        vendor, content = prepare_config(content, vendor)
+    spec = CONFIG_VENDORS[vendor]
+    block = spec["interfaces"][0]
+    as_text = isinstance(content, str)
+    features_re = spec["interface_features" if as_text else "interface_bfeatures"]
+    block_re = spec["interface_block_regex" if as_text else "interface_block_bregex"]
+    rules = interface_rules_for(vendor)
+    flagged = {rule["id"]: [] for rule in rules}
+    for text in block_re.findall(content):
+        header = text.partition("\n" if as_text else b"\n")[0]
+        if not as_text:
+            header = header.decode("utf-8", errors="ignore")
+        name = header[len(block):].strip().strip('"')
+        features = {m.lastgroup for m in features_re.finditer(text)}
+        if VIRTUAL_INTERFACE_RE.match(name):
+            features.add("virtual")
+        for rule in rules:
+            if features.issuperset(rule["all"]) and features.isdisjoint(rule["none"]):
+                flagged[rule["id"]].append(name)
+    return [(rid, names) for rid, names in flagged.items() if names]
+
+def compress_port_list(names):
+    """Collapse consecutive ports into ranges, e.g. Gi1/0/1, Gi1/0/2, Gi1/0/3 -> Gi1/0/1-3."""
+    runs = []  # [prefix, first, last]
+    for name in names:
+        m = re.match(r"(.*?)(\d+)$", name)
+        if not m:
+            runs.append([name, None, None])
+            continue
+        prefix, number = m.group(1), int(m.group(2))
+        if runs and runs[-1][0] == prefix and runs[-1][2] is not None and runs[-1][2] + 1 == number:
+            runs[-1][2] = number
+        else:
+            runs.append([prefix, number, number])
+    parts = []
+    for prefix, first, last in runs:
+        if first is None:
+            parts.append(prefix)
+        elif first == last:
+            parts.append(f"{prefix}{first}")
+        else:
+            parts.append(f"{prefix}{first}-{last}")
+    return ", ".join(parts)
+
+INTERFACE_RULES_BY_ID = {rule["id"]: rule for rule in INTERFACE_AUDIT_RULES}
+
+def audit_device(filename, content, vendor=None):
+    """Parse a config once and return (file-level findings, per-port findings, evidence)."""
+    vendor, content = prepare_config(content, vendor)
+    evidence = {}
+    findings = audit_config(filename, content, vendor, prepared=True, evidence=evidence)
+    return findings, audit_interfaces(content, vendor, prepared=True), evidence
+
+def with_evidence(findings, evidence):
+    """Extend finding tuples with (Line, Evidence) columns."""
+    return [f + evidence.get(f[0], (None, "")) for f in findings]
+
+@contextmanager
+def mapped_file(path):
+    """Yield a read-only mmap of a file (b'' for empty files, which cannot be mapped)."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+@profiled("audit_config_path")
+def audit_config_path(path, filename=None, vendor=None):
+    """Audit one config on disk through mmap; returns (findings, port findings, evidence, vendor)."""
+    filename = filename or os.path.basename(path)
+    with mapped_file(path) as data:
+        vendor = vendor or detect_vendor(data)
+        findings, port_findings, evidence = audit_device(filename, data, vendor)
+    return findings, port_findings, evidence, vendor
+
+def directory_fingerprint(directory):
+    """(relative path, size, mtime) for every regular file under a directory.
+
+    Symlinks are skipped, so the audit never leaves the directory, and so are
+    entries that vanish or cannot be read while walking.
+    """
+    parts = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            try:
+                info = os.lstat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(info.st_mode):
+                parts.append((os.path.relpath(path, directory), info.st_size, info.st_mtime_ns))
+    return parts
+
+@profiled("audit_config_directory")
+def audit_config_directory(directory):
+    """Audit every (non-hidden) file under a directory, memory-mapped and scanned as bytes.
+
+    Returns the same tuple as run_config_audit() so results render the same way.
+    """
+    results = []
+    device_summary = defaultdict(list)
+    vendors = {}
+    port_rows = []
+    warnings = []
+    files = directory_fingerprint(directory)
+    for i, (name, _, _) in enumerate(files):
+        report_job_progress(i / len(files), f"Auditing {name}")
+        try:
+            findings, port_findings, evidence, vendors[name] = audit_config_path(os.path.join(directory, name), name)
+        except (OSError, ValueError) as e:
+            warnings.append(f"Failed to read file {name}: {e}")
+            continue
+        results.extend(with_evidence(findings, evidence))
+        device_summary[name].extend(findings)
+        port_rows.extend(port_finding_rows(name, port_findings))
+    return results, dict(device_summary), [], warnings, vendors, port_rows
+
+def port_finding_rows(filename, port_findings):
+    """Rows of (File, Finding, Ports, Port Count, Recommendation, Category) for display."""
+    rows = []
+    for rid, names in port_findings:
+        finding, risk_desc, recommendation, category = INTERFACE_RULES_BY_ID[rid]["finding"]
+        rows.append((filename, finding, compress_port_list(names), len(names), recommendation, category))
+    return rows
+
+# ---------------------------
+# Incremental (diff-aware) config re-audit
+# ---------------------------
+# A top-level line plus the indented lines under it; bare '!' and blank lines do not end
+# a section
+CONFIG_SECTION_RE = re.compile(r"^([^ \t\n][^\n]*)((?:\n(?:[ \t][^\n]*|!?[ \t\r]*(?=\n|\Z)))*)", re.MULTILINE)
+
+def parse_config_sections(content):
+    """Split a config into top-level sections keyed by header line.
+
+    Repeated headers get a ' #n' suffix so every key is unique; lines before the
+    first header are kept under the '' key.
+    """
+    sections = {}
+    seen = defaultdict(int)
+    first = CONFIG_SECTION_RE.search(content)
+    preamble = content[:first.start()] if first else content
+    for m in CONFIG_SECTION_RE.finditer(content):
+        header = m.group(1).rstrip()
+        if header in ("", "!"):
+            # stray lines under a bare '!' count as preamble
+            preamble += m.group(0)
+            continue
+        seen[header] += 1
+        key = header if seen[header] == 1 else f"{header} #{seen[header]}"
+        sections[key] = m.group(0)
+    if preamble.strip(" \t\r\n!"):
+        sections[""] = preamble
+    return sections
+
+def is_block_section(key, block):
+    """True if a section header opens a block of this kind (e.g. 'interface', 'system interface')."""
+    return key[:len(block)].lower() == block and key[len(block):len(block) + 1] in (" ", "\t")
+
+def rule_matches_section(rule, key, text, text_lower):
+    """True if the rule's pattern applies to one section (for block rules: the block is flagged)."""
+    if "block" in rule:
+        return is_block_section(key, rule["block"]) and rule["regex"].search(text) is None
+    return any(k in text_lower for k in rule["keywords"]) and rule["regex"].search(text) is not None
+
+def rule_fires(rule, matched_sections):
+    if "block" in rule or rule["when"] == "present":
+        return bool(matched_sections)
+    return not matched_sections
+
+def build_config_audit_state(filename, config, vendor=None):
+    """Evaluate every rule per section of a config (text or parse_config_sections() tree).
+
+    Text is vendor-detected and normalised first; a section tree is taken to be already
+    normalised for 'vendor' (IOS by default). The returned state is what
+    audit_config_delta() takes as its 'previous' argument.
+    """
+    if isinstance(config, dict):
+        vendor, sections = vendor or "ios", config
+    else:
+        vendor, text = prepare_config(config, vendor)
+        sections = parse_config_sections(text)
+    rules = CONFIG_VENDORS[vendor]["rules"]
+    rule_matches = {rule["id"]: set() for rule in rules}
+    for key, text in sections.items():
+        text_lower = text.lower()
+        for rule in rules:
+            if rule_matches_section(rule, key, text, text_lower):
+                rule_matches[rule["id"]].add(key)
+    return {"filename": filename, "vendor": vendor, "sections": sections, "rule_matches": rule_matches}
+
+def is_config_audit_state(obj):
+    return isinstance(obj, dict) and "rule_matches" in obj and "sections" in obj
+
+def state_findings(state):
+    rules = CONFIG_VENDORS[state.get("vendor", "ios")]["rules"]
+    return [config_finding(rule, state["filename"]) for rule in rules if rule_fires(rule, state["rule_matches"][rule["id"]])]
+
+@profiled("audit_config_delta")
+def audit_config_delta(filename, previous, current):
+    """Re-audit only the rules that depend on sections changed between two config versions.
+
+    'previous' may be the old config text, its parse_config_sections() tree, or the
+    state returned by an earlier call; 'current' is the new text or section tree.
+    Returns a dict with 'added' and 'resolved' findings, the full 'findings' list for
+    the new version and the 'state' to pass in on the next change. If the device
+    changed platform, both versions are audited in full.
+    """
+    if not is_config_audit_state(previous):
+        previous = build_config_audit_state(filename, previous)
+    vendor = previous.get("vendor", "ios")
+    if isinstance(current, dict):
+        new_sections = current
+    else:
+        current_vendor = detect_vendor(current)
+        if current_vendor != vendor:
+            state = build_config_audit_state(filename, current, current_vendor)
+            before, findings = state_findings(previous), state_findings(state)
+            return {"added": [f for f in findings if f not in before],
+                    "resolved": [f for f in before if f not in findings],
+                    "findings": findings, "state": state}
+        new_sections = parse_config_sections(prepare_config(current, vendor)[1])
+    old_sections = previous["sections"]
+    rules = CONFIG_VENDORS[vendor]["rules"]
+
+    changed = [k for k, text in new_sections.items() if old_sections.get(k) != text]
+    changed += [k for k in old_sections if k not in new_sections]
+
+    # Copy-on-write: only rules touched by a changed section get a fresh match set
+    rule_matches = dict(previous["rule_matches"])
+    copied = set()
+    for key in changed:
+        text = new_sections.get(key)
+        text_lower = text.lower() if text is not None else ""
+        for rule in rules:
+            rid = rule["id"]
+            was = key in rule_matches[rid]
+            now = text is not None and rule_matches_section(rule, key, text, text_lower)
+            if was == now:
+                continue
+            if rid not in copied:
+                rule_matches[rid] = set(rule_matches[rid])
+                copied.add(rid)
+            if now:
+                rule_matches[rid].add(key)
+            else:
+                rule_matches[rid].discard(key)
+
+    added, resolved, findings = [], [], []
+    for rule in rules:
+        rid = rule["id"]
+        now = rule_fires(rule, rule_matches[rid])
+        if now:
+            findings.append(config_finding(rule, filename))
+        if rid in copied:
+            before = rule_fires(rule, previous["rule_matches"][rid])
+            if now and not before:
+                added.append(config_finding(rule, filename))
+            elif before and not now:
+                resolved.append(config_finding(rule, filename))
+
+    state = {"filename": filename, "vendor": vendor, "sections": new_sections, "rule_matches": rule_matches}
+    return {"added": added, "resolved": resolved, "findings": findings, "state": state}
+
+# ---------------------------
+# Risk scoring
+# ---------------------------
+SEVERITY_WEIGHTS = {"Critical": 10, "High": 5, "Medium": 2, "Low": 1}
+
+# Severity per rule id (ids are shared across vendor packs); unlisted rules are Medium
+RULE_SEVERITY = {
+    "telnet": "Critical", "snmp_default_community": "Critical", "nopassword_users": "Critical",
+    "ftp": "High", "http_server": "High", "ssh": "High", "aaa": "High", "ssh_root_login": "High",
+    "password_type7": "High", "password_type9": "High", "password_strength": "High",
+    "password_policy": "High", "strong_crypto": "High",
+    "ntp": "Low", "fhrp": "Low", "ha": "Low", "storm_control": "Low", "archive": "Low",
+    "unused_interfaces": "Low",
+}
+
+# The most one category can add to a device's score, so a pile of low-impact gaps of one
+# kind (e.g. logging) cannot outrank a couple of critical exposures
+CATEGORY_CAPS = {"Layer 2": 12, "Access Control": 25, "AAA": 20, "Logging": 6, "Crypto": 20,
+                 "Resilience": 4, "Config Mgmt": 10}
+
+# Upper bounds (exclusive) for Low and Medium; at or above the second is High. In
+# percentile mode the same pair is read as fleet percentiles.
+RISK_THRESHOLDS = (10, 20)
+RISK_LEVELS = ["No Risk", "Low", "Medium", "High"]
+
+FINDING_SEVERITY = {rule["finding"][0]: RULE_SEVERITY.get(rule["id"], "Medium")
+                    for vendor in CONFIG_VENDORS.values() for rule in vendor["rules"]}
+
+SEVERITY_ORDER = ["Critical", "High", "Medium", "Low"]
+
+def finding_severity(findings):
+    """Severity for each value of a Finding column (ordered categorical for a categorical column)."""
+    if isinstance(findings.dtype, pd.CategoricalDtype):
+        # Look up each distinct finding once and broadcast through the codes
+        per_finding = pd.Categorical(findings.cat.categories.map(FINDING_SEVERITY).fillna("Medium"),
+                                     categories=SEVERITY_ORDER, ordered=True)
+        return pd.Series(pd.Categorical.from_codes(per_finding.codes[findings.cat.codes.to_numpy()], dtype=per_finding.dtype),
+                         index=findings.index, name=findings.name)
+    return findings.map(FINDING_SEVERITY).fillna("Medium")
+
+@profiled("score_devices")
+def score_devices(df_findings, thresholds=RISK_THRESHOLDS, percentiles=False,
+                  weights=SEVERITY_WEIGHTS, caps=CATEGORY_CAPS):
+    """Score every device in one pass over the findings table.
+
+    Each finding weighs its severity, weights are summed per device and category and
+    capped per category, then summed per device. Returns Device, Findings Count, Score,
+    Percentile (within this fleet) and Risk Score, in first-seen device order.
+    """
+    if df_findings.empty:
+        return pd.DataFrame(columns=["Device", "Findings Count", "Score", "Percentile", "Risk Score"])
+    weight = finding_severity(df_findings["Finding"]).map(weights).astype(float)
+    per_category = weight.groupby([df_findings["File"], df_findings["Category"]], sort=False).sum()
+    cap = per_category.index.get_level_values(1).map(caps).to_numpy(dtype=float, na_value=np.inf)
+    score = per_category.clip(upper=cap).groupby(level=0, sort=False).sum()
+    counts = df_findings.groupby("File", sort=False).size()
+
+    summary = pd.DataFrame({
+        "Device": score.index.to_numpy(),
+        "Findings Count": counts.reindex(score.index).to_numpy(),
+        "Score": score.to_numpy(),
+    })
+    summary["Percentile"] = (summary["Score"].rank(pct=True, method="max") * 100).round(1)
+    measure = summary["Percentile"] if percentiles else summary["Score"]
+    low, medium = thresholds
+    summary["Risk Score"] = np.select(
+        [summary["Score"] <= 0, measure < low, measure < medium],
+        ["No Risk", "Low", "Medium"],
+        "High"
+    )
+    return summary
+
+# ---------------------------
+# Findings explorer
+# ---------------------------
+FINDING_COLUMNS = ["Finding", "File", "RiskDesc", "Recommendation", "Category", "Line", "Evidence"]
+EXPLORER_COLUMNS = ["File", "Severity", "Category", "Finding", "Line", "Evidence", "RiskDesc", "Recommendation"]
+EXPLORER_SORT_COLUMNS = ["Severity", "File", "Category", "Finding", "Line"]
+EXPLORER_PAGE_SIZES = [50, 100, 250, 500]
+
+RISK_STYLES = {
+    "High": "background-color:crimson;color:white",
+    "Medium": "background-color:gold;color:black",
+    "Low": "background-color:lightgreen;color:black",
+    "No Risk": "background-color:lightgrey;color:black",
+}
+
+@profiled("build_findings_table")
+def build_findings_table(results):
+    """Findings rows as a typed table for filtering, sorting and paging.
+
+    Device, category, rule and severity are categoricals, so filters and sorts run
+    on their integer codes; category codes follow sorted labels and severity codes
+    follow SEVERITY_ORDER.
+    """
+    df = pd.DataFrame(results, columns=FINDING_COLUMNS)
+    df["Line"] = df["Line"].astype("Int64")
+    for column in ("File", "Category", "Finding"):
+        df[column] = df[column].astype("category")
+    df["Severity"] = finding_severity(df["Finding"])
+    return df
+
+def category_codes(column, labels):
+    """Codes of the given labels in a categorical column (unknown labels are dropped)."""
+    codes = column.cat.categories.get_indexer(list(labels))
+    return codes[codes >= 0]
+
+@profiled("query_findings")
+def query_findings(table, device_text="", categories=(), severities=(), rules=(),
+                   sort_by="Severity", descending=False):
+    """Filter and sort the findings table; returns the matching row positions in order.
+
+    Callers slice a page out of the positions and materialise only those rows. Device
+    filtering is a case-insensitive substring match evaluated once per distinct device.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    if device_text:
+        devices = table["File"].cat.categories
+        mask &= np.isin(table["File"].cat.codes.to_numpy(),
+                        np.flatnonzero(devices.str.contains(device_text, case=False, regex=False)))
+    for column, selected in (("Category", categories), ("Severity", severities), ("Finding", rules)):
+        if selected:
+            mask &= np.isin(table[column].cat.codes.to_numpy(), category_codes(table[column], selected))
+    rows = np.flatnonzero(mask)
+
+    column = table[sort_by]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        keys = column.cat.codes.to_numpy()
     else:
-        return "High"
+        keys = column.to_numpy(dtype=float, na_value=np.inf)
+    keys = keys[rows]
+    # Stable sort so ties keep audit order; negating keeps that for descending too
+    return rows[np.argsort(-keys if descending else keys, kind="stable")]
+
+def style_risk_rows(df):
+    """Colour whole rows by their Risk Score, building the CSS grid in one step."""
+    css = df["Risk Score"].map(RISK_STYLES).fillna(RISK_STYLES["No Risk"]).to_numpy()
+    return df.style.apply(
+        lambda frame: pd.DataFrame(np.repeat(css[:, None], frame.shape[1], axis=1), index=frame.index, columns=frame.columns),
+        axis=None
+    )
+
+def page_controls(total, key, default_size=100):
+    """Page size and page number widgets; returns (page, page_size, page count).
+
+    The page number is clamped rather than bounded, so narrowing a filter never leaves
+    the widget holding an out-of-range value.
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", EXPLORER_PAGE_SIZES, index=EXPLORER_PAGE_SIZES.index(default_size), key=f"{key}_size")
+    pages = max(1, -(-total // page_size))
+    with col2:
+        page = min(st.number_input(f"Page (of {pages})", min_value=1, value=1, step=1, key=f"{key}_page"), pages)
+    return page, page_size, pages
+
+def page_caption(page, page_size, shown, total, label):
+    start = (page - 1) * page_size
+    return f"Showing {start + 1 if shown else 0}–{start + shown} of {total:,} {label}"
+
+def evidence_label(finding):
+    """'L42: transport input telnet' for a findings row with evidence, else ''."""
+    snippet = finding.get("Evidence")
+    if not isinstance(snippet, str) or not snippet:
+        return ""
+    line = finding.get("Line")
+    return f"L{int(line)}: {snippet}" if pd.notna(line) else snippet
 
+def figure_png(fig):
+    """Render a matplotlib figure to PNG bytes, so the image can be cached and shared."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+@profiled("generate_heatmap_figure")
 def generate_heatmap_figure(df_findings):
-    """Return matplotlib figure of heatmap (devices x categories counts)."""
+    """Return matplotlib figure of heatmap (devices x categories counts).
+
+    Built as a bare Figure rather than through pyplot, whose figure manager is
+    not thread-safe, because reports are rendered on job worker threads.
+    """
     if df_findings.empty:
-        fig = plt.figure(figsize=(6, 3))
-        plt.text(0.5, 0.5, "No data", ha='center', va='center')
-        plt.axis('off')
+        fig = Figure(figsize=(6, 3))
+        ax = fig.add_subplot()
+        ax.text(0.5, 0.5, "No data", ha='center', va='center')
+        ax.axis('off')
         return fig
 
     pivot = pd.pivot_table(df_findings, values='Finding', index='File', columns='Category', aggfunc='count', fill_value=0)
@@ -536,12 +2109,14 @@ def generate_heatmap_figure(df_findings):
     categories_order = ["Layer 2", "Access Control", "AAA", "Logging", "Crypto", "Resilience", "Config Mgmt"]
     cols = [c for c in categories_order if c in pivot.columns] + [c for c in pivot.columns if c not in categories_order]
     pivot = pivot[cols]
-    fig, ax = plt.subplots(figsize=(10, max(2, 0.35 * len(pivot.index))))
+    fig = Figure(figsize=(10, max(2, 0.35 * len(pivot.index))))
+    ax = fig.add_subplot()
     sns.heatmap(pivot, cmap="RdYlGn_r", annot=True, fmt="d", linewidths=0.5, ax=ax)
     ax.set_title("Risk Heatmap per Category (device = row)")
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
+@profiled("generate_pdf_report")
 def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     # ... (include all your existing PDF generation code here)
     buffer = io.BytesIO()
@@ -636,7 +2211,8 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     order = ["No Risk", "Low", "Medium", "High"]
     counts = [risk_counts.get(x, 0) for x in order]
     
-    fig, ax = plt.subplots(figsize=(8, 4))
+    fig = Figure(figsize=(8, 4))
+    ax = fig.add_subplot()
     bars = ax.bar(order, counts, color=["lightgrey", "lightgreen", "gold", "crimson"])
     
     for bar, count in zip(bars, counts):
@@ -651,7 +2227,6 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
         chart_path1 = tmp_file.name
     fig.savefig(chart_path1, bbox_inches='tight', dpi=120)
-    plt.close(fig)
     
     elements.append(Image(chart_path1, width=7*inch, height=3.5*inch))
     elements.append(Spacer(1, 20))
@@ -662,7 +2237,8 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     cat_names = list(category_counts.keys())
     cat_vals = list(category_counts.values())
     
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.add_subplot()
     bars = ax.bar(cat_names, cat_vals, color="steelblue")
     
     for bar, count in zip(bars, cat_vals):
@@ -673,12 +2249,11 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     
     ax.set_ylabel("Number of Findings", fontsize=12)
     ax.set_title("Findings Distribution per Category", fontsize=14)
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', labelrotation=45)
     
     with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
         chart_path2 = tmp_file.name
     fig.savefig(chart_path2, bbox_inches='tight', dpi=120)
-    plt.close(fig)
     
     elements.append(Image(chart_path2, width=8*inch, height=4*inch))
     elements.append(PageBreak())
@@ -690,6 +2265,7 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
         devices = df_findings['File'].unique()
         
         for i, device in enumerate(devices):
+            report_job_progress(i / len(devices), f"Device {i + 1} of {len(devices)}")
             device_findings = df_findings[df_findings['File'] == device]
             
             elements.append(Paragraph(f"Device: {device}", device_style))
@@ -716,7 +2292,11 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
             
             for _, finding in device_findings.iterrows():
                 category_cell = Paragraph(str(finding['Category']), table_style)
-                finding_cell = Paragraph(str(finding['Finding']), table_style)
+                finding_text = str(finding['Finding'])
+                evidence = evidence_label(finding)
+                if evidence:
+                    finding_text += f"<br/><font size=6 color='#555555'>{escape(evidence)}</font>"
+                finding_cell = Paragraph(finding_text, table_style)
                 risk_cell = Paragraph(str(finding['RiskDesc']), table_style)
                 recommendation_cell = Paragraph(str(finding['Recommendation']), table_style)
                 
@@ -754,6 +2334,7 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
         elements.append(Paragraph("No findings to report.", table_style))
 
     # Build PDF
+    report_job_progress(1.0, "Laying out PDF")
     doc.build(elements)
     pdf_bytes = buffer.getvalue()
     buffer.close()
@@ -767,6 +2348,7 @@ def generate_pdf_report(summary_df, df_findings, risk_counts, category_counts):
     
     return pdf_bytes
 
+@profiled("generate_word_report")
 def generate_word_report(summary_df, df_findings, risk_counts, category_counts):
     # ... (include all your existing Word report generation code here)
     doc = Document()
@@ -830,7 +2412,8 @@ def generate_word_report(summary_df, df_findings, risk_counts, category_counts):
     if not df_findings.empty:
         devices = df_findings['File'].unique()
         
-        for device in devices:
+        for i, device in enumerate(devices):
+            report_job_progress(i / len(devices), f"Device {i + 1} of {len(devices)}")
             doc.add_heading(f'Device: {device}', level=2)
             device_findings = df_findings[df_findings['File'] == device]
             
@@ -853,7 +2436,8 @@ def generate_word_report(summary_df, df_findings, risk_counts, category_counts):
             for _, finding in device_findings.iterrows():
                 row_cells = table.add_row().cells
                 row_cells[0].text = str(finding['Category'])
-                row_cells[1].text = str(finding['Finding'])
+                evidence = evidence_label(finding)
+                row_cells[1].text = str(finding['Finding']) + (f"\nEvidence: {evidence}" if evidence else "")
                 row_cells[2].text = str(finding['RiskDesc'])
                 row_cells[3].text = str(finding['Recommendation'])
             
@@ -870,21 +2454,172 @@ def generate_word_report(summary_df, df_findings, risk_counts, category_counts):
     
     return word_bytes
 
-def network_config_audit():
-    st.title("🔐 Network Config Auditor")
-    
-    st.markdown("""
-    ### Network Configuration Audit Input
-    Upload individual configuration files in text format for security assessment and compliance auditing.
+@profiled("decode")
+def decode_config(raw_bytes):
+    try:
+        return raw_bytes.decode("utf-8", errors="ignore")
+    except Exception:
+        return raw_bytes.decode("latin-1", errors="ignore")
 
-    **Current Input Requirements:**
-    - Text files with .txt extension
-    - Supports Individual and multiple file uploads
+@profiled("run_config_audit")
+def run_config_audit(files, baselines=None):
+    """Audit uploaded (name, bytes) files, expanding ZIP and RAR archives.
 
-    **Audit Outputs:**
-    - Detailed vulnerability findings with remediation guidance
-    - Device-level risk scoring and categorization
-    - Interactive security posture dashboard
+    'baselines' maps file names to the bytes of their previous version. Returns
+    (results, device_summary, delta_rows, warnings, vendors, port_rows) and runs off
+    the script thread, so problems are collected as warning messages instead of shown
+    directly.
+    """
+    results = []  # list of tuples: (Finding, File, RiskDesc, Recommendation, Category, Line, Evidence)
+    device_summary = defaultdict(list)
+    vendors = {}  # file -> CONFIG_VENDORS key
+    port_rows = []  # (File, Finding, Ports, Port Count, Recommendation, Category)
+    delta_rows = []  # (Change, Finding, File, Category)
+    warnings = []
+    baselines = {name: decode_config(raw) for name, raw in (baselines or {}).items()}
+
+    def process_file_bytes(fname, raw_bytes):
+        # scanned as bytes; only the first few KB are decoded to detect the platform
+        vendors[fname] = detect_vendor(raw_bytes)
+        file_findings, port_findings, evidence = get_shared_cache().get_or_compute(
+            content_digest("audit_device", fname, raw_bytes),
+            lambda: audit_device(fname, raw_bytes, vendors[fname])
+        )
+        file_findings = with_evidence(file_findings, evidence)
+        port_rows.extend(port_finding_rows(fname, port_findings))
+        if fname in baselines:
+            delta = audit_config_delta(fname, baselines[fname], decode_config(raw_bytes))
+            delta_rows.extend(("Added", f[0], f[1], f[4]) for f in delta["added"])
+            delta_rows.extend(("Resolved", f[0], f[1], f[4]) for f in delta["resolved"])
+        for f in file_findings:
+            # f is (Finding, filename, RiskDesc, Recommendation, Category, Line, Evidence)
+            results.append(f)
+            device_summary[f[1]].append(f)
+        return
+
+    for i, (name, raw_upload) in enumerate(files):
+        report_job_progress(i / len(files), f"Auditing {name}")
+        lower = name.lower()
+        # ZIP
+        if lower.endswith(".zip"):
+            try:
+                with zipfile.ZipFile(io.BytesIO(raw_upload)) as zf:
+                    for inner in zf.namelist():
+                        if inner.endswith("/"):
+                            continue
+                        with zf.open(inner) as f:
+                            raw = f.read()
+                            process_file_bytes(inner, raw)
+            except Exception as e:
+                warnings.append(f"Failed to process ZIP {name}: {e}")
+
+        # RAR
+        elif lower.endswith(".rar"):
+            try:
+                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".rar")
+                tmp.write(raw_upload)
+                tmp.close()
+                with rarfile.RarFile(tmp.name) as rf:
+                    for inner in rf.namelist():
+                        if inner.endswith("/"):
+                            continue
+                        with rf.open(inner) as f:
+                            raw = f.read()
+                            process_file_bytes(inner, raw)
+                try:
+                    os.remove(tmp.name)
+                except Exception:
+                    pass
+            except Exception as e:
+                warnings.append(f"Failed to process RAR {name}: {e}")
+
+        # Plain file (including no-extension)
+        else:
+            try:
+                process_file_bytes(name, raw_upload)
+            except Exception as e:
+                warnings.append(f"Failed to read file {name}: {e}")
+
+    return results, dict(device_summary), delta_rows, warnings, vendors, port_rows
+
+@st.fragment
+def findings_explorer(df):
+    """Filter, sort and page the findings table; only the visible page is sent to the browser."""
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        device_text = st.text_input("Device contains", key="findings_device").strip()
+    with col2:
+        category_filter = st.multiselect("Category", list(df["Category"].cat.categories), key="findings_category")
+    with col3:
+        severity_filter = st.multiselect("Severity", SEVERITY_ORDER, key="findings_severity")
+    with col4:
+        rule_filter = st.multiselect("Rule", list(df["Finding"].cat.categories), key="findings_rule")
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_by = st.selectbox("Sort by", EXPLORER_SORT_COLUMNS, key="findings_sort")
+    with col2:
+        descending = st.toggle("Descending", key="findings_descending")
+    rows = query_findings(df, device_text, category_filter, severity_filter, rule_filter, sort_by, descending)
+    page, page_size, _ = page_controls(len(rows), "findings")
+    page_df = df.iloc[rows[(page - 1) * page_size:page * page_size]]
+    st.caption(page_caption(page, page_size, len(page_df), len(rows), f"matching findings ({len(df):,} total)"))
+    st.dataframe(page_df[EXPLORER_COLUMNS], width='stretch', height=320, hide_index=True)
+
+@st.fragment
+def device_summary_table(summary_df):
+    page, page_size, _ = page_controls(len(summary_df), "device_summary", default_size=50)
+    summary_page = summary_df.iloc[(page - 1) * page_size:page * page_size]
+    st.caption(page_caption(page, page_size, len(summary_page), len(summary_df), "devices"))
+    st.dataframe(style_risk_rows(summary_page), width='stretch', height=220, hide_index=True)
+
+@st.fragment
+def management_report(summary_df, df, report_key):
+    # Reports build in the background job queue under report_key
+    category_counts = df['Category'].value_counts().to_dict()
+    risk_counts = summary_df["Risk Score"].value_counts().to_dict()
+
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Generate PDF Report"):
+            start_job("pdf_report", report_key, "Building PDF Report", generate_pdf_report, summary_df, df, risk_counts, category_counts)
+        pdf_bytes = job_result("pdf_report", report_key)
+        if pdf_bytes is not None:
+            st.success("PDF report generated successfully!")
+            st.download_button("📥 Download PDF Report", 
+                             data=pdf_bytes, 
+                             file_name="network_audit_report.pdf", 
+                             mime="application/pdf",
+                             on_click="ignore")
+    
+    with col2:
+        if st.button("Generate Word Report"):
+            start_job("word_report", report_key, "Building Word Report", generate_word_report, summary_df, df, risk_counts, category_counts)
+        word_bytes = job_result("word_report", report_key)
+        if word_bytes is not None:
+            st.success("Word report generated successfully!")
+            st.download_button("📥 Download Word Report", 
+                             data=word_bytes, 
+                             file_name="network_audit_report.docx", 
+                             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                             on_click="ignore")
+
+def network_config_audit():
+    st.title("🔐 Network Config Auditor")
+    
+    st.markdown("""
+    ### Network Configuration Audit Input
+    Upload individual configuration files in text format for security assessment and compliance auditing.
+
+    **Current Input Requirements:**
+    - Text files with .txt extension
+    - Supports Individual and multiple file uploads
+    - Or a directory on the server, for very large configs (memory-mapped)
+
+    **Audit Outputs:**
+    - Detailed vulnerability findings with remediation guidance
+    - Device-level risk scoring and categorization
+    - Interactive security posture dashboard
     - Risk distribution heatmaps across security categories
     - Comprehensive export formats for reporting (CSV/PDF/DOCX)
     """)
@@ -895,170 +2630,155 @@ def network_config_audit():
         type=["txt"]
     )
 
-    if uploaded_files:
-        results = []  # list of tuples: (Finding, File, RiskDesc, Recommendation, Category)
-        device_summary = defaultdict(list)
+    with st.expander("🔁 Re-audit against previous versions (optional)"):
+        st.caption("Upload the previous version of a config under the same file name to see which findings were added or resolved.")
+        baseline_files = st.file_uploader(
+            "Select previous configuration files",
+            accept_multiple_files=True,
+            type=["txt"],
+            key="baseline_configs"
+        )
 
-        def process_file_bytes(fname, raw_bytes):
-            try:
-                content = raw_bytes.decode("utf-8", errors="ignore")
-            except Exception:
-                content = raw_bytes.decode("latin-1", errors="ignore")
-            file_findings = audit_config(fname, content)
-            for f in file_findings:
-                # f is (Finding, filename, RiskDesc, Recommendation, Category)
-                results.append(f)
-                device_summary[f[1]].append(f)
-            return
+    config_directory = ""
+    if DATA_ROOT:
+        with st.expander("📁 Audit a directory on the server (optional)"):
+            st.caption("For very large configs or whole config backups: files are memory-mapped and scanned as bytes instead of being uploaded. "
+                       "The directory is walked once per scan; rescan to pick up changed files.")
+            config_directory = data_path_input(f"Directory path under {DATA_ROOT}", "config_directory")
+            if st.button("🔄 Rescan directory", key="config_directory_rescan"):
+                st.session_state["config_directory_scan"] = st.session_state.get("config_directory_scan", 0) + 1
 
-        for uploaded in uploaded_files:
-            name = uploaded.name
-            lower = name.lower()
-            # ZIP
-            if lower.endswith(".zip"):
-                try:
-                    with zipfile.ZipFile(io.BytesIO(uploaded.read())) as zf:
-                        for inner in zf.namelist():
-                            if inner.endswith("/"):
-                                continue
-                            with zf.open(inner) as f:
-                                raw = f.read()
-                                process_file_bytes(inner, raw)
-                except Exception as e:
-                    st.warning(f"Failed to process ZIP {name}: {e}")
+    if uploaded_files or config_directory:
+        if uploaded_files:
+            files = [(uploaded.name, uploaded.getvalue()) for uploaded in uploaded_files]
+            baselines = {b.name: b.getvalue() for b in (baseline_files or [])}
+            audit_key = content_digest(*(part for name, raw in files + sorted(baselines.items()) for part in (name, raw)))
+            audit = ensure_job("config_audit", audit_key, "Config audit", run_config_audit, files, baselines)
+        elif os.path.isdir(config_directory):
+            baselines = {}
+            # The walk happens inside the job; a rescan starts a new one
+            audit_key = content_digest("audit_config_directory", config_directory, st.session_state.get("config_directory_scan", 0))
+            audit = ensure_job("config_audit", audit_key, "Directory audit", audit_config_directory, config_directory)
+        else:
+            st.error(f"Directory not found: {config_directory}")
+            return
+        if audit is None:
+            return
+        results, device_summary, delta_rows, warnings, vendors, port_rows = audit
+        for warning in warnings:
+            st.warning(warning)
 
-            # RAR
-            elif lower.endswith(".rar"):
-                try:
-                    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".rar")
-                    tmp.write(uploaded.read())
-                    tmp.close()
-                    with rarfile.RarFile(tmp.name) as rf:
-                        for inner in rf.namelist():
-                            if inner.endswith("/"):
-                                continue
-                            with rf.open(inner) as f:
-                                raw = f.read()
-                                process_file_bytes(inner, raw)
-                    try:
-                        os.remove(tmp.name)
-                    except Exception:
-                        pass
-                except Exception as e:
-                    st.warning(f"Failed to process RAR {name}: {e}")
+        if vendors:
+            platform_counts = pd.Series([CONFIG_VENDORS[v]["label"] for v in vendors.values()]).value_counts()
+            st.caption("🧭 Detected platforms: " + ", ".join(f"{label} ({count})" for label, count in platform_counts.items()))
 
-            # Plain file (including no-extension)
+        if baselines:
+            st.subheader("🔁 Changes Since Previous Version")
+            if delta_rows:
+                delta_df = pd.DataFrame(delta_rows, columns=["Change", "Finding", "File", "Category"])
+                st.dataframe(delta_df, width='stretch')
             else:
-                try:
-                    raw = uploaded.read()
-                    process_file_bytes(name, raw)
-                except Exception as e:
-                    st.warning(f"Failed to read file {name}: {e}")
+                st.info("No findings were added or resolved compared with the previous versions.")
 
         # show outputs
         if results:
-            # build dataframe
-            df = pd.DataFrame(results, columns=["Finding","File","RiskDesc","Recommendation","Category"])
+            with profile_stage("findings dataframe"):
+                # Typed findings table, built once per audit run and shared across reruns
+                df = get_shared_cache().get_or_compute(content_digest("findings_table", audit_key), lambda: build_findings_table(results))
 
-            # Detailed findings view
+            # Detailed findings explorer; filtering and paging rerun only this section
             st.subheader("📋 Detailed Findings")
-            st.dataframe(df[["File","Category","Finding","RiskDesc","Recommendation"]], width='stretch', height=320)
-
-            # Device summary with risk score
-            summary_rows = []
-            for device, items in device_summary.items():
-                score = get_risk_score(len(items))
-                summary_rows.append((device, len(items), score))
-            summary_df = pd.DataFrame(summary_rows, columns=["Device","Findings Count","Risk Score"])
-            st.subheader("📊 Device Risk Summary (color-coded)")
+            findings_explorer(df)
 
-            def color_row(r):
-                score = r["Risk Score"]
-                if score == "High":
-                    return ['background-color:crimson;color:white']*3
-                if score == "Medium":
-                    return ['background-color:gold;color:black']*3
-                if score == "Low":
-                    return ['background-color:lightgreen;color:black']*3
-                return ['background-color:lightgrey;color:black']*3
+            if port_rows:
+                st.subheader("🔌 Per-Interface Findings")
+                port_df = pd.DataFrame(port_rows, columns=["File", "Finding", "Ports", "Port Count", "Recommendation", "Category"])
+                st.caption(f"{int(port_df['Port Count'].sum())} port-level findings across {port_df['File'].nunique()} devices")
+                st.dataframe(port_df, width='stretch', height=260)
 
-            st.dataframe(summary_df.style.apply(lambda row: color_row(row), axis=1), width='stretch', height=220)
+            with st.expander("⚖️ Risk Scoring Model"):
+                st.caption("Each finding weighs its severity (Critical 10, High 5, Medium 2, Low 1); "
+                           "each category's contribution per device is capped before summing.")
+                threshold_mode = st.radio("Risk thresholds", ["Fixed score", "Fleet percentile"], horizontal=True, key="risk_threshold_mode")
+                percentiles = threshold_mode == "Fleet percentile"
+                col1, col2 = st.columns(2)
+                with col1:
+                    low_bound = st.number_input("Low below", min_value=0.0, value=50.0 if percentiles else float(RISK_THRESHOLDS[0]),
+                                                step=1.0, key=f"risk_low_{threshold_mode}")
+                with col2:
+                    medium_bound = st.number_input("Medium below", min_value=0.0, value=80.0 if percentiles else float(RISK_THRESHOLDS[1]),
+                                                   step=1.0, key=f"risk_medium_{threshold_mode}")
+                st.dataframe(pd.DataFrame({"Category": list(CATEGORY_CAPS), "Cap": list(CATEGORY_CAPS.values())}).set_index("Category").T)
+
+            # Scores, charts and reports are tied to this audit run and scoring model
+            report_key = content_digest(audit_key, threshold_mode, low_bound, medium_bound)
+            with profile_stage("device summary"):
+                # Device summary with weighted risk score
+                summary_df = get_shared_cache().get_or_compute(
+                    content_digest("score_devices", report_key),
+                    lambda: score_devices(df, (low_bound, max(low_bound, medium_bound)), percentiles)
+                )
+            st.subheader("📊 Device Risk Summary (color-coded)")
+            device_summary_table(summary_df)
 
             # Risk distribution chart
             st.subheader("📈 Risk Distribution")
-            rc = summary_df["Risk Score"].value_counts().to_dict()
-            order = ["No Risk","Low","Medium","High"]
-            rc_plot = [rc.get(k,0) for k in order]
-            fig, ax = plt.subplots()
-            bars = ax.bar(order, rc_plot, color=["lightgrey","lightgreen","gold","crimson"])
+            with profile_stage("chart: risk distribution"):
+                rc = summary_df["Risk Score"].value_counts().to_dict()
+                order = ["No Risk","Low","Medium","High"]
+                rc_plot = [rc.get(k,0) for k in order]
+                fig, ax = plt.subplots()
+                bars = ax.bar(order, rc_plot, color=["lightgrey","lightgreen","gold","crimson"])
             
-            for bar, count in zip(bars, rc_plot):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{count}', ha='center', va='bottom', fontweight='bold')
+                for bar, count in zip(bars, rc_plot):
+                    height = bar.get_height()
+                    ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                            f'{count}', ha='center', va='bottom', fontweight='bold')
             
-            ax.set_ylabel("Number of Devices")
-            ax.set_title("Device Risk Distribution")
-            st.pyplot(fig)
+                ax.set_ylabel("Number of Devices")
+                ax.set_title("Device Risk Distribution")
+                st.pyplot(fig)
 
             # Findings by category chart for Streamlit
             st.subheader("📊 Findings by Category")
-            category_counts = df['Category'].value_counts().to_dict()
-            cat_names = list(category_counts.keys())
-            cat_vals = list(category_counts.values())
-            fig2, ax2 = plt.subplots()
-            bars2 = ax2.bar(cat_names, cat_vals, color="steelblue")
+            with profile_stage("chart: findings by category"):
+                category_counts = df['Category'].value_counts().to_dict()
+                cat_names = list(category_counts.keys())
+                cat_vals = list(category_counts.values())
+                fig2, ax2 = plt.subplots()
+                bars2 = ax2.bar(cat_names, cat_vals, color="steelblue")
             
-            for bar, count in zip(bars2, cat_vals):
-                height = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{count}', ha='center', va='bottom', fontweight='bold')
+                for bar, count in zip(bars2, cat_vals):
+                    height = bar.get_height()
+                    ax2.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                            f'{count}', ha='center', va='bottom', fontweight='bold')
             
-            ax2.set_ylabel("Number of Findings")
-            ax2.set_title("Findings Distribution per Category")
-            plt.xticks(rotation=45, ha="right")
-            st.pyplot(fig2)
+                ax2.set_ylabel("Number of Findings")
+                ax2.set_title("Findings Distribution per Category")
+                ax2.tick_params(axis='x', labelrotation=45)
+                plt.setp(ax2.get_xticklabels(), ha="right")
+                st.pyplot(fig2)
 
             # Heatmap
             st.subheader("🔥 Risk Heatmap per Category")
-            heatmap_fig = generate_heatmap_figure(df)
-            st.pyplot(heatmap_fig)
+            heatmap_png = get_shared_cache().get_or_compute(content_digest("heatmap", audit_key), lambda: figure_png(generate_heatmap_figure(df)))
+            st.image(heatmap_png)
 
             # Downloads: CSVs
-            csv_bytes = df.to_csv(index=False).encode("utf-8")
-            st.download_button("📥 Download Detailed Findings (CSV)", csv_bytes, file_name="network_detailed_findings.csv", mime="text/csv")
+            # Deferred: the CSV is only rendered when the button is clicked
+            st.download_button("📥 Download Detailed Findings (CSV)", lambda: df.to_csv(index=False).encode("utf-8"),
+                               file_name="network_detailed_findings.csv", mime="text/csv", on_click="ignore")
+
+            st.download_button("📥 Download Device Summary (CSV)", lambda: summary_df.to_csv(index=False).encode("utf-8"),
+                               file_name="network_device_summary.csv", mime="text/csv", on_click="ignore")
 
-            csv_summary = summary_df.to_csv(index=False).encode("utf-8")
-            st.download_button("📥 Download Device Summary (CSV)", csv_summary, file_name="network_device_summary.csv", mime="text/csv")
+            if port_rows:
+                st.download_button("📥 Download Per-Interface Findings (CSV)", lambda: port_df.to_csv(index=False).encode("utf-8"),
+                                   file_name="network_interface_findings.csv", mime="text/csv", on_click="ignore")
 
             # Management Report Generation (PDF or Word)
             st.subheader("📄 Management Report")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if st.button("Generate PDF Report"):
-                    with st.spinner("Building PDF Report..."):
-                        category_counts = df['Category'].value_counts().to_dict()
-                        risk_counts = summary_df["Risk Score"].value_counts().to_dict()
-                        pdf_bytes = generate_pdf_report(summary_df, df, risk_counts, category_counts)
-                        st.success("PDF report generated successfully!")
-                        st.download_button("📥 Download PDF Report", 
-                                         data=pdf_bytes, 
-                                         file_name="network_audit_report.pdf", 
-                                         mime="application/pdf")
-            
-            with col2:
-                if st.button("Generate Word Report"):
-                    with st.spinner("Building Word Report..."):
-                        category_counts = df['Category'].value_counts().to_dict()
-                        risk_counts = summary_df["Risk Score"].value_counts().to_dict()
-                        word_bytes = generate_word_report(summary_df, df, risk_counts, category_counts)
-                        st.success("Word report generated successfully!")
-                        st.download_button("📥 Download Word Report", 
-                                         data=word_bytes, 
-                                         file_name="network_audit_report.docx", 
-                                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+            management_report(summary_df, df, report_key)
 
         else:
             st.success("✅ No findings identified in uploaded files.")
@@ -1069,31 +2789,214 @@ def network_config_audit():
 # IAM FUNCTIONS
 # =============================================================================
 
-@st.cache_data
 def load_excel(file):
-    return pd.read_excel(file)
+    """Parse an uploaded workbook once per distinct content, shared read-only across sessions."""
+    raw = file.getvalue()
+    return get_shared_cache().get_or_compute(content_digest("read_excel", raw), lambda: read_excel_bytes(raw))
+
+@profiled("read_excel")
+def read_excel_bytes(raw):
+    return pd.read_excel(io.BytesIO(raw))
+
+@profiled("read_excel (pool)")
+def parse_workbook(raw):
+    """read_excel_bytes in the parse process pool, falling back to this thread if the pool is unavailable."""
+    try:
+        return submit_parse(pd.read_excel, io.BytesIO(raw)).result()
+    except (BrokenProcessPool, OSError, RuntimeError):
+        return read_excel_bytes(raw)
+
+def excel_workbook(sheets):
+    """Write (sheet name, DataFrame) pairs to an .xlsx workbook and return its bytes."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        for sheet_name, data in sheets:
+            data.to_excel(writer, sheet_name=sheet_name, index=False)
+    return output.getvalue()
 
-def find_matching_rows(df, column_name, disengaged_staff_list, threshold=70):
+# Scorers offered for leaver matching, each on a 0-100 scale
+MATCH_SCORERS = {
+    "Token sort": fuzz.token_sort_ratio,
+    "Token set": fuzz.token_set_ratio,
+    "Partial": fuzz.partial_ratio,
+    "Jaro-Winkler": JaroWinkler.normalized_similarity,
+}
+MATCH_SCORER_SCALE = {"Jaro-Winkler": 100}
+DEFAULT_MATCH_SCORER = "Token sort"
+DEFAULT_MATCH_THRESHOLD = 70
+# Pairs scoring below this on every scorer are not kept as candidates
+MATCH_CANDIDATE_FLOOR = 50
+MATCH_CHUNK_ROWS = 256
+# Bytes one block of leavers x distinct values may take: a float32 cdist result
+# plus a uint8 copy per scorer and their maximum (about 9 bytes per pair)
+MATCH_BLOCK_BYTES = 64 * 2**20
+MATCH_PAIR_BYTES = np.dtype(np.float32).itemsize + len(MATCH_SCORERS) + 1
+
+@profiled("score_match_candidates")
+def score_match_candidates(df, column_name, disengaged_staff_list):
+    """Score every leaver against every distinct value of a column with all MATCH_SCORERS.
+
+    Returns the candidate table (Leaver, Candidate and one uint8 score column per
+    scorer) for pairs where any scorer reaches MATCH_CANDIDATE_FLOOR, so the scorer
+    and threshold can be changed later by filtering it.
+    """
+    columns = ["Leaver", "Candidate"] + list(MATCH_SCORERS)
+    if column_name not in df.columns:
+        # Runs as a background job: the error reaches the page through the job's failure
+        raise ValueError(f"Column '{column_name}' not found.")
+
+    leavers = pd.Series(disengaged_staff_list, dtype=object).dropna().astype(str).unique()
+    choices = df[column_name].dropna().astype(str).unique()
+    frames = []
+    # Fewer leavers per block the more distinct values there are, so a block stays within MATCH_BLOCK_BYTES
+    chunk_rows = int(min(MATCH_CHUNK_ROWS, max(1, MATCH_BLOCK_BYTES // (max(len(choices), 1) * MATCH_PAIR_BYTES))))
+    for start in range(0, len(leavers), chunk_rows):
+        report_job_progress(start / len(leavers), f"Matching {start + 1} of {len(leavers)} names")
+        chunk = leavers[start:start + chunk_rows]
+        scores = {}
+        for name, scorer in MATCH_SCORERS.items():
+            matrix = process.cdist(chunk, choices, scorer=scorer, processor=fuzz_utils.default_process,
+                                   dtype=np.float32, workers=-1)
+            matrix *= MATCH_SCORER_SCALE.get(name, 1)
+            scores[name] = np.rint(matrix, out=matrix).astype(np.uint8)
+            del matrix
+        best = np.maximum.reduce(list(scores.values()))
+        rows, cols = np.nonzero(best >= MATCH_CANDIDATE_FLOOR)
+        frames.append(pd.DataFrame({
+            "Leaver": chunk[rows],
+            "Candidate": choices[cols],
+            **{name: matrix[rows, cols] for name, matrix in scores.items()},
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def match_index(df, column_name, candidates, scorer=DEFAULT_MATCH_SCORER, threshold=DEFAULT_MATCH_THRESHOLD):
+    """Positions of the rows of df that match a leaver, and of each row's best pair in candidates.
+
+    The compact form of filter_matches() that sessions keep between reruns.
+    """
+    hits = candidates[candidates[scorer] >= threshold]
+    best = hits.sort_values(scorer, ascending=False, kind="stable").drop_duplicates("Candidate")
+    values = df[column_name].astype(str).where(df[column_name].notna())
+    best_pair = pd.Index(best["Candidate"]).get_indexer(values)
+    rows = np.flatnonzero(best_pair >= 0)
+    pairs = candidates.index.get_indexer(best.index[best_pair[rows]])
+    return rows.astype(np.int32), pairs.astype(np.int32)
+
+def materialize_matches(df, candidates, rows, pairs):
+    """The matched rows of df behind a match_index() result, each with its best leaver and scores."""
+    matched = df.iloc[rows]
+    explanation = candidates.iloc[pairs][["Leaver"] + list(MATCH_SCORERS)]
+    explanation.index = matched.index
+    return pd.concat([matched, explanation.rename(columns={"Leaver": "Matched Leaver"})], axis=1)
+
+def filter_matches(df, column_name, candidates, scorer=DEFAULT_MATCH_SCORER, threshold=DEFAULT_MATCH_THRESHOLD):
+    """Rows of df whose column value scores at least threshold against a leaver.
+
+    Each row gains the best-scoring leaver and that pair's score under every scorer.
+    """
+    return materialize_matches(df, candidates, *match_index(df, column_name, candidates, scorer, threshold))
+
+@profiled("find_matching_rows")
+def find_matching_rows(df, column_name, disengaged_staff_list, threshold=DEFAULT_MATCH_THRESHOLD, scorer=DEFAULT_MATCH_SCORER):
     """Find matching rows in the uploaded file using fuzzy matching."""
     if column_name not in df.columns:
-        st.error(f"Column '{column_name}' not found.")
         return pd.DataFrame()
-    
-    matched_rows = pd.concat([
-        df[df[column_name].isin(
-            [match for match, score in process.extract(name, df[column_name].tolist(), scorer=fuzz.token_sort_ratio) if score >= threshold]
-        )]
-        for name in disengaged_staff_list
-    ]).drop_duplicates()
-    
-    return matched_rows
+    candidates = score_match_candidates(df, column_name, disengaged_staff_list)
+    return filter_matches(df, column_name, candidates, scorer, threshold)
+
+def match_settings(app):
+    """The scorer and threshold currently chosen for one system on the IAM page."""
+    return st.session_state.setdefault("match_settings", {}).get(app, (DEFAULT_MATCH_SCORER, DEFAULT_MATCH_THRESHOLD))
+
+def store_match_settings(app):
+    # Kept outside the widgets: Streamlit drops a widget's state in any run that does not
+    # draw it, and only the previewed system's widgets are drawn
+    st.session_state.setdefault("match_settings", {})[app] = (st.session_state[f"match_scorer_{app}"],
+                                                              st.session_state[f"match_threshold_{app}"])
+
+def matched_frame(app):
+    """One system's matched rows, rebuilt from its stored row indexes."""
+    memory = session_memory()
+    source_key, _, match_key = st.session_state["match_candidates"][app]
+    rows, pairs = st.session_state["matched_results"][app][2:]
+    return materialize_matches(memory.get(source_key), memory.get(match_key), rows, pairs)
+
+def refresh_match_index(app):
+    """Re-filter one system's stored candidate scores if its scorer or threshold changed."""
+    settings = match_settings(app)
+    stored = st.session_state["matched_results"].get(app)
+    if stored is not None and stored[:2] == settings:
+        return
+    memory = session_memory()
+    source_key, app_column, match_key = st.session_state["match_candidates"][app]
+    rows, pairs = match_index(memory.get(source_key), app_column, memory.get(match_key), *settings)
+    st.session_state["matched_results"][app] = settings + (rows, pairs)
+    memory.track(f"matches:{app}", rows.nbytes + pairs.nbytes)
+
+def release_unreferenced(*keys):
+    """Drop the frames behind keys from session memory unless a system on the IAM page still uses them."""
+    in_use = {key for source_key, _, match_key in st.session_state["match_candidates"].values() for key in (source_key, match_key)}
+    in_use.update(pending[1] for pending in st.session_state["pending_matches"].values())
+    for key in set(keys) - in_use:
+        session_memory().release(key)
+
+@st.fragment
+def matched_results_review():
+    """Step 3 of the IAM page; previewing another system reruns only this section."""
+    for app in st.session_state["match_candidates"]:
+        refresh_match_index(app)
+    matched_results = dict(st.session_state["matched_results"])
+
+    # Show summary of matched results
+    summary_df = pd.DataFrame([
+        {"System": app, "Scorer": scorer, "Threshold": threshold, "Matches": len(rows)}
+        for app, (scorer, threshold, rows, _) in matched_results.items()
+    ])
+    st.dataframe(summary_df)
+
+    selected_app = st.selectbox("🔍 Select system to preview", list(matched_results.keys()))
+    if selected_app:
+        scorer, threshold = match_settings(selected_app)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("🧮 Scorer", list(MATCH_SCORERS), index=list(MATCH_SCORERS).index(scorer), key=f"match_scorer_{selected_app}",
+                         on_change=store_match_settings, args=(selected_app,))
+        with col2:
+            st.slider("🎚️ Match threshold", MATCH_CANDIDATE_FLOOR, 100, threshold, key=f"match_threshold_{selected_app}",
+                      on_change=store_match_settings, args=(selected_app,))
+        refresh_match_index(selected_app)
+        st.dataframe(matched_frame(selected_app))
+
+        with st.expander("🔬 Candidate scores"):
+            scorer, threshold = match_settings(selected_app)
+            candidates = session_memory().get(st.session_state["match_candidates"][selected_app][2])
+            st.caption(f"Every leaver/value pair scoring at least {MATCH_CANDIDATE_FLOOR} on any scorer; "
+                       f"pairs at or above {threshold} on {scorer} are matched.")
+            st.dataframe(candidates.sort_values(scorer, ascending=False, kind="stable"), hide_index=True)
+
+    # Consolidate results into one Excel file, built only when the download is clicked
+    # and one system at a time
+    st.download_button(
+        label="📥 Download Consolidated Results",
+        data=lambda: excel_workbook((app, matched_frame(app)) for app in matched_results),
+        file_name="Consolidated_Results.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
 
 def iam_main_page():
     st.title("🏠 Identity Access Management Tool")
     
     # Initialize session state for matched results if not exists
+    # System name -> (scorer, threshold, matched row positions, best candidate positions)
     if "matched_results" not in st.session_state:
         st.session_state["matched_results"] = {}
+    # System name -> (rows key, matched column, candidate scores key); the frames live in session_memory()
+    if "match_candidates" not in st.session_state:
+        st.session_state["match_candidates"] = {}
+    # System name -> (job slot, rows key, matched column, candidate scores key) of matching runs still in the background queue
+    if "pending_matches" not in st.session_state:
+        st.session_state["pending_matches"] = {}
     
     # Step 1: Upload Disengaged Staff List
     st.header("Step 1: Upload Disengaged Staff List")
@@ -1104,6 +3007,7 @@ def iam_main_page():
         disengaged_df = load_excel(disengaged_file)
         disengaged_column = st.selectbox("🛑 Select column with disengaged staff names", disengaged_df.columns)
         disengaged_list = disengaged_df[disengaged_column].dropna().tolist()
+        register_identity_source(f"Leavers ({disengaged_file.name})", "leaver", disengaged_df[disengaged_column], disengaged_file.getvalue())
         st.success("✅ Disengaged staff list uploaded.")
     
     # Step 2: Upload System Users List
@@ -1116,13 +3020,20 @@ def iam_main_page():
         app_name = st.text_input("🖥️ Enter the system name", key="app_name")
         
         if st.button("🔍 Run Matching"):
+            if app_name:
+                register_identity_source(app_name, "account", app_df[app_column], app_file.getvalue())
             if app_name and disengaged_list:
-                matched_df = find_matching_rows(app_df, app_column, disengaged_list)
-                if not matched_df.empty:
-                    st.session_state["matched_results"][app_name] = matched_df
-                    st.success(f"✅ Matching completed for {app_name}.")
-                else:
-                    st.warning(f"No matches found for {app_name}.")
+                slot = f"matching:{app_name}"
+                # Identical uploads from any session reuse the shared result
+                source_key = content_digest("read_excel", app_file.getvalue())
+                match_key = content_digest("score_match_candidates", app_file.getvalue(), app_column, *disengaged_list)
+                session_memory().put(source_key, app_df)
+                start_job(
+                    slot, app_name, f"Matching {app_name}",
+                    get_shared_cache().get_or_compute, match_key,
+                    lambda: score_match_candidates(app_df, app_column, disengaged_list)
+                )
+                st.session_state["pending_matches"][app_name] = (slot, source_key, app_column, match_key)
             else:
                 st.warning("Please provide a system name and ensure the disengaged staff list is uploaded.")
             
@@ -1132,88 +3043,1658 @@ def iam_main_page():
                     del st.session_state[key]
             # No full rerun so that previous results remain intact.
     
+    # Collect finished matching jobs; running ones show their progress here
+    for pending_app, (slot, source_key, app_column, match_key) in list(st.session_state["pending_matches"].items()):
+        candidates = job_result(slot)
+        replaced = ()
+        if candidates is not None:
+            if not candidates.empty:
+                session_memory().put(match_key, candidates)
+                previous = st.session_state["match_candidates"].get(pending_app)
+                replaced = (previous[0], previous[2]) if previous else ()
+                st.session_state["match_candidates"][pending_app] = (source_key, app_column, match_key)
+                st.session_state["matched_results"].pop(pending_app, None)
+                refresh_match_index(pending_app)
+                st.success(f"✅ Matching completed for {pending_app}.")
+            else:
+                st.warning(f"No matches found for {pending_app}.")
+        if job_status(slot) not in ("queued", "running"):
+            clear_job(slot)
+            del st.session_state["pending_matches"][pending_app]
+            release_unreferenced(source_key, *replaced)
+
     # Step 3: Download Consolidated Results
     # Show this step if there are any matched results.
     if st.session_state["matched_results"]:
         st.header("Step 3: Review and Download Results")
-        
-        # Show summary of matched results
-        summary_df = pd.DataFrame([
-            {"System": app, "Matches": len(data)} 
-            for app, data in st.session_state["matched_results"].items()
-        ])
-        st.dataframe(summary_df)
-
-        selected_app = st.selectbox("🔍 Select system to preview", list(st.session_state["matched_results"].keys()))
-        if selected_app:
-            st.dataframe(st.session_state["matched_results"][selected_app])
-
-        # Consolidate results into one Excel file
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            for app, data in st.session_state["matched_results"].items():
-                data.to_excel(writer, sheet_name=app, index=False)
-        output.seek(0)
+        matched_results_review()
 
-        st.download_button(
-            label="📥 Download Consolidated Results",
-            data=output,
-            file_name="Consolidated_Results.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+# ---------------------------
+# Duplicate account detection
+# ---------------------------
+# Keys shorter than this are too ambiguous for near-duplicate matching (exact keys still join)
+NEAR_DUPLICATE_MIN_LENGTH = 4
+# A deletion variant shared by more keys than this is too common to block on
+NEAR_DUPLICATE_MAX_BLOCK = 20
+
+def normalize_identity(accounts):
+    """Vectorised identity key: 'DOMAIN\\J.Doe', 'j_doe@corp.com' and ' JDOE ' all become 'jdoe'."""
+    return (
+        accounts.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(r"^.*\\", "", regex=True)
+        .str.replace(r"@.*$", "", regex=True)
+        .str.replace(r"[^0-9a-z]", "", regex=True)
+    )
+
+def connected_components(n, left, right, labels=None):
+    """Union-find over n nodes and (left, right) edge arrays; returns each node's component root.
+
+    Runs as vectorised min-label propagation with pointer jumping, so it needs a
+    handful of passes over the edge arrays rather than a Python loop per edge.
+    Passing the labels of an earlier call (for its first len(labels) nodes) adds
+    only the new edges to those components.
+    """
+    start = 0 if labels is None else len(labels)
+    labels = np.arange(n) if labels is None else np.concatenate([labels, np.arange(start, n)])
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    while True:
+        # Merge roots, then let every node follow its root
+        root_left, root_right = labels[left], labels[right]
+        low = np.minimum(root_left, root_right)
+        updated = labels.copy()
+        np.minimum.at(updated, root_left, low)
+        np.minimum.at(updated, root_right, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+def near_duplicate_edges(keys):
+    """Pairs of key positions one deletion apart (edit distance up to 2), found through a deletion index."""
+    keys = pd.Series(keys)
+    lengths = keys.str.len().to_numpy()
+    eligible = np.flatnonzero(lengths >= NEAR_DUPLICATE_MIN_LENGTH)
+    if not len(eligible):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    candidates = keys.iloc[eligible]
+    candidate_lengths = lengths[eligible]
+    # Each key is indexed under itself and every one-character deletion of itself;
+    # keys sharing an index entry are near-duplicates
+    variants = [candidates.to_numpy()]
+    positions = [eligible]
+    for i in range(int(candidate_lengths.max())):
+        has_position = candidate_lengths > i
+        kept = candidates[has_position]
+        variants.append((kept.str.slice(0, i) + kept.str.slice(i + 1)).to_numpy())
+        positions.append(eligible[has_position])
+    index = pd.DataFrame({"variant": np.concatenate(variants), "key": np.concatenate(positions)})
+    index = index.drop_duplicates()
+    block_size = index.groupby("variant")["key"].transform("size")
+    index = index[(block_size > 1) & (block_size <= NEAR_DUPLICATE_MAX_BLOCK)]
+    anchor = index.groupby("variant")["key"].transform("min")
+    return index["key"].to_numpy(), anchor.to_numpy()
+
+@profiled("find_duplicate_accounts")
+def find_duplicate_accounts(systems, near_duplicates=True):
+    """Cluster account names across any number of systems.
+
+    systems is a list of (system name, Series of account names). Accounts join on
+    their normalized key (a hash join over all systems at once); with near_duplicates,
+    keys one or two edits apart are also linked through a deletion index and
+    union-find. Returns one row per account in a cluster of two or more with System,
+    Row (index in that system's upload), Account, Key, Cluster, Match and Systems.
+    """
+    frames = [pd.DataFrame({"System": name, "Row": accounts.index, "Account": accounts.to_numpy()})
+              for name, accounts in systems]
+    accounts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["System", "Row", "Account"])
+    accounts = accounts[accounts["Account"].notna()]
+    accounts["Key"] = normalize_identity(accounts["Account"])
+    accounts = accounts[accounts["Key"] != ""]
+
+    key_codes, keys = pd.factorize(accounts["Key"])
+    if near_duplicates:
+        left, right = near_duplicate_edges(keys)
+        roots = connected_components(len(keys), left, right)
+    else:
+        roots = np.arange(len(keys))
+    accounts["Cluster"] = pd.factorize(roots[key_codes])[0]
+
+    clusters = accounts.groupby("Cluster")
+    size = clusters["Key"].transform("size")
+    accounts = accounts[size > 1].copy()
+    accounts["Cluster"] = pd.factorize(accounts["Cluster"])[0] + 1
+    clusters = accounts.groupby("Cluster")
+    accounts["Match"] = np.select(
+        [clusters["Account"].transform("nunique") == 1, clusters["Key"].transform("nunique") == 1],
+        ["Exact", "Normalized"],
+        "Near"
+    )
+    accounts["Systems"] = clusters["System"].transform("nunique")
+    return accounts.sort_values(["Cluster", "System"], kind="stable").reset_index(drop=True)
+
+def join_by_group(values, groups, sep=", "):
+    """', '-joined values per group, concatenated in one vectorised sum rather than a join per group."""
+    return (values.astype(str) + sep).groupby(groups).sum().str[:-len(sep)]
+
+def duplicate_cluster_summary(duplicates):
+    """One row per duplicate cluster: identity, distinct spellings, occurrences and systems."""
+    # Most frequent key per cluster
+    identity = (duplicates.groupby(["Cluster", "Key"]).size().sort_values(ascending=False, kind="stable")
+                .reset_index().drop_duplicates("Cluster").set_index("Cluster")["Key"])
+    spellings = duplicates[["Cluster", "Account"]].drop_duplicates()
+    spellings = spellings[spellings.groupby("Cluster").cumcount() < 10]
+    systems = duplicates[["Cluster", "System"]].drop_duplicates()
+    clusters = duplicates.groupby("Cluster")
+    return pd.DataFrame({
+        "Identity": identity,
+        "Accounts": join_by_group(spellings["Account"], spellings["Cluster"]),
+        "Occurrences": clusters.size(),
+        "Systems": join_by_group(systems["System"], systems["Cluster"]),
+        "Match": clusters["Match"].first(),
+    }).sort_values("Occurrences", ascending=False, kind="stable").reset_index(drop=True)
+
+# ---------------------------
+# Identity resolution graph
+# ---------------------------
+# Record kinds: HR roster people, leavers (disengaged staff) and system accounts
+IDENTITY_KINDS = {"person": "HR roster", "leaver": "Leavers", "account": "System accounts"}
+PERSON_KINDS = ("person", "leaver")
+# Fuzzy linking needs longer keys than duplicate detection: short logins like asmith and
+# jsmith are one letter apart but rarely the same person
+IDENTITY_FUZZY_MIN_LENGTH = 8
+
+def identity_tokens(names):
+    """Lower-cased name tokens, without DOMAIN\\ prefixes or email suffixes."""
+    return (
+        names.astype(str)
+        .str.lower()
+        .str.replace(r"^.*\\", "", regex=True)
+        .str.replace(r"@.*$", "", regex=True)
+        .str.findall(r"[0-9a-z]+")
+    )
+
+class IdentityGraph:
+    """Person → accounts graph over every identity source uploaded in this session.
+
+    Each new source's records are linked to the graph in three passes:
+    - exact: the same token-sorted key ('John Smith', 'smith.john')
+    - fuzzy: longer keys one letter deletion apart in a shared deletion index
+    - initial: a login such as 'jsmith' to the only person whose initial plus
+      surname gives that key
+    Components live in a union-find label array that adding a source extends in
+    place; replacing a source's content rebuilds the graph from the stored sources.
+    """
+
+    def __init__(self):
+        self.sources = {}  # source name -> (kind, digest, names)
+        self.records = pd.DataFrame({"Source": pd.Series(dtype=object), "Kind": pd.Series(dtype=object),
+                                     "Row": pd.Series(dtype=object), "Name": pd.Series(dtype=object),
+                                     "Key": pd.Series(dtype=object), "Initial": pd.Series(dtype=object)})
+        self.labels = np.empty(0, dtype=np.int64)
+        self.anchors = pd.Series(dtype=np.int64)  # distinct key -> first record with it
+        self.variants = pd.DataFrame({"variant": pd.Series(dtype=object), "record": pd.Series(dtype=np.int64)})
+        self.edges = 0
+
+    def add_source(self, name, kind, names, digest):
+        """Add or replace a source; returns False when the same content is already in the graph."""
+        previous = self.sources.get(name)
+        if previous is not None and previous[1] == digest:
+            return False
+        if previous is not None:
+            self._rebuild(skip=name)
+        try:
+            self._link(name, kind, names)
+        except Exception:
+            # Leave the graph as it was before this source rather than half-linked
+            self._rebuild(skip=name)
+            raise
+        self.sources[name] = (kind, digest, names)
+        return True
+
+    def _rebuild(self, skip=None):
+        """Relink every stored source except skip from an empty graph."""
+        sources = [(other, *entry) for other, entry in self.sources.items() if other != skip]
+        self.__init__()
+        for other, other_kind, other_digest, other_names in sources:
+            self._link(other, other_kind, other_names)
+            self.sources[other] = (other_kind, other_digest, other_names)
+
+    @profiled("identity_graph_link")
+    def _link(self, name, kind, names):
+        names = names.dropna()
+        tokens = identity_tokens(names)
+        first = len(self.records)
+        new = pd.DataFrame({
+            "Source": name,
+            "Kind": kind,
+            "Row": names.index,
+            "Name": names.to_numpy(),
+            "Key": tokens.map(lambda parts: "".join(sorted(parts))).to_numpy(),
+            # 'John Kofi Smith' -> 'jsmith', for linking people to initial-style logins
+            "Initial": tokens.map(lambda parts: parts[0][0] + parts[-1] if kind in PERSON_KINDS and len(parts) > 1 else "").to_numpy(),
+        })
+        # Record ids are positions in self.records and self.labels, so they are
+        # given only to the rows that have a key ('-' or '' have none)
+        new = new[new["Key"] != ""]
+        new.index = pd.RangeIndex(first, first + len(new))
+        self.records = pd.concat([self.records, new]) if len(self.records) else new
+        ids = new.index.to_numpy()
+        left, right = [], []
+
+        # 1) exact keys: join against earlier anchors, and within the new source
+        anchor = new["Key"].map(self.anchors)
+        linked = anchor.notna().to_numpy()
+        left.append(ids[linked])
+        right.append(anchor[linked].to_numpy(dtype=np.int64))
+        left.append(ids)
+        right.append(pd.Series(ids).groupby(new["Key"].to_numpy()).transform("min").to_numpy(dtype=np.int64))
+        fresh = new[~linked].drop_duplicates("Key")
+        self.anchors = pd.concat([self.anchors, pd.Series(fresh.index.to_numpy(), index=fresh["Key"].to_numpy())])
+
+        # 2) fuzzy keys: add the new distinct keys' deletion variants to the index and link
+        #    every block a new variant lands in (blocks that grew too common are skipped)
+        keys = fresh["Key"]
+        keys = keys[keys.str.len() >= IDENTITY_FUZZY_MIN_LENGTH]
+        if len(keys):
+            variants = [pd.DataFrame({"variant": keys.to_numpy(), "record": keys.index.to_numpy()})]
+            for i in range(int(keys.str.len().max())):
+                # Digits are never deleted: jsmith1 and jsmith2 are usually different people
+                kept = keys[keys.str.slice(i, i + 1).str.isalpha()]
+                variants.append(pd.DataFrame({"variant": (kept.str.slice(0, i) + kept.str.slice(i + 1)).to_numpy(),
+                                              "record": kept.index.to_numpy()}))
+            variants = pd.concat(variants).drop_duplicates()
+            self.variants = pd.concat([self.variants, variants], ignore_index=True)
+            blocks = self.variants[self.variants["variant"].isin(variants["variant"])]
+            size = blocks.groupby("variant")["record"].transform("size")
+            blocks = blocks[(size > 1) & (size <= NEAR_DUPLICATE_MAX_BLOCK)]
+            left.append(blocks["record"].to_numpy(dtype=np.int64))
+            right.append(blocks.groupby("variant")["record"].transform("min").to_numpy(dtype=np.int64))
+
+        left, right = np.concatenate(left), np.concatenate(right)
+        self.edges += int((left != right).sum())
+        self.labels = connected_components(len(self.records), left, right, self.labels)
+
+        # 3) initial-style logins to roster people, only where the initial key names one person
+        people = self.records[self.records["Initial"] != ""].assign(Identity=self.labels[self.records["Initial"] != ""])
+        people = people.drop_duplicates(["Initial", "Identity"]).drop_duplicates("Initial", keep=False)
+        matched = people["Initial"].map(self.anchors)
+        matched = matched[matched.notna()]
+        left, right = matched.index.to_numpy(), matched.to_numpy(dtype=np.int64)
+        self.edges += int((self.labels[left] != self.labels[right]).sum())
+        self.labels = connected_components(len(self.records), left, right, self.labels)
+
+    def frame(self):
+        """All records with their component (Identity) and the component's roster name, if any."""
+        records = self.records.assign(Identity=self.labels)
+        people = records[records["Kind"].isin(PERSON_KINDS)].drop_duplicates("Identity")
+        return records.assign(Person=records["Identity"].map(people.set_index("Identity")["Name"]))
+
+    def leaver_accounts(self):
+        """System accounts that resolve to the same person as a leaver record."""
+        records = self.frame()
+        leavers = records[records["Kind"] == "leaver"].drop_duplicates("Identity").set_index("Identity")["Name"]
+        accounts = records[(records["Kind"] == "account") & records["Identity"].isin(leavers.index)]
+        return accounts.assign(Leaver=accounts["Identity"].map(leavers))[["Leaver", "Source", "Name", "Row", "Identity"]]
+
+    def orphan_accounts(self):
+        """System accounts that resolve to nobody on the HR roster."""
+        records = self.frame()
+        on_roster = records.loc[records["Kind"] == "person", "Identity"].unique()
+        accounts = records[(records["Kind"] == "account") & ~records["Identity"].isin(on_roster)]
+        return accounts[["Source", "Name", "Row", "Identity"]]
+
+    def duplicate_accounts(self):
+        """Accounts where one person holds more than one account in the same system."""
+        records = self.frame()
+        accounts = records[records["Kind"] == "account"]
+        holders = accounts.groupby(["Identity", "Source"])["Name"].transform("size")
+        return accounts[holders > 1][["Person", "Source", "Name", "Row", "Identity"]].sort_values(["Identity", "Source"], kind="stable")
+
+    def stats(self):
+        records = self.frame()
+        return {
+            "sources": len(self.sources),
+            "records": len(records),
+            "identities": int(records["Identity"].nunique()),
+            "links": self.edges,
+        }
+
+def identity_graph():
+    """This session's identity graph; pages register their uploads into it."""
+    if "identity_graph" not in st.session_state:
+        st.session_state["identity_graph"] = IdentityGraph()
+    return st.session_state["identity_graph"]
+
+def register_identity_source(name, kind, names, raw):
+    """Add an uploaded column to the session identity graph (no-op for content already in it)."""
+    try:
+        identity_graph().add_source(name, kind, names, content_digest(kind, raw, names.name))
+    except Exception as e:
+        # The graph is a cross-page extra; the page registering the upload carries on without it
+        st.error(f"❌ Error adding {name} to the identity graph: {str(e)}")
 
 def duplicate_user_provisioning():
     st.title("🔁 Duplicate User Provisioning")
-    uploaded_file = st.file_uploader("Upload System Users", type=["xls", "xlsx"])
+    uploaded_files = st.file_uploader("Upload System Users (one export per system)", type=["xls", "xlsx"], accept_multiple_files=True)
     
-    if not uploaded_file:
-        st.info("Please upload an Excel file to proceed.")
+    if not uploaded_files:
+        st.info("Please upload one or more Excel files to proceed.")
         st.stop()
-        
-    sys_users = pd.read_excel(uploaded_file)
-    username_column = st.selectbox("Select the column containing usernames", sys_users.columns)
-    
-    if not username_column:
+
+    # Each upload is one system, named after its file (repeated names get a suffix); pick the username column of each
+    systems, seen = [], defaultdict(int)
+    for uploaded_file in uploaded_files:
+        sys_users = load_excel(uploaded_file)
+        seen[uploaded_file.name] += 1
+        system_name = uploaded_file.name if seen[uploaded_file.name] == 1 else f"{uploaded_file.name} ({seen[uploaded_file.name]})"
+        username_column = st.selectbox(f"Select the column containing usernames in {system_name}", sys_users.columns, key=f"dup_col_{system_name}")
+        if username_column:
+            systems.append((system_name, uploaded_file, sys_users, username_column))
+            register_identity_source(system_name, "account", sys_users[username_column], uploaded_file.getvalue())
+
+    if not systems:
         st.stop()
 
-    # 1) Identify users with >1 provisioning
-    vc = sys_users[username_column].value_counts()
-    dup_users = vc[vc > 1].index.tolist()
-    dup_df = sys_users[sys_users[username_column].isin(dup_users)]
-    
-    # 2) Show raw rows
+    near_duplicates = st.checkbox("Include near-duplicates (e.g. jdoe / jdoe1 / jdeo)", value=True, key="dup_near")
+
+    # 1) Cluster accounts across all systems in the background
+    dup_key = content_digest("find_duplicate_accounts", near_duplicates,
+                             *(part for name, f, _, column in systems for part in (name, f.getvalue(), column)))
+    inputs = [(name, sys_users[column]) for name, _, sys_users, column in systems]
+    duplicates = ensure_job(
+        "duplicate_detection", dup_key, "Duplicate detection",
+        get_shared_cache().get_or_compute, dup_key, lambda: find_duplicate_accounts(inputs, near_duplicates)
+    )
+    if duplicates is None:
+        st.stop()
+
+    summary = get_shared_cache().get_or_compute(content_digest("duplicate_cluster_summary", dup_key), lambda: duplicate_cluster_summary(duplicates))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Accounts Scanned", sum(len(sys_users) for _, _, sys_users, _ in systems))
+    with col2:
+        st.metric("Duplicate Identities", len(summary))
+    with col3:
+        st.metric("Across Systems", int((duplicates.groupby("Cluster")["Systems"].first() > 1).sum()))
+
+    # 2) Show raw rows, with the cluster each account belongs to
+    frames = {name: sys_users for name, _, sys_users, _ in systems}
+    dup_df = pd.concat(
+        [pd.concat([group[["Cluster", "System", "Account", "Match"]].reset_index(drop=True),
+                    frames[name].loc[group["Row"]].reset_index(drop=True)], axis=1)
+         for name, group in duplicates.groupby("System", sort=False)],
+        ignore_index=True
+    ).sort_values("Cluster", kind="stable") if not duplicates.empty else pd.DataFrame()
     st.subheader("🔍 Raw Rows for Users with Multiple Provisions")
     st.dataframe(dup_df)
     
     # 3) Show summary
-    summary = (
-        dup_df[username_column]
-        .value_counts()
-        .reset_index()
-        .rename(columns={"index": "Username", username_column: "Occurrences"})
-    )
     st.subheader("📊 Occurrence Summary")
+    st.caption("Exact: identical names · Normalized: same after removing case, domain, punctuation · Near: one or two characters apart")
     st.dataframe(summary)
     
     # 4) Download the raw duplicate rows
     if not dup_df.empty:
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            dup_df.to_excel(writer, sheet_name="Multiple_Provisions", index=False)
-        buffer.seek(0)
-        
         st.download_button(
             label="📥 Download Users with Multiple Provisions",
-            data=buffer,
+            data=lambda: excel_workbook([("Multiple_Provisions", dup_df), ("Occurrence_Summary", summary)]),
             file_name="users_multiple_provisions.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
         )
     else:
         st.info("No users with multiple provisions to download.")
 
+def identity_resolution():
+    st.title("🧬 Identity Resolution")
+    st.markdown("""
+    Links every identity source uploaded in this session (leaver lists and system exports from the IAM,
+    Duplicate and Database pages, plus an HR roster below) into one person → accounts graph.
+    Leaver, orphan-account and duplicate checks are then lookups on that graph.
+    """)
+
+    roster_file = st.file_uploader("📂 Upload HR roster (optional)", type=["xls", "xlsx"], key="hr_roster")
+    if roster_file:
+        roster_df = load_excel(roster_file)
+        roster_column = st.selectbox("👤 Select column with staff names", roster_df.columns, key="hr_roster_col")
+        register_identity_source(f"HR roster ({roster_file.name})", "person", roster_df[roster_column], roster_file.getvalue())
+
+    with st.expander("➕ Add more system exports"):
+        extra_files = st.file_uploader("Upload system user lists", type=["xls", "xlsx"], accept_multiple_files=True, key="identity_systems")
+        for extra_file in extra_files or []:
+            extra_df = load_excel(extra_file)
+            extra_column = st.selectbox(f"Select the account column in {extra_file.name}", extra_df.columns, key=f"identity_col_{extra_file.name}")
+            register_identity_source(os.path.splitext(extra_file.name)[0], "account", extra_df[extra_column], extra_file.getvalue())
+
+    graph = identity_graph()
+    if not graph.sources:
+        st.info("Upload an HR roster or system exports here, or on the IAM, Duplicate and Database pages, to build the graph.")
+        return
+
+    stats = graph.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sources", stats["sources"])
+    with col2:
+        st.metric("Records", stats["records"])
+    with col3:
+        st.metric("Resolved Identities", stats["identities"])
+    with col4:
+        st.metric("Links", stats["links"])
+    st.dataframe(pd.DataFrame(
+        [(name, IDENTITY_KINDS[kind], len(names)) for name, (kind, _, names) in graph.sources.items()],
+        columns=["Source", "Kind", "Records"]
+    ), hide_index=True)
+
+    st.subheader("🚪 Leaver Accounts")
+    leavers = graph.leaver_accounts()
+    if not any(kind == "leaver" for kind, _, _ in graph.sources.values()):
+        st.info("Upload a disengaged staff list on the IAM Main page to check leavers.")
+    elif leavers.empty:
+        st.success("✅ No system accounts resolve to a leaver.")
+    else:
+        st.error(f"🚨 {len(leavers)} system accounts belong to leavers")
+        st.dataframe(leavers, hide_index=True)
+
+    st.subheader("👻 Orphan Accounts")
+    orphans = graph.orphan_accounts()
+    if not any(kind == "person" for kind, _, _ in graph.sources.values()):
+        st.info("Upload an HR roster above to find accounts that belong to nobody on it.")
+    elif orphans.empty:
+        st.success("✅ Every system account resolves to someone on the HR roster.")
+    else:
+        st.warning(f"⚠️ {len(orphans)} system accounts resolve to nobody on the HR roster")
+        st.dataframe(orphans, hide_index=True)
+
+    st.subheader("🔁 Multiple Accounts per Person")
+    duplicates = graph.duplicate_accounts()
+    if duplicates.empty:
+        st.success("✅ Nobody holds more than one account in the same system.")
+    else:
+        st.warning(f"⚠️ {len(duplicates)} accounts are held by people with more than one account in the same system")
+        st.dataframe(duplicates, hide_index=True)
+
+    if st.button("🗑️ Clear identity graph"):
+        del st.session_state["identity_graph"]
+        st.rerun()
+
+# ---------------------------
+# DBA_USERS Security Checks
+# ---------------------------
+INACTIVE_STATUSES = ['LOCKED', 'EXPIRED', 'EXPIRED(GRACE)', 'INACTIVE', 'LOCKED(TIMED)']
+ACTIVE_STATUSES = ['OPEN', 'ACTIVE', 'VALID', 'ENABLED']
+DEFAULT_DB_USERS = ['SYS', 'SYSTEM', 'DBSNMP', 'OUTLN', 'MGMT_VIEW', 'SYSMAN', 'SCOTT']
+DBA_PROFILES = ['DBA', 'SYSDBA', 'SYSOPER', 'SYSDG', 'SYSBACKUP', 'SYSKM', 'SYSRAC', 'SYSASM']
+POWERFUL_PROFILES = ['DBA', 'SYSDBA', 'SYSOPER', 'SYSDG', 'SYSBACKUP', 'SYSKM']
+KNOWN_ADMIN_ACCOUNTS = ['SYS', 'SYSTEM', 'SYSMAN']
+OUTDATED_PASSWORD_VERSIONS = ['10G', '11G']  # Add versions you consider outdated
+DEFAULT_PROFILE_NAMES = ['DEFAULT', 'BASIC', 'STANDARD', 'NONE']
+DEFAULT_PROFILE_SERVICE_ACCOUNTS = ['SYS', 'SYSTEM', 'DBSNMP', 'ORACLE_OCM', 'XS$NULL']
+DORMANT_DAYS = 90  # Open accounts with no login for this long are dormant
+EXPIRY_WARNING_DAYS = 30
+SINGLE_PROFILE_SERVICE_ACCOUNTS = ['SYS', 'SYSTEM', 'DBSNMP', 'SYSMAN', 'ORACLE_OCM']
+
+# Default Oracle accounts and their expected states
+DEFAULT_ACCOUNT_CHECKS = {
+    'SYS': {
+        'expected_status': 'OPEN',
+        'risk_if': 'LOCKED',  # SYS should generally be open
+        'description': 'Data dictionary owner - critical system account'
+    },
+    'SYSTEM': {
+        'expected_status': 'OPEN', 
+        'risk_if': 'LOCKED',
+        'description': 'Administrative operations - should be open'
+    },
+    'DBSNMP': {
+        'expected_status': 'OPEN',
+        'risk_if': 'LOCKED', 
+        'description': 'Enterprise Manager agent - should be open'
+    },
+    'OUTLN': {
+        'expected_status': 'OPEN',
+        'risk_if': 'LOCKED',
+        'description': 'Plan stability - can be locked if not used'
+    },
+    'MGMT_VIEW': {
+        'expected_status': 'OPEN',
+        'risk_if': 'LOCKED',
+        'description': 'Enterprise Manager - should be open if EM used'
+    },
+    'SYSMAN': {
+        'expected_status': 'OPEN', 
+        'risk_if': 'LOCKED',
+        'description': 'Enterprise Manager super admin - should be open if EM used'
+    },
+    'SCOTT': {
+        'expected_status': 'LOCKED',
+        'risk_if': 'OPEN',
+        'description': 'Sample/training account - should be LOCKED in production'
+    },
+    'HR': {
+        'expected_status': 'LOCKED', 
+        'risk_if': 'OPEN',
+        'description': 'Sample/training account - should be LOCKED in production'
+    },
+    'OE': {
+        'expected_status': 'LOCKED',
+        'risk_if': 'OPEN', 
+        'description': 'Sample/training account - should be LOCKED in production'
+    }
+}
+
+# ---------------------------
+# Typed date columns
+# ---------------------------
+# Tried in order when sniffing a text date column; Oracle's DD-MON-YY default first
+DATE_FORMATS = [
+    "%d-%b-%y", "%d-%b-%Y", "%d-%b-%y %I.%M.%S.%f %p", "%d-%b-%y %H:%M:%S",
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S.%f",
+    "%d/%m/%Y", "%m/%d/%Y", "%d/%m/%Y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%d.%m.%Y",
+]
+AGE_BUCKETS = [(90, "< 90 days"), (180, "90-180 days"), (365, "6-12 months"),
+               (730, "1-2 years"), (1825, "2-5 years"), (None, "5+ years")]
+
+def sniff_date_format(sample):
+    """The DATE_FORMATS entry that parses most of a sample of date strings, or None."""
+    best, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+        if hits == len(sample):
+            break
+    return best
+
+@profiled("parse_dates")
+def parse_dates(series, sample_size=200):
+    """datetime64 column from a text or Excel date column, parsing each distinct value once.
+
+    Text dates are parsed with the format sniffed from a sample; the few values
+    that do not fit it fall back to pandas' per-element parser.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("datetime64[ns]")
+    codes, uniques = pd.factorize(series)
+    values = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    is_text = values.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if (~is_text).any():
+        # Cells Excel already stored as dates
+        parsed[~is_text] = pd.to_datetime(values[~is_text], errors="coerce")
+    text = values[is_text].str.strip()
+    text = text[text != ""]
+    if len(text):
+        fmt = sniff_date_format(text.iloc[:sample_size])
+        if fmt:
+            parsed[text.index] = pd.to_datetime(text, format=fmt, errors="coerce")
+        rest = text[parsed[text.index].isna().to_numpy()]
+        if len(rest):
+            parsed[rest.index] = pd.to_datetime(rest, format="mixed", errors="coerce")
+    # Code -1 (missing) picks the trailing NaT
+    typed = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))[codes]
+    return pd.Series(typed, index=series.index, name=series.name)
+
+def days_since(dates, now=None):
+    """Whole days from each date to now, as int64 (meaningless where the date is NaT)."""
+    today = np.datetime64((now or pd.Timestamp.now()).date(), "D")
+    return (today - dates.to_numpy().astype("datetime64[D]")).astype(np.int64)
+
+def age_buckets(dates, now=None):
+    """Accounts per AGE_BUCKETS band, binned on integer day ages."""
+    days = days_since(dates.dropna(), now)
+    edges = [limit for limit, _ in AGE_BUCKETS[:-1]]
+    counts = np.bincount(np.searchsorted(edges, days, side="right"), minlength=len(AGE_BUCKETS))
+    return pd.Series(counts, index=[label for _, label in AGE_BUCKETS], name="Accounts")
+
+def month_histogram(dates):
+    """Counts per calendar month ('YYYY-MM'), binned on integer month numbers."""
+    months = dates.dropna().to_numpy().astype("datetime64[M]").astype(np.int64)
+    if not len(months):
+        return pd.Series(dtype="int64")
+    first = months.min()
+    counts = np.bincount(months - first)
+    used = np.flatnonzero(counts)
+    return pd.Series(counts[used], index=(used + first).astype("datetime64[M]").astype(str))
+
+def upper_in(series, values):
+    """Case-insensitive membership test of a column against a list of names."""
+    return series.astype(str).str.upper().isin([v.upper() for v in values])
+
+# ---------------------------
+# Database findings store
+# ---------------------------
+DBA_USER_RULES = {
+    "DU-01": ("Medium", "Default database accounts present"),
+    "DU-02": ("Low", "Users with DBA/privileged profiles"),
+    "DU-03": ("Low", "Profiles with more than 10 users"),
+    "DU-04": ("High", "Accounts older than 1 year still active"),
+    "DU-05": ("Low", "Users on older password versions"),
+    "DU-06": ("High", "Only one profile - no segregation of duties"),
+    "DU-07": ("Medium", "Limited profile/group structure"),
+    "DU-08": ("High", "Non-service accounts in default profiles"),
+    "DU-09": ("High", "Default account in a risky state"),
+    "DU-10": ("Medium", "Default account not found"),
+    "DU-11": ("Medium", "Non-service accounts in single-user profiles"),
+    "DU-12": ("High", "Non-standard users with powerful admin profiles"),
+    "DU-13": ("Critical", "Unknown admin users are active"),
+    "DU-14": ("Medium", "Active accounts dormant"),
+    "DU-15": ("Medium", "Active accounts never logged in"),
+    "DU-16": ("Medium", "Active accounts without a password expiry date"),
+}
+
+class FindingsStore:
+    """Typed findings of the database checks, stored column by column.
+
+    Each finding has a rule ID (see DBA_USER_RULES for severity and title), the
+    number of affected items, its display message and the positions of the
+    affected rows in the checked export. Positions of all findings live in one
+    int64 array sliced by offsets, so affected accounts are a take, not a re-filter.
+    """
+
+    def __init__(self, rules=DBA_USER_RULES):
+        self.rules = rules
+        self.rule, self.count, self.message = [], [], []
+        self.offsets = [0]
+        self._rows = []
+
+    def add(self, rule, message, rows=(), count=None):
+        rows = np.asarray(rows, dtype=np.int64)
+        self.rule.append(rule)
+        self.message.append(message)
+        self.count.append(len(rows) if count is None else int(count))
+        self._rows.append(rows)
+        self.offsets.append(self.offsets[-1] + len(rows))
+
+    def __len__(self):
+        return len(self.rule)
+
+    @property
+    def nbytes(self):
+        return sum(rows.nbytes for rows in self._rows) + 8 * len(self.offsets) + sum(len(m) for m in self.message)
+
+    @property
+    def frame(self):
+        """One row per finding: Rule, Severity (ordered), Check, Count, Finding."""
+        rules = pd.Series(self.rule, dtype=object)
+        return pd.DataFrame({
+            "Rule": rules,
+            "Severity": pd.Categorical(rules.map(lambda r: self.rules[r][0]), categories=SEVERITY_ORDER, ordered=True),
+            "Check": rules.map(lambda r: self.rules[r][1]),
+            "Count": np.asarray(self.count, dtype=np.int64),
+            "Finding": pd.Series(self.message, dtype=object),
+        })
+
+    def rows(self, rule=None):
+        """Sorted positions of the rows affected by every finding (of one rule)."""
+        rows = np.concatenate(self._rows) if self._rows else np.empty(0, dtype=np.int64)
+        if rule is not None:
+            hits = np.asarray(self.rule, dtype=object) == rule
+            lengths = np.diff(self.offsets)
+            rows = rows[np.repeat(hits, lengths)]
+        return np.unique(rows)
+
+    def affected(self, df, rule=None):
+        return df.iloc[self.rows(rule)]
+
+    def severity_counts(self):
+        return self.frame["Severity"].value_counts().reindex(SEVERITY_ORDER, fill_value=0)
+
+    def risk_level(self):
+        """Overall level for the summary banner: (level, message)."""
+        counts = self.severity_counts()
+        if counts["Critical"] > 0:
+            return "Critical", "🔴 CRITICAL RISK: Immediate action required!"
+        if counts["High"] > 2:
+            return "High", "🚨 HIGH RISK: Multiple serious security issues detected"
+        if len(self) > 5:
+            return "Medium", "🟡 MEDIUM RISK: Several security issues detected"
+        return "Low", "🟢 LOW RISK: Minor security issues detected"
+
+    def export_frame(self):
+        """Findings sheet/CSV for the audit report."""
+        frame = self.frame.rename(columns={"Severity": "Risk_Level"})
+        frame["Timestamp"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return frame
+
+def review_default_accounts(found_statuses):
+    """Summary rows and (rule, username, message) issues for DEFAULT_ACCOUNT_CHECKS, given {default user: status} for those found."""
+    default_user_issues = []
+    default_user_summary = []
+    for default_user, expected_config in DEFAULT_ACCOUNT_CHECKS.items():
+        if default_user in found_statuses:
+            actual_status = found_statuses[default_user]
+            status_check = "✅" if str(actual_status).upper() == expected_config['expected_status'].upper() else "❌"
+
+            # Check if account is in risky state
+            is_risky = str(actual_status).upper() == expected_config['risk_if'].upper()
+
+            default_user_summary.append({
+                'Username': default_user,
+                'Found': 'YES',
+                'Current Status': actual_status,
+                'Expected Status': expected_config['expected_status'],
+                'Status Check': status_check,
+                'Risk': 'HIGH' if is_risky else 'LOW',
+                'Description': expected_config['description']
+            })
+
+            if is_risky:
+                default_user_issues.append(("DU-09", default_user, f"🚨 {default_user} is {actual_status} but should be {expected_config['expected_status']} - {expected_config['description']}"))
+
+        else:
+            default_user_summary.append({
+                'Username': default_user,
+                'Found': 'NO',
+                'Current Status': 'NOT FOUND',
+                'Expected Status': 'N/A',
+                'Status Check': '⚠️',
+                'Risk': 'MEDIUM',
+                'Description': expected_config['description']
+            })
+            default_user_issues.append(("DU-10", default_user, f"⚠️ Default account {default_user} not found in database"))
+    return default_user_summary, default_user_issues
+
+# Row-wise checks whose result depends only on the account's own row, so results
+# for accounts that did not change between exports can be carried forward
+DBA_ROW_CHECKS = ["Inactive", "Default Account", "DBA Profile", "Old Active", "Outdated Password",
+                  "Non-Service in Default Profile", "Unknown Admin", "Active Unknown Admin"]
+
+@profiled("dba_user_flags")
+def dba_user_flags(rows, cols, dates=None):
+    """Row-wise DBA_USERS checks (DBA_ROW_CHECKS), one row of flags per row of the export.
+
+    The only definition of these checks: the full check suite, the snapshot delta
+    and the chunked checks all take their row-wise results from here. Besides one
+    boolean column per check, keeps the parsed 'Created' date and an 'Active' flag
+    so 'Old Active' can be re-evaluated against a later audit date. 'dates' may
+    hold the already parsed created column (see parse_dates).
+    """
+    none = np.zeros(len(rows), dtype=bool)
+    def column(field):
+        return rows[cols[field]] if cols.get(field) else None
+    usernames, status, profile, password = column("username"), column("status"), column("profile"), column("password")
+    if cols.get("created"):
+        created = (dates or {}).get(cols["created"])
+        created = parse_dates(rows[cols["created"]]) if created is None else created
+    else:
+        created = pd.Series(pd.NaT, index=rows.index, dtype="datetime64[ns]")
+    def flag(series, values):
+        return upper_in(series, values).to_numpy() if series is not None else none
+    in_default = flag(profile, DEFAULT_PROFILE_NAMES)
+    powerful = flag(profile, POWERFUL_PROFILES)
+    named = usernames is not None
+    unknown_admin = powerful & ~flag(usernames, KNOWN_ADMIN_ACCOUNTS) if named else none
+    flags = pd.DataFrame({
+        "Inactive": flag(status, INACTIVE_STATUSES),
+        "Default Account": flag(usernames, DEFAULT_DB_USERS),
+        "DBA Profile": flag(profile, DBA_PROFILES),
+        "Outdated Password": flag(password, OUTDATED_PASSWORD_VERSIONS),
+        "Non-Service in Default Profile": in_default & ~flag(usernames, DEFAULT_PROFILE_SERVICE_ACCOUNTS) if named else none,
+        "Unknown Admin": unknown_admin,
+        "Active Unknown Admin": unknown_admin & flag(status, ['OPEN', 'ACTIVE']),
+        "Active": flag(status, ACTIVE_STATUSES),
+    }, index=rows.index)
+    flags["Created"] = np.asarray(created, dtype="datetime64[ns]")
+    return age_user_flags(flags)
+
+def age_user_flags(flags, now=None):
+    """(Re)evaluate 'Old Active' from the stored created dates as of now."""
+    one_year_ago = (now or pd.Timestamp.now()) - pd.DateOffset(years=1)
+    flags["Old Active"] = flags["Active"].to_numpy() & (flags["Created"] < one_year_ago).to_numpy()
+    return flags
+
+@profiled("dba_user_checks")
+def run_dba_user_checks(db_users, username_col='', status_col='', profile_col='', created_col='', password_col='',
+                        expiry_col='', last_login_col='', dates=None, flags=None):
+    """Run the DBA_USERS security checks without rendering anything.
+
+    Returns a dict with the 'findings' (FindingsStore, row positions into
+    db_users), the 'analysis_results' frames exported to Excel, per-check details
+    for display and an 'errors' dict of check name -> message for checks that
+    failed. 'dates' may hold already parsed date columns by name (see
+    parse_dates); others are parsed here. 'flags' may hold the row-wise check
+    results (see dba_user_flags), one row per row of db_users, e.g. carried
+    forward from a previous export; otherwise they are computed here.
+    """
+    if not db_users.index.is_unique:
+        db_users = db_users.reset_index(drop=True)
+    def rows_of(subset):
+        return db_users.index.get_indexer(subset.index)
+
+    dates = dict(dates or {})
+    def typed_dates(col):
+        if col not in dates:
+            dates[col] = parse_dates(db_users[col])
+        return dates[col]
+
+    if flags is None:
+        cols = {"username": username_col, "status": status_col, "profile": profile_col,
+                "created": created_col, "password": password_col}
+        flags = dba_user_flags(db_users, cols, {created_col: typed_dates(created_col)} if created_col else None)
+    def flagged(check):
+        return db_users[flags[check].to_numpy(dtype=bool)]
+
+    findings = FindingsStore()
+    analysis_results = {}
+    errors = {}
+    checks = {
+        "findings": findings,
+        "analysis_results": analysis_results,
+        "errors": errors
+    }
+
+    # 1. Identify Inactive/Locked Accounts (INFORMATIONAL - Not a risk)
+    if status_col:
+        with profile_stage("check: account status"):
+            try:
+                inactive_accounts = flagged("Inactive")
+                checks["status"] = {"counts": db_users[status_col].value_counts(), "inactive": inactive_accounts}
+                if not inactive_accounts.empty:
+                    analysis_results['inactive_accounts'] = inactive_accounts
+            except Exception as e:
+                errors["status"] = str(e)
+
+    # 2. Detect Default/Weak Credentials
+    if username_col:
+        with profile_stage("check: default accounts"):
+            try:
+                found_default = flagged("Default Account")
+                checks["default_accounts"] = found_default
+                if not found_default.empty:
+                    findings.add("DU-01", f"⚠️ {len(found_default)} default database accounts found", rows_of(found_default))
+                    analysis_results['default_accounts'] = found_default
+            except Exception as e:
+                errors["default_accounts"] = str(e)
+
+    # 3. Identify Users with DBA Privileges
+    if profile_col:
+        with profile_stage("check: privileged accounts"):
+            try:
+                dba_users = flagged("DBA Profile")
+                checks["dba_users"] = dba_users
+                if not dba_users.empty:
+                    findings.add("DU-02", f"👑 {len(dba_users)} users with DBA/privileged profiles", rows_of(dba_users))
+                    analysis_results['dba_users'] = dba_users
+            except Exception as e:
+                errors["dba_users"] = str(e)
+
+    # 4. Profile Distribution Analysis
+    if profile_col:
+        with profile_stage("check: profile distribution"):
+            try:
+                profile_counts = db_users[profile_col].value_counts()
+                checks["profile_counts"] = profile_counts
+                # Identify profiles with many users (potential risk)
+                large_profiles = profile_counts[profile_counts > 10]
+                if not large_profiles.empty:
+                    findings.add("DU-03", f"📊 {len(large_profiles)} profiles with more than 10 users",
+                                 np.flatnonzero(db_users[profile_col].isin(large_profiles.index)), count=len(large_profiles))
+            except Exception as e:
+                errors["profile_counts"] = str(e)
+
+    # 5. Account Age & Security Risk Analysis
+    if created_col and status_col:
+        with profile_stage("check: account age"):
+            try:
+                # Parsed dates stay out of db_users, which is shared read-only
+                created_dates = typed_dates(created_col)
+                valid_dates = created_dates.notna()
+                age = {"valid": bool(valid_dates.any()), "buckets": age_buckets(created_dates)}
+                checks["account_age"] = age
+                if age["valid"]:
+                    one_year_ago = pd.Timestamp.now() - pd.DateOffset(years=1)
+
+                    # Find accounts older than 1 year
+                    is_old = valid_dates & (created_dates < one_year_ago)
+                    # Assign the masked dates: assigning a full column to an empty frame would adopt its index
+                    old_accounts = db_users[is_old].assign(CREATED_DATE=created_dates[is_old])
+                    # OLD accounts that are still ACTIVE - HIGH SECURITY RISK!
+                    old_active_accounts = old_accounts[flags["Old Active"].to_numpy(dtype=bool)[is_old.to_numpy()]]
+                    # Old accounts that are properly locked/expired
+                    old_inactive_accounts = old_accounts[~flags["Active"].to_numpy(dtype=bool)[is_old.to_numpy()]]
+
+                    age.update({
+                        "old": old_accounts,
+                        "old_active": old_active_accounts,
+                        "old_inactive": old_inactive_accounts,
+                        "recent_count": int((valid_dates & (created_dates >= one_year_ago)).sum())
+                    })
+                    if not old_active_accounts.empty:
+                        findings.add("DU-04", f"🚨 HIGH RISK: {len(old_active_accounts)} old accounts (>1 year) still active", rows_of(old_active_accounts))
+                        analysis_results['old_active_accounts_high_risk'] = old_active_accounts
+                    if not old_inactive_accounts.empty:
+                        analysis_results['old_inactive_accounts'] = old_inactive_accounts
+            except Exception as e:
+                errors["account_age"] = str(e)
+
+    # 6. Password Policy Analysis
+    if password_col:
+        with profile_stage("check: password versions"):
+            try:
+                users_outdated_pwd = flagged("Outdated Password")
+                checks["password"] = {"counts": db_users[password_col].value_counts(), "outdated": users_outdated_pwd}
+                if not users_outdated_pwd.empty:
+                    findings.add("DU-05", f"🔐 {len(users_outdated_pwd)} users using older password versions", rows_of(users_outdated_pwd))
+                    analysis_results['outdated_password_users'] = users_outdated_pwd
+            except Exception as e:
+                errors["password"] = str(e)
+
+    # 7. Database Group Integrity Analysis
+    if profile_col:
+        with profile_stage("check: group integrity"):
+            try:
+                total_profiles = db_users[profile_col].nunique()
+                integrity = {"total_profiles": total_profiles, "total_users": len(db_users)}
+                checks["group_integrity"] = integrity
+
+                # Check 1: Database has proper group structure
+                if total_profiles <= 1:
+                    findings.add("DU-06", "🚨 CRITICAL: Only 1 profile/group found - No SoD implementation", count=total_profiles)
+                elif total_profiles < 5:
+                    findings.add("DU-07", "⚠️ Limited profile/group structure - Consider more granular controls", count=total_profiles)
+
+                # Check 2: Default profiles analysis
+                default_profile_users = db_users[upper_in(db_users[profile_col], DEFAULT_PROFILE_NAMES)]
+                integrity["default_profile_users"] = default_profile_users
+                if not default_profile_users.empty:
+                    # Check if non-service accounts are in default profiles
+                    non_service_in_default = flagged("Non-Service in Default Profile")
+                    integrity["non_service_in_default"] = non_service_in_default
+                    if not non_service_in_default.empty:
+                        findings.add("DU-08", f"🚨 HIGH RISK: {len(non_service_in_default)} non-service accounts in default profiles", rows_of(non_service_in_default))
+            except Exception as e:
+                errors["group_integrity"] = str(e)
+
+    # 8. Default User Privilege & Integrity Analysis
+    if username_col:
+        with profile_stage("check: default users"):
+            try:
+                usernames = db_users[username_col].astype(str).str.upper()
+                found_statuses = {}
+                for default_user in DEFAULT_ACCOUNT_CHECKS:
+                    user_data = db_users[usernames == default_user.upper()]
+                    if not user_data.empty:
+                        found_statuses[default_user] = user_data[status_col].iloc[0] if status_col else 'UNKNOWN'
+                default_user_summary, default_user_issues = review_default_accounts(found_statuses)
+
+                checks["default_users"] = {"summary": default_user_summary, "issues": default_user_issues}
+                if default_user_summary:
+                    # Add findings to security report
+                    for rule, default_user, message in default_user_issues:
+                        findings.add(rule, message, np.flatnonzero((usernames == default_user.upper()).to_numpy()), count=1)
+                    analysis_results['default_user_analysis'] = pd.DataFrame(default_user_summary)
+            except Exception as e:
+                errors["default_users"] = str(e)
+
+    # 9. Orphaned/Unauthorized Profile Analysis
+    if profile_col and username_col:
+        with profile_stage("check: single-user profiles"):
+            try:
+                profile_user_counts = db_users[profile_col].value_counts()
+                # Profiles with only 1 user (potential service accounts or custom profiles)
+                single_user_profiles = profile_user_counts[profile_user_counts == 1]
+                single = {"profiles": single_user_profiles}
+                checks["single_user_profiles"] = single
+
+                if not single_user_profiles.empty:
+                    single_user_details = db_users[db_users[profile_col].isin(single_user_profiles.index)]
+                    # Check if these are known service accounts or potential unauthorized profiles
+                    unknown_single_users = single_user_details[
+                        ~upper_in(single_user_details[username_col], SINGLE_PROFILE_SERVICE_ACCOUNTS)
+                    ]
+                    single.update({"details": single_user_details, "unknown": unknown_single_users})
+                    if not unknown_single_users.empty:
+                        findings.add("DU-11", f"⚠️ {len(unknown_single_users)} non-service accounts in single-user profiles - potential unauthorized access", rows_of(unknown_single_users))
+            except Exception as e:
+                errors["single_user_profiles"] = str(e)
+
+    # 10. Privilege Escalation Risk Analysis
+    if profile_col and username_col:
+        with profile_stage("check: privilege escalation"):
+            try:
+                # Identify users with powerful profiles but non-standard names
+                powerful_users = db_users[upper_in(db_users[profile_col], POWERFUL_PROFILES)]
+                escalation = {"powerful": powerful_users}
+                checks["privilege_escalation"] = escalation
+
+                if not powerful_users.empty:
+                    unknown_powerful_users = flagged("Unknown Admin")
+                    escalation["unknown"] = unknown_powerful_users
+                    if not unknown_powerful_users.empty:
+                        findings.add("DU-12", f"🚨 HIGH RISK: {len(unknown_powerful_users)} non-standard users with powerful admin privileges", rows_of(unknown_powerful_users))
+
+                        # Check if any of these are active
+                        if status_col:
+                            active_powerful_unknown = flagged("Active Unknown Admin")
+                            escalation["active_unknown"] = active_powerful_unknown
+                            if not active_powerful_unknown.empty:
+                                findings.add("DU-13", f"🔴 CRITICAL: {len(active_powerful_unknown)} unknown users with admin privileges are ACTIVE", rows_of(active_powerful_unknown))
+            except Exception as e:
+                errors["privilege_escalation"] = str(e)
+
+    # 11. Dormant Accounts (LAST_LOGIN)
+    if last_login_col and status_col:
+        with profile_stage("check: dormant accounts"):
+            try:
+                last_login = typed_dates(last_login_col)
+                active = upper_in(db_users[status_col], ACTIVE_STATUSES)
+                idle_days = pd.Series(days_since(last_login), index=db_users.index)
+                is_dormant = active & last_login.notna() & (idle_days >= DORMANT_DAYS)
+                dormant_accounts = db_users[is_dormant].assign(LAST_LOGIN_DATE=last_login[is_dormant])
+                never_logged_in = db_users[active & last_login.isna()]
+                checks["dormant"] = {"dormant": dormant_accounts, "never": never_logged_in,
+                                     "buckets": age_buckets(last_login[active])}
+                if not dormant_accounts.empty:
+                    findings.add("DU-14", f"💤 {len(dormant_accounts)} active accounts with no login in {DORMANT_DAYS}+ days", rows_of(dormant_accounts))
+                    analysis_results['dormant_accounts'] = dormant_accounts
+                if not never_logged_in.empty:
+                    findings.add("DU-15", f"💤 {len(never_logged_in)} active accounts have never logged in", rows_of(never_logged_in))
+                    analysis_results['never_logged_in'] = never_logged_in
+            except Exception as e:
+                errors["dormant"] = str(e)
+
+    # 12. Password Expiry (EXPIRY_DATE)
+    if expiry_col and status_col:
+        with profile_stage("check: password expiry"):
+            try:
+                expiry = typed_dates(expiry_col)
+                active = upper_in(db_users[status_col], ACTIVE_STATUSES)
+                days_left = -pd.Series(days_since(expiry), index=db_users.index)
+                no_expiry = db_users[active & expiry.isna()]
+                is_expiring = active & expiry.notna() & days_left.between(0, EXPIRY_WARNING_DAYS)
+                expiring = db_users[is_expiring].assign(EXPIRY=expiry[is_expiring])
+                checks["expiry"] = {"none": no_expiry, "expiring": expiring}
+                if not no_expiry.empty:
+                    findings.add("DU-16", f"⏳ {len(no_expiry)} active accounts have no password expiry date", rows_of(no_expiry))
+                    analysis_results['no_password_expiry'] = no_expiry
+            except Exception as e:
+                errors["expiry"] = str(e)
+    return checks
+
+@st.fragment
+def profile_users_view(db_users, profile_col):
+    """Profile Management section; changing the selected profile reruns only this view."""
+    # Extract Unique Profiles 
+    unique_profiles = db_users[profile_col].unique()
+
+    # Select the profile to View its Users 
+    selected_profile = st.selectbox("🔎 Select a Profile Name: ", unique_profiles)
+
+    # Display Users for the Selected Profile
+    profile_users = db_users[db_users[profile_col] == selected_profile]
+    st.subheader(f"🗂 Users with Profile: **{selected_profile}**")
+    st.dataframe(profile_users)
+
+    # Consolidate all profile users into one Excel file with separate sheets, built only when clicked.
+    # Sheet names are limited to 31 characters (Excel limitations)
+    st.download_button(
+        label = "📥 Download Consolidated Users of Profiles", 
+        data = lambda: excel_workbook((str(profile)[:31], group) for profile, group in db_users.groupby(profile_col, sort=False, dropna=False)),
+        file_name="Consolidated_Users_of_Profiles.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+
+@st.fragment
+def dba_audit_export(db_users, findings, analysis_results, profile_col, status_col):
+    """Export section of the DBA_USERS page; generating the report reruns only this section."""
+    if st.button("📊 Generate Comprehensive Audit Report"):
+        with st.spinner("Generating audit report..."):
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+                # Sheet 1: All Users
+                db_users.to_excel(writer, sheet_name='All_Users', index=False)
+                
+                # Sheet 2: Security Findings Summary
+                findings.export_frame().to_excel(writer, sheet_name='Security_Findings', index=False)
+                
+                # Sheet 3: Profile Summary
+                if profile_col:
+                    profile_summary = db_users[profile_col].value_counts().reset_index()
+                    profile_summary.columns = ['Profile', 'User_Count']
+                    profile_summary.to_excel(writer, sheet_name='Profile_Summary', index=False)
+                
+                # Sheet 4: Status Summary
+                if status_col:
+                    status_summary = db_users[status_col].value_counts().reset_index()
+                    status_summary.columns = ['Status', 'User_Count']
+                    status_summary.to_excel(writer, sheet_name='Status_Summary', index=False)
+                
+                # Additional sheets for each analysis result
+                for result_name, result_data in analysis_results.items():
+                    if not result_data.empty:
+                        sheet_name = result_name.replace('_', ' ').title()[:31]
+                        result_data.to_excel(writer, sheet_name=sheet_name, index=False)
+                
+                # INDIVIDUAL GROUP SHEETS - Add sheets for each profile/group
+                if profile_col:
+                    unique_profiles = db_users[profile_col].unique()
+                    for profile in unique_profiles:
+                        group_users = db_users[db_users[profile_col] == profile]
+                        if not group_users.empty:
+                            # Clean sheet name for Excel (max 31 chars, no invalid characters)
+                            sheet_name = f"Profile_{str(profile)}"[:31]
+                            # Remove invalid characters for Excel sheet names
+                            sheet_name = ''.join(c for c in sheet_name if c not in r'[]:*?/\\')
+                            try:
+                                group_users.to_excel(writer, sheet_name=sheet_name, index=False)
+                            except Exception as sheet_error:
+                                # If sheet name is still problematic, use a safe name
+                                safe_sheet_name = f"Group_{hash(profile) % 10000}"[:31]
+                                group_users.to_excel(writer, sheet_name=safe_sheet_name, index=False)
+            
+            output.seek(0)
+            
+            st.download_button(
+                label="📥 Download Comprehensive Audit Report",
+                data=output,
+                file_name=f"Database_Security_Audit_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="audit_report",
+                on_click="ignore"
+            )
+            
+    # Quick CSV export of findings
+    if len(findings):
+        csv_output = findings.export_frame().to_csv(index=False).encode('utf-8')
+        
+        st.download_button(
+            label="📋 Download Security Findings (CSV)",
+            data=csv_output,
+            file_name="security_findings.csv",
+            mime="text/csv",
+            key="findings_csv",
+            on_click="ignore"
+        )
+
+# ---------------------------
+# Snapshot delta (DBA_USERS)
+# ---------------------------
+DELTA_CHANGES = ["New", "Removed", "Status Change", "Profile Change", "Newly Privileged"]
+
+def keyed_dba_users(db_users, cols):
+    """Export indexed by upper-cased username, with a 64-bit hash of the mapped columns per row."""
+    mapped = [c for c in dict.fromkeys(cols.values()) if c]
+    keyed = db_users[mapped].copy()
+    keyed.index = pd.Index(upper_strip(db_users[cols["username"]]), name="Username")
+    keyed = keyed[~keyed.index.duplicated()]
+    # The raw username is hashed too: the checks read it as exported, not as the join key
+    keyed["_hash"] = pd.util.hash_pandas_object(keyed[mapped], index=False).to_numpy()
+    return keyed
+
+def privileged_accounts(keyed, cols):
+    """DBA/SYS* profile, or a powerful role named in the privilege column."""
+    privileged = pd.Series(False, index=keyed.index)
+    if cols.get("profile"):
+        privileged |= upper_in(keyed[cols["profile"]], DBA_PROFILES).to_numpy()
+    if cols.get("privilege"):
+        pattern = r"\b(?:" + "|".join(POWERFUL_ROLES) + r")\b"
+        privileged |= upper_strip(keyed[cols["privilege"]]).str.contains(pattern, regex=True).to_numpy()
+    return privileged
+
+@profiled("diff_dba_users")
+def diff_dba_users(previous, current, cols):
+    """Hash-join two username-keyed exports (see keyed_dba_users).
+
+    Returns (changes, changed) where changes has one row per Username and Change
+    with the Previous and Current value, and changed is the index of current
+    usernames whose row is new or differs from the previous export.
+    """
+    pos = previous.index.get_indexer(current.index)
+    new = pos < 0
+    removed = current.index.get_indexer(previous.index) < 0
+    both = ~new
+    matched = pos[both]
+    differs = new.copy()
+    differs[both] = previous["_hash"].to_numpy()[matched] != current["_hash"].to_numpy()[both]
+
+    frames = []
+    def add(change, users, before, after):
+        frames.append(pd.DataFrame({"Username": users, "Change": change,
+                                    "Previous": before, "Current": after}))
+
+    def values(keyed, col, rows):
+        return keyed[col].astype(str).to_numpy()[rows] if col else ""
+
+    describe = cols.get("status") or cols.get("profile")
+    add("New", current.index[new], "", values(current, describe, new))
+    add("Removed", previous.index[removed], values(previous, describe, removed), "")
+    # Status and profile can only have moved on rows whose hash differs
+    edited = differs & both
+    for change, key in [("Status Change", "status"), ("Profile Change", "profile")]:
+        col = cols.get(key)
+        if not col:
+            continue
+        before = upper_strip(previous[col].iloc[pos[edited]]).to_numpy()
+        after = upper_strip(current[col][edited]).to_numpy()
+        moved = before != after
+        add(change, current.index[edited][moved], before[moved], after[moved])
+
+    was = privileged_accounts(previous, cols).to_numpy()
+    now = privileged_accounts(current, cols).to_numpy()
+    gained = now.copy()
+    gained[both] &= ~was[matched]
+    add("Newly Privileged", current.index[gained],
+        np.where(new[gained], "", "not privileged"), "privileged")
+
+    changes = pd.concat(frames, ignore_index=True)
+    changes["Change"] = pd.Categorical(changes["Change"], categories=DELTA_CHANGES)
+    changes = changes.sort_values(["Change", "Username"], ignore_index=True)
+    changes["Change"] = changes["Change"].astype(str)
+    return changes, current.index[differs]
+
+@profiled("incremental_user_flags")
+def incremental_user_flags(previous_flags, current, changed, cols):
+    """Current row-wise check results, re-running the checks only on changed rows.
+
+    Unchanged accounts keep their previous results; 'Old Active' is re-aged for
+    everyone since it depends on the audit date, not just the row.
+    """
+    flags = previous_flags.reindex(current.index)
+    if len(changed):
+        fresh = dba_user_flags(current.loc[changed], cols)
+        flags.loc[changed, fresh.columns] = fresh
+    for check in DBA_ROW_CHECKS + ["Active"]:
+        flags[check] = flags[check].fillna(False).astype(bool)
+    flags["Created"] = pd.to_datetime(flags["Created"])
+    return age_user_flags(flags)
+
+def export_row_flags(keyed_flags, db_users, cols):
+    """Username-keyed check results (see incremental_user_flags) laid out one row per row of db_users.
+
+    keyed_dba_users keeps the first row of a repeated username, so later rows
+    repeating it are checked afresh.
+    """
+    keys = upper_strip(db_users[cols["username"]])
+    flags = keyed_flags.reindex(keys).set_axis(db_users.index)
+    repeated = keys.duplicated().to_numpy()
+    if repeated.any():
+        fresh = dba_user_flags(db_users[repeated], cols)
+        flags.loc[repeated, fresh.columns] = fresh
+        for check in DBA_ROW_CHECKS + ["Active"]:
+            flags[check] = flags[check].astype(bool)
+        flags["Created"] = pd.to_datetime(flags["Created"])
+    return flags
+
+def findings_delta(previous_flags, current_flags):
+    """Per-check counts of newly flagged, cleared and still-flagged accounts, plus the newly flagged rows."""
+    before = previous_flags[DBA_ROW_CHECKS].to_numpy(dtype=bool)
+    after = current_flags[DBA_ROW_CHECKS].to_numpy(dtype=bool)
+    pos = previous_flags.index.get_indexer(current_flags.index)
+    # Previous result of each current account (False for new accounts)
+    was = np.zeros_like(after)
+    was[pos >= 0] = before[pos[pos >= 0]]
+    raised = after & ~was
+    carried = after & was
+    summary = pd.DataFrame({
+        "Check": DBA_ROW_CHECKS,
+        "Previous": before.sum(axis=0),
+        "Current": after.sum(axis=0),
+        "Newly Flagged": raised.sum(axis=0),
+        "Cleared": before.sum(axis=0) - carried.sum(axis=0),
+        "Carried Forward": carried.sum(axis=0),
+    })
+    rows, checks = np.nonzero(raised)
+    newly = pd.DataFrame({"Username": current_flags.index[rows],
+                          "Check": np.asarray(DBA_ROW_CHECKS, dtype=object)[checks]})
+    return summary, newly
+
+def keyed_for(upload_key, db_users, cols):
+    return get_shared_cache().get_or_compute(
+        content_digest("keyed_dba_users", upload_key, *cols.values()),
+        lambda: keyed_dba_users(db_users, cols)
+    )
+
+def user_flags_for(upload_key, db_users, cols):
+    """Full row-wise check results for one export, shared across reruns and quarters."""
+    return get_shared_cache().get_or_compute(
+        content_digest("dba_user_flags", upload_key, *cols.values()),
+        lambda: dba_user_flags(keyed_for(upload_key, db_users, cols), cols)
+    )
+
+def dba_users_delta(previous_file, db_users, upload_key, cols):
+    """Changes since the previous DBA_USERS export, with the current check results carried forward from it."""
+    previous = load_excel(previous_file)
+    previous_key = content_digest(previous_file.getvalue())
+    missing = [c for c in cols.values() if c and c not in previous.columns]
+    if missing:
+        raise ValueError(f"Previous export is missing mapped columns: {', '.join(missing)}")
+
+    def compute():
+        previous_keyed = keyed_for(previous_key, previous, cols)
+        current_keyed = keyed_for(upload_key, db_users, cols)
+        changes, changed = diff_dba_users(previous_keyed, current_keyed, cols)
+        previous_flags = user_flags_for(previous_key, previous, cols)
+        current_flags = incremental_user_flags(previous_flags, current_keyed, changed, cols)
+        summary, newly = findings_delta(previous_flags, current_flags)
+        return {"changes": changes, "changed": len(changed), "total": len(current_keyed),
+                "summary": summary, "newly": newly, "flags": current_flags}
+
+    delta = get_shared_cache().get_or_compute(
+        content_digest("dba_users_delta", previous_key, upload_key, *cols.values()), compute
+    )
+    # The incrementally built results become the "previous" side of the next delta
+    get_shared_cache().get_or_compute(
+        content_digest("dba_user_flags", upload_key, *cols.values()), lambda: delta["flags"]
+    )
+    return delta
+
+@st.fragment
+def snapshot_delta(delta):
+    """Changes since the previous DBA_USERS export and the check results they move (see dba_users_delta)."""
+    st.header("🔄 Changes Since Previous Export")
+    try:
+        changes = delta["changes"]
+        counts = changes["Change"].value_counts()
+        metrics = st.columns(len(DELTA_CHANGES) + 1)
+        churn = delta["changed"] / delta["total"] if delta["total"] else 0
+        metrics[0].metric("Re-checked Rows", f"{delta['changed']:,}", f"{churn:.1%} churn", delta_color="off")
+        for metric, change in zip(metrics[1:], DELTA_CHANGES):
+            metric.metric(change, int(counts.get(change, 0)))
+        st.caption(f"Checks re-ran on {delta['changed']:,} of {delta['total']:,} accounts; "
+                   "results for unchanged accounts were carried forward from the previous export.")
+
+        st.subheader("📋 Findings Delta")
+        st.dataframe(delta["summary"], width='stretch', hide_index=True)
+        if not delta["newly"].empty:
+            with st.expander(f"🆕 Newly Flagged Accounts ({len(delta['newly'])})"):
+                st.dataframe(delta["newly"], width='stretch', hide_index=True)
+
+        if changes.empty:
+            st.success("✅ No account changes between the two exports")
+            return
+        change_filter = st.multiselect("Change types", DELTA_CHANGES, default=DELTA_CHANGES, key="delta_changes")
+        shown = changes[changes["Change"].isin(change_filter)]
+        page, page_size, _ = page_controls(len(shown), "delta_table")
+        start = (page - 1) * page_size
+        st.dataframe(shown.iloc[start:start + page_size], width='stretch', hide_index=True)
+        st.caption(page_caption(page, page_size, len(shown.iloc[start:start + page_size]), len(shown), "changes"))
+        st.download_button(
+            label="📥 Download Account Changes (CSV)",
+            data=lambda: changes.to_csv(index=False).encode('utf-8'),
+            file_name="dba_users_delta.csv",
+            mime="text/csv",
+            key="delta_csv",
+            on_click="ignore"
+        )
+    except Exception as e:
+        st.error(f"❌ Error comparing exports: {str(e)}")
+
+# ---------------------------
+# Chunked DBA_USERS checks (out-of-core)
+# ---------------------------
+CHUNK_EXTENSIONS = (".csv", ".txt", ".xlsx")
+
+def iter_export_chunks(path, chunk_rows=50000):
+    """(chunk, fraction read) pairs from a CSV or .xlsx export, never holding the whole file.
+
+    Workbooks are streamed with openpyxl's read-only mode; CSVs with pandas'
+    chunked reader. Every value is read as text, like a DBA_USERS export.
+    """
+    if path.lower().endswith(".xlsx"):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = max((sheet.max_row or 0) - 1, 1)
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else f"Unnamed: {i}" for i, h in enumerate(next(rows, ()))]
+            read = 0
+            while True:
+                block = list(itertools.islice(rows, chunk_rows))
+                if not block:
+                    break
+                read += len(block)
+                chunk = pd.DataFrame([row[:len(header)] for row in block], columns=header)
+                yield chunk, min(read / total, 1.0)
+        finally:
+            workbook.close()
+    else:
+        size = max(os.path.getsize(path), 1)
+        with open(path, "rb") as f:
+            for chunk in pd.read_csv(f, chunksize=chunk_rows, dtype=str, keep_default_na=False, skipinitialspace=True):
+                chunk.columns = [str(c).strip() for c in chunk.columns]
+                yield chunk, min(f.tell() / size, 1.0)
+
+class ChunkedDbaChecks:
+    """Partial aggregates of the DBA_USERS checks, merged one chunk at a time.
+
+    Counts and value distributions are summed per chunk; rows flagged by a
+    row-wise check are appended to one CSV per check under spill_dir, tagged
+    with their row number in the export, so memory is bounded by the chunk size.
+    """
+    SPILLED_CHECKS = DBA_ROW_CHECKS
+
+    def __init__(self, cols, spill_dir):
+        self.cols = cols
+        self.spill_dir = spill_dir
+        self.rows = 0
+        self.flagged = dict.fromkeys(self.SPILLED_CHECKS, 0)
+        self.status_counts = pd.Series(dtype="int64")
+        self.profile_counts = pd.Series(dtype="int64")
+        self.password_counts = pd.Series(dtype="int64")
+        self.dated = self.recent = self.old_inactive = 0
+        self.first_in_profile = {}
+        self.default_statuses = {}
+
+    def spill_path(self, check):
+        return os.path.join(self.spill_dir, re.sub(r"\W+", "_", check.lower()) + ".csv")
+
+    def spill(self, check, rows):
+        path = self.spill_path(check)
+        rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+    @staticmethod
+    def merge_counts(total, column):
+        return total.add(column.value_counts(), fill_value=0).astype("int64")
+
+    def add(self, chunk):
+        cols = self.cols
+        chunk = chunk.set_axis(pd.RangeIndex(self.rows, self.rows + len(chunk)))
+        chunk.index.name = "Row"
+        usernames = chunk[cols["username"]].astype(str).str.upper()
+        flags = dba_user_flags(chunk, cols)
+
+        status = chunk[cols["status"]] if cols.get("status") else None
+        profile = chunk[cols["profile"]] if cols.get("profile") else None
+        if status is not None:
+            self.status_counts = self.merge_counts(self.status_counts, status)
+        if profile is not None:
+            self.profile_counts = self.merge_counts(self.profile_counts, profile)
+            first = chunk.drop_duplicates(cols["profile"]).reset_index()
+            for row in first.to_dict("records"):
+                self.first_in_profile.setdefault(row[cols["profile"]], row)
+        if cols.get("password"):
+            self.password_counts = self.merge_counts(self.password_counts, chunk[cols["password"]])
+
+        if cols.get("created") and status is not None:
+            one_year_ago = pd.Timestamp.now() - pd.DateOffset(years=1)
+            created = flags["Created"]
+            self.dated += int(created.notna().sum())
+            self.recent += int((created >= one_year_ago).sum())
+            self.old_inactive += int(((created < one_year_ago) & ~flags["Active"]).sum())
+
+        defaults = {name.upper(): name for name in DEFAULT_ACCOUNT_CHECKS}
+        for position in np.flatnonzero(usernames.isin(list(defaults)).to_numpy()):
+            name = defaults[usernames.iloc[position]]
+            self.default_statuses.setdefault(name, chunk[cols["status"]].iloc[position] if status is not None else 'UNKNOWN')
+
+        for check in self.SPILLED_CHECKS:
+            hit = flags[check].to_numpy(dtype=bool)
+            if hit.any():
+                self.flagged[check] += int(hit.sum())
+                self.spill(check, chunk[hit].reset_index())
+        self.rows += len(chunk)
+
+    def result(self):
+        """Merged results: findings, per-check counts and spill files, distributions and default-account review.
+
+        Findings carry counts only; their affected rows are in the spill files
+        (single-user profile findings keep their export row numbers).
+        """
+        cols = self.cols
+        findings = FindingsStore()
+        flagged = self.flagged
+        if cols.get("username") and flagged["Default Account"]:
+            findings.add("DU-01", f"⚠️ {flagged['Default Account']} default database accounts found", count=flagged["Default Account"])
+        if cols.get("profile") and flagged["DBA Profile"]:
+            findings.add("DU-02", f"👑 {flagged['DBA Profile']} users with DBA/privileged profiles", count=flagged["DBA Profile"])
+        large_profiles = self.profile_counts[self.profile_counts > 10]
+        if not large_profiles.empty:
+            findings.add("DU-03", f"📊 {len(large_profiles)} profiles with more than 10 users", count=len(large_profiles))
+        if flagged["Old Active"]:
+            findings.add("DU-04", f"🚨 HIGH RISK: {flagged['Old Active']} old accounts (>1 year) still active", count=flagged["Old Active"])
+        if flagged["Outdated Password"]:
+            findings.add("DU-05", f"🔐 {flagged['Outdated Password']} users using older password versions", count=flagged["Outdated Password"])
+        if cols.get("profile"):
+            if len(self.profile_counts) <= 1:
+                findings.add("DU-06", "🚨 CRITICAL: Only 1 profile/group found - No SoD implementation", count=len(self.profile_counts))
+            elif len(self.profile_counts) < 5:
+                findings.add("DU-07", "⚠️ Limited profile/group structure - Consider more granular controls", count=len(self.profile_counts))
+            if flagged["Non-Service in Default Profile"]:
+                findings.add("DU-08", f"🚨 HIGH RISK: {flagged['Non-Service in Default Profile']} non-service accounts in default profiles",
+                             count=flagged["Non-Service in Default Profile"])
+        default_summary, default_issues = review_default_accounts(self.default_statuses)
+        for rule, _, message in default_issues:
+            findings.add(rule, message, count=1)
+
+        single_user_profiles = pd.DataFrame()
+        if cols.get("profile"):
+            single = self.profile_counts[self.profile_counts == 1].index
+            single_user_profiles = pd.DataFrame([self.first_in_profile[p] for p in single])
+            if not single_user_profiles.empty:
+                unknown = ~upper_in(single_user_profiles[cols["username"]], SINGLE_PROFILE_SERVICE_ACCOUNTS)
+                if unknown.any():
+                    findings.add("DU-11", f"⚠️ {int(unknown.sum())} non-service accounts in single-user profiles - potential unauthorized access",
+                                 single_user_profiles.loc[unknown, "Row"])
+        if flagged["Unknown Admin"]:
+            findings.add("DU-12", f"🚨 HIGH RISK: {flagged['Unknown Admin']} non-standard users with powerful admin privileges",
+                         count=flagged["Unknown Admin"])
+        if flagged["Active Unknown Admin"]:
+            findings.add("DU-13", f"🔴 CRITICAL: {flagged['Active Unknown Admin']} unknown users with admin privileges are ACTIVE",
+                         count=flagged["Active Unknown Admin"])
+
+        summary = pd.DataFrame({
+            "Check": self.SPILLED_CHECKS,
+            "Flagged Rows": [flagged[check] for check in self.SPILLED_CHECKS],
+            "Spill File": [self.spill_path(check) if flagged[check] else "" for check in self.SPILLED_CHECKS],
+        })
+        return {
+            "rows": self.rows, "findings": findings, "summary": summary,
+            "status_counts": self.status_counts, "profile_counts": self.profile_counts,
+            "password_counts": self.password_counts,
+            "account_age": {"dated": self.dated, "recent": self.recent, "old_inactive": self.old_inactive},
+            "default_users": pd.DataFrame(default_summary), "single_user_profiles": single_user_profiles,
+        }
+
+def chunked_job_key(path, chunk_rows, cols):
+    """Identity of one chunked run: the file as it is on disk now, the chunk size and the column mapping."""
+    stat = os.stat(path)
+    return content_digest("chunked_dba_checks", path, stat.st_size, stat.st_mtime_ns, chunk_rows, *cols.values())
+
+@profiled("chunked_dba_checks")
+def run_chunked_dba_checks(path, cols, chunk_rows=50000, spill_dir=None):
+    """Run the DBA_USERS checks over an export too large for memory, chunk by chunk.
+
+    Without a spill_dir every run gets a private directory of its own (no other
+    run or session writes to or deletes it), removed when its job is pruned.
+    """
+    if spill_dir is None:
+        os.makedirs(SPILL_ROOT, mode=0o700, exist_ok=True)
+        spill_dir = tempfile.mkdtemp(prefix=f"{chunked_job_key(path, chunk_rows, cols)[:16]}-", dir=SPILL_ROOT)
+        on_job_pruned(functools.partial(shutil.rmtree, spill_dir, ignore_errors=True))
+    else:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        os.makedirs(spill_dir)
+    checks = ChunkedDbaChecks(cols, spill_dir)
+    for chunk, fraction in iter_export_chunks(path, chunk_rows):
+        missing = [c for c in cols.values() if c and c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Columns not found in export: {', '.join(missing)}")
+        checks.add(chunk)
+        report_job_progress(fraction, f"{checks.rows:,} accounts checked")
+    return checks.result()
+
+def read_file_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+@st.fragment
+def chunked_dba_checks():
+    st.caption("For consolidated extracts larger than memory: the checks stream the file in chunks, "
+               "keep only running totals and write flagged rows to disk.")
+    path = data_path_input(f"📄 CSV or .xlsx export under {DATA_ROOT}", "chunk_path")
+    chunk_rows = int(st.number_input("Rows per chunk", min_value=1000, max_value=1000000, value=50000,
+                                     step=10000, key="chunk_rows"))
+    cols = {}
+    for col, (field, label, default) in zip(st.columns(len(FLEET_FIELDS)), FLEET_FIELDS):
+        with col:
+            cols[field] = st.text_input(label, value=default, key=f"chunk_map_{field}").strip()
+    if not path:
+        return
+    if not os.path.isfile(path) or not path.lower().endswith(CHUNK_EXTENSIONS):
+        st.error(f"Not a CSV or .xlsx file: {path}")
+        return
+    if not cols["username"]:
+        st.warning("⚠️ A username column is required")
+        return
+
+    key = chunked_job_key(path, chunk_rows, cols)
+    result = ensure_job("chunked_dba", key, f"Chunked checks ({os.path.basename(path)})",
+                        run_chunked_dba_checks, path, cols, chunk_rows)
+    if result is None:
+        return
+
+    try:
+        summary = result["summary"]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Accounts Checked", f"{result['rows']:,}")
+        with col2:
+            st.metric("Profiles", len(result["profile_counts"]))
+        with col3:
+            st.metric("Flagged Rows", f"{int(summary['Flagged Rows'].sum()):,}")
+
+        for finding in result["findings"].message:
+            st.write(finding)
+        st.dataframe(summary.drop(columns="Spill File"), hide_index=True)
+
+        flagged = summary[summary["Flagged Rows"] > 0]
+        if not all(os.path.exists(spill_file) for spill_file in flagged["Spill File"]):
+            st.warning("⚠️ The flagged rows of this run have been cleaned up; please run it again.")
+            clear_job("chunked_dba")
+            flagged = flagged.iloc[:0]
+        if not flagged.empty:
+            check = st.selectbox("🔎 Flagged rows for check", list(flagged["Check"]), key="chunk_check")
+            spill_file = flagged.loc[flagged["Check"] == check, "Spill File"].iloc[0]
+            st.dataframe(pd.read_csv(spill_file, nrows=100, dtype=str, keep_default_na=False), hide_index=True)
+            st.caption(f"First 100 of {int(flagged.loc[flagged['Check'] == check, 'Flagged Rows'].iloc[0]):,} rows, spilled to {spill_file}")
+            st.download_button(
+                label=f"📥 Download {check} Rows (CSV)",
+                data=lambda: read_file_bytes(spill_file),
+                file_name=os.path.basename(spill_file),
+                mime="text/csv",
+                key="chunk_download",
+                on_click="ignore"
+            )
+        if not result["single_user_profiles"].empty:
+            with st.expander(f"🔍 Single-User Profiles ({len(result['single_user_profiles'])})"):
+                st.dataframe(result["single_user_profiles"], hide_index=True)
+        with st.expander("👑 Default Account Review"):
+            st.dataframe(result["default_users"], hide_index=True)
+    except Exception as e:
+        st.error(f"Error displaying chunked results: {str(e)}")
+
 def database_groups():
     st.title("📂 Database Groups Management")
     uploaded_file = st.file_uploader("📂 Upload ORACLE DBA_USER REPORT", type=["xls", "xlsx"])
+    previous_file = st.file_uploader(
+        "🕘 Upload PREVIOUS DBA_USER REPORT (optional - delta mode)", type=["xls", "xlsx"], key="dba_users_previous",
+        help="Compare against last review's export: only new or changed accounts are re-checked"
+    )
     st.markdown("""
     ### 📤 What to Upload
     Upload the **ORACLE DBA_USER report** exported from your database environment (xlsx format).  
@@ -1229,10 +4710,14 @@ def database_groups():
 
     💡 The tool provides a comprehensive security overview to help auditors validate **user access governance** and ensure **database integrity**.
     """)
+    if DATA_ROOT:
+        with st.expander("🧱 Extract too large to upload? Run the checks in chunks"):
+            chunked_dba_checks()
     
     if uploaded_file:
         try:
-            db_users = pd.read_excel(uploaded_file)
+            db_users = load_excel(uploaded_file)
+            upload_key = content_digest(uploaded_file.getvalue())
             
             # Display dataset info
             st.success(f"✅ Successfully loaded {len(db_users)} user accounts")
@@ -1290,28 +4775,71 @@ def database_groups():
                     index=0,
                     help="Select the column showing user privileges or roles (optional)"
                 )
+
+            col4, col5, _ = st.columns(3)
+
+            with col4:
+                expiry_col = st.selectbox(
+                    "⏳ Password Expiry Date Column",
+                    options=[''] + list(db_users.columns),
+                    index=0,
+                    help="Select the column showing password expiry dates, e.g. EXPIRY_DATE (optional)"
+                )
+
+            with col5:
+                last_login_col = st.selectbox(
+                    "🕒 Last Login Column",
+                    options=[''] + list(db_users.columns),
+                    index=0,
+                    help="Select the column showing the last login time, e.g. LAST_LOGIN (optional)"
+                )
             
             # =============================================================================
             # SECURITY ANALYSIS SECTION
             # =============================================================================
             st.header("🔍 Security Analysis Results")
             
-            # Initialize findings
-            security_findings = []
-            analysis_results = {}
+            if username_col:
+                register_identity_source("Oracle DBA_USERS", "account", db_users[username_col], uploaded_file.getvalue())
+
+            # Date columns are parsed once per upload, whatever the rest of the mapping
+            dates = {
+                col: get_shared_cache().get_or_compute(
+                    content_digest("parse_dates", upload_key, col), lambda col=col: parse_dates(db_users[col])
+                )
+                for col in dict.fromkeys([created_col, expiry_col, last_login_col]) if col
+            }
+
+            # With a previous export, the row-wise results of unchanged accounts are carried forward from it
+            delta, delta_error = None, None
+            delta_cols = {"username": username_col, "status": status_col, "profile": profile_col,
+                          "created": created_col, "password": password_col, "privilege": privilege_col}
+            if previous_file and username_col:
+                try:
+                    delta = dba_users_delta(previous_file, db_users, upload_key, delta_cols)
+                except Exception as e:
+                    delta_error = str(e)
+
+            # Checks run once per upload and column mapping, not on every rerun
+            checks = get_shared_cache().get_or_compute(
+                content_digest("dba_user_checks", upload_key, username_col, status_col, profile_col, created_col, password_col,
+                               expiry_col, last_login_col),
+                lambda: run_dba_user_checks(db_users, username_col, status_col, profile_col, created_col, password_col,
+                                            expiry_col, last_login_col, dates,
+                                            export_row_flags(delta["flags"], db_users, delta_cols) if delta else None)
+            )
+            findings = checks["findings"]
+            analysis_results = checks["analysis_results"]
+            check_errors = checks["errors"]
             
             # 1. Identify Inactive/Locked Accounts (INFORMATIONAL - Not a risk)
             if status_col:
                 st.subheader("🔒 Account Status Analysis")
                 try:
-                    status_counts = db_users[status_col].value_counts()
-                    st.dataframe(status_counts)
-                    
-                    # Identify problematic statuses
-                    inactive_statuses = ['LOCKED', 'EXPIRED', 'EXPIRED(GRACE)', 'INACTIVE', 'LOCKED(TIMED)']
-                    inactive_accounts = db_users[
-                        db_users[status_col].astype(str).str.upper().isin([s.upper() for s in inactive_statuses])
-                    ]
+                    if "status" in check_errors:
+                        raise RuntimeError(check_errors["status"])
+                    st.dataframe(checks["status"]["counts"])
+                    inactive_accounts = checks["status"]["inactive"]
                     
                     if not inactive_accounts.empty:
                         st.info(f"ℹ️ {len(inactive_accounts)} inactive/locked accounts found (this is normal security practice)")
@@ -1322,7 +4850,6 @@ def database_groups():
                             display_cols.append(profile_col)
                         
                         st.dataframe(inactive_accounts[display_cols].head(15))
-                        analysis_results['inactive_accounts'] = inactive_accounts
                     else:
                         st.success("✅ No inactive/locked accounts found")
                         
@@ -1332,11 +4859,10 @@ def database_groups():
             # 2. Detect Default/Weak Credentials
             if username_col:
                 st.subheader("⚠️ Default Account Detection")
-                default_users = ['SYS', 'SYSTEM', 'DBSNMP', 'OUTLN', 'MGMT_VIEW', 'SYSMAN', 'SCOTT']
                 try:
-                    found_default = db_users[
-                        db_users[username_col].astype(str).str.upper().isin([u.upper() for u in default_users])
-                    ]
+                    if "default_accounts" in check_errors:
+                        raise RuntimeError(check_errors["default_accounts"])
+                    found_default = checks["default_accounts"]
                     
                     if not found_default.empty:
                         st.warning(f"⚠️ {len(found_default)} default database accounts found")
@@ -1347,8 +4873,6 @@ def database_groups():
                             display_cols.append(profile_col)
                             
                         st.dataframe(found_default[display_cols])
-                        security_findings.append(f"⚠️ {len(found_default)} default database accounts found")
-                        analysis_results['default_accounts'] = found_default
                     else:
                         st.success("✅ No default database accounts found")
                         
@@ -1358,11 +4882,10 @@ def database_groups():
             # 3. Identify Users with DBA Privileges
             if profile_col:
                 st.subheader("👑 Privileged Account Analysis")
-                dba_profiles = ['DBA', 'SYSDBA', 'SYSOPER', 'SYSDG', 'SYSBACKUP', 'SYSKM', 'SYSRAC', 'SYSASM']
                 try:
-                    dba_users = db_users[
-                        db_users[profile_col].astype(str).str.upper().isin([p.upper() for p in dba_profiles])
-                    ]
+                    if "dba_users" in check_errors:
+                        raise RuntimeError(check_errors["dba_users"])
+                    dba_users = checks["dba_users"]
                     
                     if not dba_users.empty:
                         st.warning(f"👑 {len(dba_users)} users with DBA/privileged profiles found")
@@ -1371,8 +4894,6 @@ def database_groups():
                             display_cols.append(status_col)
                             
                         st.dataframe(dba_users[display_cols])
-                        security_findings.append(f"👑 {len(dba_users)} users with DBA/privileged profiles")
-                        analysis_results['dba_users'] = dba_users
                     else:
                         st.success("✅ No users with DBA profiles found")
                         
@@ -1383,7 +4904,9 @@ def database_groups():
             if profile_col:
                 st.subheader("📊 Profile Distribution")
                 try:
-                    profile_counts = db_users[profile_col].value_counts()
+                    if "profile_counts" in check_errors:
+                        raise RuntimeError(check_errors["profile_counts"])
+                    profile_counts = checks["profile_counts"]
                     
                     col1, col2 = st.columns(2)
                     
@@ -1399,11 +4922,6 @@ def database_groups():
                             ax.set_xlabel('Profile Name')
                             plt.xticks(rotation=45, ha='right')
                             st.pyplot(fig)
-                            
-                    # Identify profiles with many users (potential risk)
-                    large_profiles = profile_counts[profile_counts > 10]
-                    if not large_profiles.empty:
-                        security_findings.append(f"📊 {len(large_profiles)} profiles with more than 10 users")
                         
                 except Exception as e:
                     st.error(f"Error analyzing profile distribution: {str(e)}")
@@ -1412,30 +4930,16 @@ def database_groups():
             if created_col and status_col:
                 st.subheader("📅 Account Age & Security Risk Analysis")
                 try:
-                    # Convert to datetime
-                    db_users['CREATED_DATE'] = pd.to_datetime(db_users[created_col], errors='coerce')
-                    valid_dates = db_users['CREATED_DATE'].notna()
+                    if "account_age" in check_errors:
+                        raise RuntimeError(check_errors["account_age"])
+                    age = checks["account_age"]
                     
-                    if valid_dates.any():
-                        one_year_ago = pd.Timestamp.now() - pd.DateOffset(years=1)
-                        
-                        # Find accounts older than 1 year
-                        old_accounts = db_users[valid_dates & (db_users['CREATED_DATE'] < one_year_ago)]
+                    if age["valid"]:
+                        old_accounts = age["old"]
+                        old_active_accounts = age["old_active"]
+                        old_inactive_accounts = age["old_inactive"]
                         
                         if not old_accounts.empty:
-                            # Define active statuses (accounts that are still usable)
-                            active_statuses = ['OPEN', 'ACTIVE', 'VALID', 'ENABLED']
-                            
-                            # Find OLD accounts that are still ACTIVE - HIGH SECURITY RISK!
-                            old_active_accounts = old_accounts[
-                                old_accounts[status_col].astype(str).str.upper().isin([s.upper() for s in active_statuses])
-                            ]
-                            
-                            # Find old accounts that are properly locked/expired
-                            old_inactive_accounts = old_accounts[
-                                ~old_accounts[status_col].astype(str).str.upper().isin([s.upper() for s in active_statuses])
-                            ]
-                            
                             # HIGH RISK: Old accounts still active
                             if not old_active_accounts.empty:
                                 st.error(f"🚨 HIGH RISK: {len(old_active_accounts)} accounts older than 1 year are still ACTIVE!")
@@ -1452,14 +4956,10 @@ def database_groups():
                                     if not risk_by_profile.empty:
                                         st.write("**High-risk accounts by profile:**")
                                         st.dataframe(risk_by_profile)
-                                
-                                security_findings.append(f"🚨 HIGH RISK: {len(old_active_accounts)} old accounts (>1 year) still active")
-                                analysis_results['old_active_accounts_high_risk'] = old_active_accounts
                             
                             # Informational: Old accounts that are properly managed
                             if not old_inactive_accounts.empty:
                                 st.success(f"✅ {len(old_inactive_accounts)} old accounts are properly locked/expired")
-                                analysis_results['old_inactive_accounts'] = old_inactive_accounts
                             
                             # Show overall old account statistics
                             col1, col2, col3 = st.columns(3)
@@ -1475,8 +4975,7 @@ def database_groups():
                                 st.subheader("📈 High-Risk Account Creation Timeline")
                                 try:
                                     # Group by year-month
-                                    old_active_accounts['CREATED_YEAR_MONTH'] = old_active_accounts['CREATED_DATE'].dt.to_period('M')
-                                    timeline_data = old_active_accounts['CREATED_YEAR_MONTH'].value_counts().sort_index()
+                                    timeline_data = month_histogram(old_active_accounts['CREATED_DATE'])
                                     
                                     fig, ax = plt.subplots(figsize=(12, 6))
                                     timeline_data.plot(kind='bar', ax=ax, color='red', alpha=0.7)
@@ -1492,8 +4991,9 @@ def database_groups():
                             st.success("✅ No accounts older than 1 year found")
                             
                         # Show recent account statistics for comparison
-                        recent_accounts = db_users[valid_dates & (db_users['CREATED_DATE'] >= one_year_ago)]
-                        st.success(f"🆕 {len(recent_accounts)} accounts created in the last year")
+                        st.success(f"🆕 {age['recent_count']} accounts created in the last year")
+                        st.write("**Accounts by age:**")
+                        st.bar_chart(age["buckets"])
                         
                     else:
                         st.warning("Could not parse creation dates from selected column")
@@ -1501,23 +5001,51 @@ def database_groups():
                 except Exception as e:
                     st.error(f"Error analyzing account ages: {str(e)}")
             
+            # 11-12. Dormant Accounts & Password Expiry
+            if status_col and (last_login_col or expiry_col):
+                st.subheader("💤 Dormant Accounts & Password Expiry")
+                try:
+                    if last_login_col:
+                        if "dormant" in check_errors:
+                            raise RuntimeError(check_errors["dormant"])
+                        dormant = checks["dormant"]
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric(f"No Login in {DORMANT_DAYS}+ Days", len(dormant["dormant"]))
+                        with col2:
+                            st.metric("Never Logged In", len(dormant["never"]))
+                        if not dormant["dormant"].empty:
+                            st.warning(f"💤 {len(dormant['dormant'])} active accounts have not logged in for {DORMANT_DAYS}+ days")
+                            display_cols = [c for c in [username_col, status_col, profile_col] if c] + ['LAST_LOGIN_DATE']
+                            st.dataframe(dormant["dormant"][display_cols].sort_values('LAST_LOGIN_DATE'))
+                        if not dormant["never"].empty:
+                            with st.expander(f"Active accounts that never logged in ({len(dormant['never'])})"):
+                                st.dataframe(dormant["never"])
+                        st.write("**Active accounts by time since last login:**")
+                        st.bar_chart(dormant["buckets"])
+                    if expiry_col:
+                        if "expiry" in check_errors:
+                            raise RuntimeError(check_errors["expiry"])
+                        expiry = checks["expiry"]
+                        if not expiry["none"].empty:
+                            st.warning(f"⏳ {len(expiry['none'])} active accounts have no password expiry date - check PASSWORD_LIFE_TIME on their profiles")
+                        if not expiry["expiring"].empty:
+                            st.info(f"⏳ {len(expiry['expiring'])} active passwords expire within {EXPIRY_WARNING_DAYS} days")
+                            st.dataframe(expiry["expiring"].sort_values('EXPIRY'))
+                except Exception as e:
+                    st.error(f"Error analyzing dormant accounts: {str(e)}")
+
             # 6. Password Policy Analysis
             if password_col:
                 st.subheader("🔐 Password Security Analysis")
                 try:
-                    pwd_versions = db_users[password_col].value_counts()
-                    st.dataframe(pwd_versions)
-                    
-                    # Check for outdated password versions
-                    outdated_pwd = ['10G', '11G']  # Add versions you consider outdated
-                    users_outdated_pwd = db_users[
-                        db_users[password_col].astype(str).str.upper().isin([v.upper() for v in outdated_pwd])
-                    ]
+                    if "password" in check_errors:
+                        raise RuntimeError(check_errors["password"])
+                    st.dataframe(checks["password"]["counts"])
+                    users_outdated_pwd = checks["password"]["outdated"]
                     
                     if not users_outdated_pwd.empty:
                         st.warning(f"🔐 {len(users_outdated_pwd)} users using older password versions")
-                        security_findings.append(f"🔐 {len(users_outdated_pwd)} users using older password versions")
-                        analysis_results['outdated_password_users'] = users_outdated_pwd
                         
                 except Exception as e:
                     st.error(f"Error analyzing password versions: {str(e)}")
@@ -1528,33 +5056,31 @@ def database_groups():
             # Check if database has groups/profiles
             if profile_col:
                 try:
-                    total_profiles = db_users[profile_col].nunique()
-                    total_users = len(db_users)
+                    integrity = checks.get("group_integrity", {})
+                    if "total_profiles" not in integrity:
+                        raise RuntimeError(check_errors["group_integrity"])
+                    total_profiles = integrity["total_profiles"]
                     
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         st.metric("Total Profiles/Groups", total_profiles)
                     with col2:
-                        st.metric("Total Users", total_users)
+                        st.metric("Total Users", integrity["total_users"])
                     
                     # Check 1: Database has proper group structure
                     if total_profiles <= 1:
                         st.error("🚨 CRITICAL: Database has only 1 profile/group - No proper segregation of duties!")
-                        security_findings.append("🚨 CRITICAL: Only 1 profile/group found - No SoD implementation")
                     elif total_profiles < 5:
                         st.warning("⚠️ WARNING: Limited profile/group structure - Consider implementing more granular access controls")
-                        security_findings.append("⚠️ Limited profile/group structure - Consider more granular controls")
                     else:
                         st.success(f"✅ Good: Database has {total_profiles} profiles/groups for proper access control")
+                    st.caption("ℹ️ Profile counts are only a proxy for SoD; check conflicting privileges on the 🔑 Database Privilege Users page.")
                     
                     # Check 2: Default profiles analysis
-                    default_profiles = ['DEFAULT', 'BASIC', 'STANDARD', 'NONE']
-                    default_profile_users = db_users[
-                        db_users[profile_col].astype(str).str.upper().isin([p.upper() for p in default_profiles])
-                    ]
+                    default_profile_users = integrity.get("default_profile_users")
                     
-                    if not default_profile_users.empty:
+                    if default_profile_users is not None and not default_profile_users.empty:
                         st.warning(f"⚠️ {len(default_profile_users)} users assigned to default profiles")
                         
                         # Show default profile users
@@ -1564,18 +5090,17 @@ def database_groups():
                         
                         st.dataframe(default_profile_users[display_cols])
                         
-                        # Check if non-service accounts are in default profiles
-                        service_accounts = ['SYS', 'SYSTEM', 'DBSNMP', 'ORACLE_OCM', 'XS$NULL']
-                        non_service_in_default = default_profile_users[
-                            ~default_profile_users[username_col].astype(str).str.upper().isin([s.upper() for s in service_accounts])
-                        ]
+                        if "group_integrity" in check_errors:
+                            raise RuntimeError(check_errors["group_integrity"])
+                        non_service_in_default = integrity["non_service_in_default"]
                         
                         if not non_service_in_default.empty:
                             st.error(f"🚨 HIGH RISK: {len(non_service_in_default)} NON-SERVICE accounts in default profiles!")
                             st.dataframe(non_service_in_default[display_cols])
-                            security_findings.append(f"🚨 HIGH RISK: {len(non_service_in_default)} non-service accounts in default profiles")
                         else:
                             st.info("✅ Only service accounts in default profiles (acceptable)")
+                    elif "group_integrity" in check_errors:
+                        raise RuntimeError(check_errors["group_integrity"])
                     
                 except Exception as e:
                     st.error(f"Error analyzing group structure: {str(e)}")
@@ -1585,94 +5110,10 @@ def database_groups():
                 st.subheader("👑 Default User Security Analysis")
                 
                 try:
-                    # Define default Oracle accounts and their expected states
-                    default_account_checks = {
-                        'SYS': {
-                            'expected_status': 'OPEN',
-                            'risk_if': 'LOCKED',  # SYS should generally be open
-                            'description': 'Data dictionary owner - critical system account'
-                        },
-                        'SYSTEM': {
-                            'expected_status': 'OPEN', 
-                            'risk_if': 'LOCKED',
-                            'description': 'Administrative operations - should be open'
-                        },
-                        'DBSNMP': {
-                            'expected_status': 'OPEN',
-                            'risk_if': 'LOCKED', 
-                            'description': 'Enterprise Manager agent - should be open'
-                        },
-                        'OUTLN': {
-                            'expected_status': 'OPEN',
-                            'risk_if': 'LOCKED',
-                            'description': 'Plan stability - can be locked if not used'
-                        },
-                        'MGMT_VIEW': {
-                            'expected_status': 'OPEN',
-                            'risk_if': 'LOCKED',
-                            'description': 'Enterprise Manager - should be open if EM used'
-                        },
-                        'SYSMAN': {
-                            'expected_status': 'OPEN', 
-                            'risk_if': 'LOCKED',
-                            'description': 'Enterprise Manager super admin - should be open if EM used'
-                        },
-                        'SCOTT': {
-                            'expected_status': 'LOCKED',
-                            'risk_if': 'OPEN',
-                            'description': 'Sample/training account - should be LOCKED in production'
-                        },
-                        'HR': {
-                            'expected_status': 'LOCKED', 
-                            'risk_if': 'OPEN',
-                            'description': 'Sample/training account - should be LOCKED in production'
-                        },
-                        'OE': {
-                            'expected_status': 'LOCKED',
-                            'risk_if': 'OPEN', 
-                            'description': 'Sample/training account - should be LOCKED in production'
-                        }
-                    }
-                    
-                    default_user_issues = []
-                    default_user_summary = []
-                    
-                    for default_user, expected_config in default_account_checks.items():
-                        user_data = db_users[db_users[username_col].astype(str).str.upper() == default_user.upper()]
-                        
-                        if not user_data.empty:
-                            actual_status = user_data[status_col].iloc[0] if status_col else 'UNKNOWN'
-                            profile_name = user_data[profile_col].iloc[0] if profile_col else 'UNKNOWN'
-                            
-                            status_check = "✅" if str(actual_status).upper() == expected_config['expected_status'].upper() else "❌"
-                            
-                            # Check if account is in risky state
-                            is_risky = str(actual_status).upper() == expected_config['risk_if'].upper()
-                            
-                            default_user_summary.append({
-                                'Username': default_user,
-                                'Found': 'YES',
-                                'Current Status': actual_status,
-                                'Expected Status': expected_config['expected_status'],
-                                'Status Check': status_check,
-                                'Risk': 'HIGH' if is_risky else 'LOW',
-                                'Description': expected_config['description']
-                            })
-                            
-                            if is_risky:
-                                default_user_issues.append(f"🚨 {default_user} is {actual_status} but should be {expected_config['expected_status']} - {expected_config['description']}")
-                        
-                        else:
-                            default_user_summary.append({
-                                'Username': default_user,
-                                'Found': 'NO',
-                                'Current Status': 'NOT FOUND',
-                                'Expected Status': 'N/A',
-                                'Status Check': '⚠️',
-                                'Risk': 'MEDIUM',
-                                'Description': expected_config['description']
-                            })
-                            default_user_issues.append(f"⚠️ Default account {default_user} not found in database")
+                    if "default_users" in check_errors:
+                        raise RuntimeError(check_errors["default_users"])
+                    default_user_summary = checks["default_users"]["summary"]
+                    default_user_issues = checks["default_users"]["issues"]
                     
                     # Display default user analysis
                     if default_user_summary:
@@ -1680,18 +5121,15 @@ def database_groups():
                         st.dataframe(summary_df)
                         
                         # Show risk summary
-                        high_risk_count = len([u for u in default_user_issues if '🚨' in u])
-                        medium_risk_count = len([u for u in default_user_issues if '⚠️' in u])
+                        issue_rules = pd.Series([rule for rule, _, _ in default_user_issues], dtype=object)
+                        high_risk_count = int((issue_rules == "DU-09").sum())
+                        medium_risk_count = int((issue_rules == "DU-10").sum())
                         
                         col1, col2 = st.columns(2)
                         with col1:
                             st.metric("High Risk Default Users", high_risk_count)
                         with col2:
                             st.metric("Medium Risk Findings", medium_risk_count)
-                        
-                        # Add findings to security report
-                        security_findings.extend(default_user_issues)
-                        analysis_results['default_user_analysis'] = pd.DataFrame(default_user_summary)
                     
                 except Exception as e:
                     st.error(f"Error analyzing default users: {str(e)}")
@@ -1701,35 +5139,25 @@ def database_groups():
                 st.subheader("🔍 Profile Usage & Authorization Analysis")
                 
                 try:
-                    # Check for profiles with very few users (potential orphaned/custom profiles)
-                    profile_user_counts = db_users[profile_col].value_counts()
-                    
-                    # Profiles with only 1 user (potential service accounts or custom profiles)
-                    single_user_profiles = profile_user_counts[profile_user_counts == 1]
+                    if "single_user_profiles" in check_errors:
+                        raise RuntimeError(check_errors["single_user_profiles"])
+                    single = checks["single_user_profiles"]
+                    single_user_profiles = single["profiles"]
                     
                     if not single_user_profiles.empty:
                         st.info(f"🔍 {len(single_user_profiles)} profiles have only 1 user")
                         
-                        # Get the actual users for these profiles
-                        single_user_details = db_users[db_users[profile_col].isin(single_user_profiles.index)]
-                        
                         display_cols = [username_col, profile_col]
                         if status_col:
                             display_cols.append(status_col)
                         if created_col:
                             display_cols.append(created_col)
                         
-                        st.dataframe(single_user_details[display_cols].head(10))
-                        
-                        # Check if these are known service accounts or potential unauthorized profiles
-                        service_accounts = ['SYS', 'SYSTEM', 'DBSNMP', 'SYSMAN', 'ORACLE_OCM']
-                        unknown_single_users = single_user_details[
-                            ~single_user_details[username_col].astype(str).str.upper().isin([s.upper() for s in service_accounts])
-                        ]
+                        st.dataframe(single["details"][display_cols].head(10))
                         
+                        unknown_single_users = single["unknown"]
                         if not unknown_single_users.empty:
                             st.warning(f"⚠️ {len(unknown_single_users)} non-service accounts in single-user profiles - review for authorization")
-                            security_findings.append(f"⚠️ {len(unknown_single_users)} non-service accounts in single-user profiles - potential unauthorized access")
                     
                     # Check for profiles with no users (orphaned profiles)
                     # This would require comparing against all possible profiles in the database
@@ -1742,20 +5170,12 @@ def database_groups():
                 st.subheader("⚡ Privilege Escalation Risk Analysis")
                 
                 try:
-                    # Identify users with powerful profiles but non-standard names
-                    powerful_profiles = ['DBA', 'SYSDBA', 'SYSOPER', 'SYSDG', 'SYSBACKUP', 'SYSKM']
+                    if "privilege_escalation" in check_errors:
+                        raise RuntimeError(check_errors["privilege_escalation"])
+                    escalation = checks["privilege_escalation"]
                     
-                    powerful_users = db_users[
-                        db_users[profile_col].astype(str).str.upper().isin([p.upper() for p in powerful_profiles])
-                    ]
-                    
-                    if not powerful_users.empty:
-                        # Check if these are known administrative accounts
-                        known_admin_accounts = ['SYS', 'SYSTEM', 'SYSMAN']
-                        
-                        unknown_powerful_users = powerful_users[
-                            ~powerful_users[username_col].astype(str).str.upper().isin([a.upper() for a in known_admin_accounts])
-                        ]
+                    if not escalation["powerful"].empty:
+                        unknown_powerful_users = escalation["unknown"]
                         
                         if not unknown_powerful_users.empty:
                             st.error(f"🚨 HIGH RISK: {len(unknown_powerful_users)} non-standard users with powerful privileges!")
@@ -1767,16 +5187,11 @@ def database_groups():
                                 display_cols.append(created_col)
                             
                             st.dataframe(unknown_powerful_users[display_cols])
-                            security_findings.append(f"🚨 HIGH RISK: {len(unknown_powerful_users)} non-standard users with powerful admin privileges")
                             
                             # Check if any of these are active
-                            if status_col:
-                                active_powerful_unknown = unknown_powerful_users[
-                                    unknown_powerful_users[status_col].astype(str).str.upper().isin(['OPEN', 'ACTIVE'])
-                                ]
-                                if not active_powerful_unknown.empty:
-                                    st.error(f"🔴 CRITICAL: {len(active_powerful_unknown)} unknown users with admin privileges are ACTIVE!")
-                                    security_findings.append(f"🔴 CRITICAL: {len(active_powerful_unknown)} unknown admin users are ACTIVE")
+                            active_powerful_unknown = escalation.get("active_unknown")
+                            if active_powerful_unknown is not None and not active_powerful_unknown.empty:
+                                st.error(f"🔴 CRITICAL: {len(active_powerful_unknown)} unknown users with admin privileges are ACTIVE!")
                         else:
                             st.success("✅ All powerful privileges assigned to known administrative accounts")
                     
@@ -1788,140 +5203,52 @@ def database_groups():
             # =============================================================================
             if profile_col:
                 st.header("👥 Profile Management")
-                
-                # Extract Unique Profiles 
-                unique_profiles = db_users[profile_col].unique()
-
-                # Select the profile to View its Users 
-                selected_profile = st.selectbox("🔎 Select a Profile Name: ", unique_profiles)
-
-                # Display Users for the Selected Profile
-                profile_users = db_users[db_users[profile_col] == selected_profile]
-                st.subheader(f"🗂 Users with Profile: **{selected_profile}**")
-                st.dataframe(profile_users)
-
-                # Consolidate all profile users into one Excel file with separate sheets 
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                    for profile in unique_profiles:
-                        group = db_users[db_users[profile_col] == profile]
-                        # Limit sheet name to 31 characters (Excel limitations)
-                        sheet_name = str(profile)[:31]
-                        group.to_excel(writer, sheet_name=sheet_name, index=False)
-                output.seek(0)
-
-                st.download_button(
-                    label = "📥 Download Consolidated Users of Profiles", 
-                    data = output, 
-                    file_name="Consolidated_Users_of_Profiles.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+                profile_users_view(db_users, profile_col)
             
             # =============================================================================
             # SECURITY FINDINGS SUMMARY
             # =============================================================================
             st.header("📋 Security Findings Summary")
             
-            if security_findings:
-                for i, finding in enumerate(security_findings, 1):
+            if len(findings):
+                for i, finding in enumerate(findings.message, 1):
                     st.write(f"{i}. {finding}")
                 
                 # Risk Level Assessment
-                risk_count = len(security_findings)
-                critical_count = len([f for f in security_findings if '🔴' in f])
-                high_count = len([f for f in security_findings if '🚨' in f and '🔴' not in f])
-                
-                if critical_count > 0:
-                    st.error("🔴 CRITICAL RISK: Immediate action required!")
-                elif high_count > 2:
-                    st.error("🚨 HIGH RISK: Multiple serious security issues detected")
-                elif risk_count > 5:
-                    st.warning("🟡 MEDIUM RISK: Several security issues detected")
-                else:
-                    st.info("🟢 LOW RISK: Minor security issues detected")
+                severity_counts = findings.severity_counts()
+                for col, level in zip(st.columns(len(SEVERITY_ORDER)), SEVERITY_ORDER):
+                    with col:
+                        st.metric(f"{level} Findings", int(severity_counts[level]))
+                level, banner = findings.risk_level()
+                {"Critical": st.error, "High": st.error, "Medium": st.warning, "Low": st.info}[level](banner)
+
+                # Affected accounts come straight from the stored row positions
+                findings_frame = findings.frame
+                with_rows = findings_frame[np.diff(findings.offsets) > 0].drop_duplicates("Rule")
+                if not with_rows.empty:
+                    rule = st.selectbox(
+                        "🔎 Accounts affected by finding",
+                        list(with_rows["Rule"]),
+                        format_func=lambda r: f"{r} · {DBA_USER_RULES[r][0]} · {DBA_USER_RULES[r][1]}",
+                        key="findings_rule"
+                    )
+                    st.dataframe(findings.affected(db_users, rule))
             else:
                 st.success("🎉 EXCELLENT: No security issues detected!")
             
             # =============================================================================
             # EXPORT SECTION
             # =============================================================================
+            if delta:
+                snapshot_delta(delta)
+            elif delta_error:
+                st.header("🔄 Changes Since Previous Export")
+                st.error(f"❌ Error comparing exports: {delta_error}")
+            elif previous_file:
+                st.info("👤 Select the username column to compare against the previous export")
+
             st.header("📤 Export Results")
-            
-            if st.button("📊 Generate Comprehensive Audit Report"):
-                with st.spinner("Generating audit report..."):
-                    output = io.BytesIO()
-                    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                        # Sheet 1: All Users
-                        db_users.to_excel(writer, sheet_name='All_Users', index=False)
-                        
-                        # Sheet 2: Security Findings Summary
-                        findings_df = pd.DataFrame({
-                            'Finding': security_findings,
-                            'Risk_Level': ['Critical' if '🔴' in f else 'High' if '🚨' in f else 'Medium' if '⚠️' in f else 'Low' for f in security_findings],
-                            'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                        findings_df.to_excel(writer, sheet_name='Security_Findings', index=False)
-                        
-                        # Sheet 3: Profile Summary
-                        if profile_col:
-                            profile_summary = db_users[profile_col].value_counts().reset_index()
-                            profile_summary.columns = ['Profile', 'User_Count']
-                            profile_summary.to_excel(writer, sheet_name='Profile_Summary', index=False)
-                        
-                        # Sheet 4: Status Summary
-                        if status_col:
-                            status_summary = db_users[status_col].value_counts().reset_index()
-                            status_summary.columns = ['Status', 'User_Count']
-                            status_summary.to_excel(writer, sheet_name='Status_Summary', index=False)
-                        
-                        # Additional sheets for each analysis result
-                        for result_name, result_data in analysis_results.items():
-                            if not result_data.empty:
-                                sheet_name = result_name.replace('_', ' ').title()[:31]
-                                result_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # INDIVIDUAL GROUP SHEETS - Add sheets for each profile/group
-                        if profile_col:
-                            unique_profiles = db_users[profile_col].unique()
-                            for profile in unique_profiles:
-                                group_users = db_users[db_users[profile_col] == profile]
-                                if not group_users.empty:
-                                    # Clean sheet name for Excel (max 31 chars, no invalid characters)
-                                    sheet_name = f"Profile_{str(profile)}"[:31]
-                                    # Remove invalid characters for Excel sheet names
-                                    sheet_name = ''.join(c for c in sheet_name if c not in r'[]:*?/\\')
-                                    try:
-                                        group_users.to_excel(writer, sheet_name=sheet_name, index=False)
-                                    except Exception as sheet_error:
-                                        # If sheet name is still problematic, use a safe name
-                                        safe_sheet_name = f"Group_{hash(profile) % 10000}"[:31]
-                                        group_users.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-                    
-                    output.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Download Comprehensive Audit Report",
-                        data=output,
-                        file_name=f"Database_Security_Audit_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="audit_report"
-                    )
-                    
-            # Quick CSV export of findings
-            if security_findings:
-                csv_findings = pd.DataFrame({
-                    'Security_Finding': security_findings,
-                    'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-                csv_output = csv_findings.to_csv(index=False).encode('utf-8')
-                
-                st.download_button(
-                    label="📋 Download Security Findings (CSV)",
-                    data=csv_output,
-                    file_name="security_findings.csv",
-                    mime="text/csv",
-                    key="findings_csv"
-                )
+            dba_audit_export(db_users, findings, analysis_results, profile_col, status_col)
                 
         except Exception as e:
             st.error(f"❌ Error processing file: {str(e)}")
@@ -1940,13 +5267,701 @@ def database_groups():
         **💡 Tip**: The tool will automatically detect your column names and let you map them to the required fields.
         """)
 
+# ---------------------------
+# Role grant closure (DBA_ROLE_PRIVS)
+# ---------------------------
+# Roles that amount to database-wide administration when held directly or through nesting
+POWERFUL_ROLES = ['DBA', 'IMP_FULL_DATABASE', 'EXP_FULL_DATABASE', 'DATAPUMP_IMP_FULL_DATABASE',
+                  'DATAPUMP_EXP_FULL_DATABASE', 'DELETE_CATALOG_ROLE', 'EXECUTE_CATALOG_ROLE', 'AUDIT_ADMIN']
+ADMIN_OPTION_VALUES = ['YES', 'Y', 'TRUE']
+
+def matching_column(df, name):
+    """The column of df named like 'name' ignoring case, spaces and underscores, or None."""
+    wanted = re.sub(r"[\s_]", "", name).upper()
+    return next((c for c in df.columns if re.sub(r"[\s_]", "", str(c)).upper() == wanted), None)
+
+@profiled("resolve_role_grants")
+def resolve_role_grants(role_privs, grantee_col, role_col, admin_col=None):
+    """Effective roles of every user through nested role grants.
+
+    Grants are loaded into CSR adjacency arrays (grantee -> granted roles). The
+    closure of each role is computed once, children first, and kept as a table;
+    users are then expanded with one join of their direct grants against it, so a
+    role shared by thousands of users is resolved a single time. For every (user,
+    role) pair keeps the shortest path and whether a grant of that role itself carries
+    the admin option: as in Oracle, ADMIN OPTION on a grant of R2 lets the holder
+    re-grant R2 only, never the roles R2 contains. Returns Grantee, Role, Depth (1 = direct), Admin Path, Powerful and Path,
+    for grantees that are not themselves granted as roles.
+    """
+    grants = role_privs[[grantee_col, role_col]].copy()
+    grants["admin"] = upper_in(role_privs[admin_col], ADMIN_OPTION_VALUES) if admin_col else False
+    grants = grants.dropna(subset=[grantee_col, role_col])
+    codes, names = pd.factorize(pd.concat([grants[grantee_col].astype(str).str.strip().str.upper(),
+                                           grants[role_col].astype(str).str.strip().str.upper()]))
+    names = names.to_numpy()
+    src, dst = codes[:len(grants)], codes[len(grants):]
+    admin = grants["admin"].to_numpy(dtype=bool)
+    order = np.lexsort((dst, src))
+    src, dst, admin = src[order], dst[order], admin[order]
+    indptr = np.searchsorted(src, np.arange(len(names) + 1))
+    is_role = np.zeros(len(names), dtype=bool)
+    is_role[dst] = True
+
+    # Role closures by iterative post-order DFS over roles only; closures[role] maps
+    # reachable role -> (depth, next hop, admin on a grant of that role). Circular grants (which
+    # Oracle rejects) are skipped rather than followed.
+    closures = {}
+    for start in np.flatnonzero(is_role):
+        if start in closures:
+            continue
+        stack, on_stack = [(start, indptr[start])], {start}
+        while stack:
+            node, k = stack[-1]
+            if k < indptr[node + 1]:
+                stack[-1] = (node, k + 1)
+                child = dst[k]
+                if child not in closures and child not in on_stack:
+                    stack.append((child, indptr[child]))
+                    on_stack.add(child)
+                continue
+            stack.pop()
+            on_stack.discard(node)
+            closure = {}
+            for k in range(indptr[node], indptr[node + 1]):
+                child, edge_admin = dst[k], admin[k]
+                # The edge's admin option belongs to child alone, not to the roles below it
+                for role, (depth, _, path_admin) in [(child, (0, child, edge_admin))] + list(closures.get(child, {}).items()):
+                    if role == node:
+                        continue
+                    held = closure.get(role)
+                    if held is None or depth + 1 < held[0]:
+                        closure[role] = (depth + 1, child, path_admin or (held is not None and held[2]))
+                    elif path_admin and not held[2]:
+                        closure[role] = (held[0], held[1], True)
+            closures[node] = closure
+
+    # Role closure table, including each role reaching itself at depth 0
+    reach = [(role, role, 0, False, names[role]) for role in closures]
+    for role, closure in closures.items():
+        for target, (depth, _, path_admin) in closure.items():
+            path, hop = [role], role
+            while hop != target:
+                hop = closures[hop][target][1]
+                path.append(hop)
+            reach.append((role, target, depth, path_admin, " → ".join(names[path])))
+    reach = pd.DataFrame(reach, columns=["via", "role", "depth", "admin", "path"])
+
+    # Users: direct grants joined to the closure of each directly granted role
+    direct = pd.DataFrame({"user": src, "via": dst, "edge_admin": admin})[~is_role[src]]
+    effective = direct.merge(reach, on="via")
+    # The user's own grant carries admin only for the role it grants (depth 0 in the closure);
+    # a role the user reaches through several grants is re-grantable if any of them has admin
+    effective["Admin Path"] = (effective["edge_admin"] & (effective["depth"] == 0)) | effective["admin"]
+    effective["Admin Path"] = effective.groupby(["user", "role"])["Admin Path"].transform("max")
+    effective = effective.sort_values("depth", kind="stable").drop_duplicates(["user", "role"]).sort_index()
+    return pd.DataFrame({
+        "Grantee": names[effective["user"].to_numpy()],
+        "Role": names[effective["role"].to_numpy()],
+        "Depth": effective["depth"].to_numpy() + 1,
+        "Admin Path": effective["Admin Path"].to_numpy(),
+        "Powerful": np.isin(names[effective["role"].to_numpy()], POWERFUL_ROLES),
+        "Path": names[effective["user"].to_numpy()] + " → " + effective["path"].to_numpy(),
+    })
+
+# ---------------------------
+# Segregation of duties (DBA_SYS_PRIVS / DBA_TAB_PRIVS)
+# ---------------------------
+# Each rule is (rule id, conflict, sides); a grantee violates it when it holds at least one
+# privilege from every side. Object privileges read "PRIVILEGE ON OWNER.TABLE" and entries
+# may use shell wildcards ("DELETE ON AUDSYS.*").
+SOD_RULES = [
+    ("SOD-01", "User administration + privilege granting",
+     [["CREATE USER", "ALTER USER"], ["GRANT ANY PRIVILEGE", "GRANT ANY ROLE", "GRANT ANY OBJECT PRIVILEGE"]]),
+    ("SOD-02", "Audit configuration + audit trail deletion",
+     [["AUDIT SYSTEM", "AUDIT ANY"], ["DELETE ANY TABLE", "DELETE ON SYS.AUD$", "DELETE ON AUDSYS.*"]]),
+    ("SOD-03", "Code deployment + direct data change",
+     [["CREATE ANY PROCEDURE", "ALTER ANY PROCEDURE", "CREATE ANY TRIGGER"],
+      ["INSERT ANY TABLE", "UPDATE ANY TABLE", "DELETE ANY TABLE"]]),
+    ("SOD-04", "Impersonation + unrestricted data access",
+     [["BECOME USER", "ALTER USER"], ["SELECT ANY TABLE", "SELECT ANY DICTIONARY"]]),
+    ("SOD-05", "System configuration + audit configuration",
+     [["ALTER SYSTEM", "ALTER DATABASE"], ["AUDIT SYSTEM", "AUDIT ANY"]]),
+    ("SOD-06", "Schema change + data change",
+     [["CREATE ANY TABLE", "ALTER ANY TABLE", "DROP ANY TABLE"], ["UPDATE ANY TABLE", "DELETE ANY TABLE"]]),
+]
+
+def upper_strip(series):
+    return series.astype(str).str.strip().str.upper()
+
+def privilege_grants(sys_privs=None, tab_privs=None):
+    """(Grantee, Privilege) pairs from DBA_SYS_PRIVS and DBA_TAB_PRIVS exports."""
+    frames = []
+    if sys_privs is not None:
+        grantee_col, privilege_col = matching_column(sys_privs, "GRANTEE"), matching_column(sys_privs, "PRIVILEGE")
+        if grantee_col is None or privilege_col is None:
+            raise ValueError("DBA_SYS_PRIVS needs GRANTEE and PRIVILEGE columns")
+        frames.append(pd.DataFrame({"Grantee": upper_strip(sys_privs[grantee_col]),
+                                    "Privilege": upper_strip(sys_privs[privilege_col])}))
+    if tab_privs is not None:
+        cols = [matching_column(tab_privs, name) for name in ("GRANTEE", "PRIVILEGE", "OWNER", "TABLE_NAME")]
+        if None in cols:
+            raise ValueError("DBA_TAB_PRIVS needs GRANTEE, PRIVILEGE, OWNER and TABLE_NAME columns")
+        grantee_col, privilege_col, owner_col, table_col = cols
+        frames.append(pd.DataFrame({
+            "Grantee": upper_strip(tab_privs[grantee_col]),
+            "Privilege": upper_strip(tab_privs[privilege_col]) + " ON " + upper_strip(tab_privs[owner_col])
+                         + "." + upper_strip(tab_privs[table_col]),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["Grantee", "Privilege"])
+    return pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True)
+
+def sod_rules_from_frame(df):
+    """Rule library from an uploaded sheet with Rule, Side and Privilege (and optional Conflict) columns."""
+    cols = [matching_column(df, name) for name in ("Rule", "Side", "Privilege")]
+    if None in cols:
+        raise ValueError("The rule library needs Rule, Side and Privilege columns")
+    rule_col, side_col, privilege_col = cols
+    conflict_col = matching_column(df, "Conflict")
+    rules = []
+    for rule, group in df.dropna(subset=cols).groupby(rule_col, sort=False):
+        sides = [upper_strip(side[privilege_col]).tolist() for _, side in group.groupby(side_col, sort=True)]
+        conflict = str(group[conflict_col].iloc[0]) if conflict_col else str(rule)
+        rules.append((str(rule), conflict, sides))
+    return rules
+
+@profiled("sod_conflicts")
+def sod_conflicts(grants, rules=SOD_RULES, effective_roles=None):
+    """Grantees holding every side of a conflicting-privilege rule.
+
+    Privileges are encoded as one uint64 bitset row per grantee, one bit per privilege
+    referenced by the rule library (a privilege no rule mentions can never conflict, so
+    the width does not grow with the export's vocabulary). Users inherit the bitsets of
+    every role in `effective_roles` (Grantee/Role, as from resolve_role_grants). Each
+    rule side is a mask; a rule is violated where every side's mask intersects the row.
+    Returns Grantee, Rule, Conflict, Privileges Held (sides separated by ' ✕ ').
+    """
+    vocabulary = pd.Index(grants["Privilege"].unique())
+    vocabulary_list = vocabulary.tolist()
+    side_privileges, side_rule = [], []
+    for index, (_, _, sides) in enumerate(rules):
+        for side in sides:
+            matched = set()
+            for entry in side:
+                entry = str(entry).strip().upper()
+                matched.update(fnmatch.filter(vocabulary_list, entry) if any(c in entry for c in "*?[") else [entry])
+            side_privileges.append(matched)
+            side_rule.append(index)
+    columns = pd.Index(sorted(set().union(*side_privileges)))
+    words = max(1, -(-len(columns) // 64))
+    empty = pd.DataFrame(columns=["Grantee", "Rule", "Conflict", "Privileges Held"])
+    if not side_privileges:
+        return empty
+
+    # One bitset row per grantee, users OR-ing in the rows of their effective roles
+    subjects = [grants["Grantee"]]
+    if effective_roles is not None:
+        subjects += [effective_roles["Grantee"], effective_roles["Role"]]
+    subjects = pd.Index(pd.unique(pd.concat(subjects, ignore_index=True)))
+    bits = np.zeros((len(subjects), words), dtype=np.uint64)
+    bit = columns.get_indexer(grants["Privilege"])
+    held = bit >= 0
+    owner = subjects.get_indexer(grants["Grantee"][held])
+    bit = bit[held]
+    np.bitwise_or.at(bits, (owner, bit // 64), np.left_shift(np.uint64(1), (bit % 64).astype(np.uint64)))
+    if effective_roles is not None and len(effective_roles):
+        user = subjects.get_indexer(effective_roles["Grantee"])
+        order = np.argsort(user, kind="stable")
+        user, inherited = user[order], bits[subjects.get_indexer(effective_roles["Role"])[order]]
+        starts = np.flatnonzero(np.r_[True, user[1:] != user[:-1]])
+        bits[user[starts]] |= np.bitwise_or.reduceat(inherited, starts, axis=0)
+
+    masks = np.zeros((len(side_privileges), words), dtype=np.uint64)
+    for s, privileges in enumerate(side_privileges):
+        position = columns.get_indexer(sorted(privileges))
+        np.bitwise_or.at(masks[s], position // 64, np.left_shift(np.uint64(1), (position % 64).astype(np.uint64)))
+
+    # Grantee x side hits, then every side of a rule (sides are contiguous per rule)
+    hits = np.empty((len(subjects), len(masks)), dtype=bool)
+    for s in range(len(masks)):
+        hits[:, s] = (bits & masks[s]).any(axis=1)
+    side_rule = np.asarray(side_rule)
+    rule_starts = np.flatnonzero(np.r_[True, side_rule[1:] != side_rule[:-1]])
+    violations = np.logical_and.reduceat(hits, rule_starts, axis=1)
+    user, rule = np.nonzero(violations)
+    rule = side_rule[rule_starts][rule]
+    if len(user) == 0:
+        return empty
+
+    # Privileges held on each side of each violation, unpacked from the bitsets
+    held_rows, held_sides, held_bits = [], [], []
+    for s in range(len(masks)):
+        rows = np.flatnonzero(rule == side_rule[s])
+        flags = np.unpackbits((bits[user[rows]] & masks[s]).view(np.uint8), axis=1, bitorder="little")
+        r, b = np.nonzero(flags)
+        held_rows.append(rows[r])
+        held_sides.append(np.full(len(r), s))
+        held_bits.append(b)
+    held = pd.DataFrame({"row": np.concatenate(held_rows), "side": np.concatenate(held_sides),
+                         "privilege": columns[np.concatenate(held_bits)]}).sort_values(["row", "side", "privilege"])
+    per_side = join_by_group(held["privilege"], [held["row"], held["side"]]).reset_index(level="side", drop=True)
+    privileges_held = join_by_group(per_side, per_side.index, sep=" ✕ ")
+    return pd.DataFrame({
+        "Grantee": subjects[user],
+        "Rule": np.array([r[0] for r in rules], dtype=object)[rule],
+        "Conflict": np.array([r[1] for r in rules], dtype=object)[rule],
+        "Privileges Held": privileges_held.reindex(np.arange(len(user))).to_numpy(),
+    })
+
+# ---------------------------
+# Password policy compliance (DBA_PROFILES)
+# ---------------------------
+# Baseline per resource: (test, value, weight). 'max' passes at or below the value and 'min'
+# at or above it, UNLIMITED failing both as in the CIS Oracle audit queries; 'set' passes
+# when a password verify function is configured.
+PASSWORD_POLICY_BASELINE = {
+    "FAILED_LOGIN_ATTEMPTS": ("max", 5, 3),
+    "PASSWORD_LIFE_TIME": ("max", 90, 2),
+    "PASSWORD_REUSE_MAX": ("min", 20, 1),
+    "PASSWORD_REUSE_TIME": ("min", 365, 1),
+    "PASSWORD_LOCK_TIME": ("min", 1, 1),
+    "PASSWORD_GRACE_TIME": ("max", 5, 1),
+    "PASSWORD_VERIFY_FUNCTION": ("set", None, 3),
+    "SESSIONS_PER_USER": ("max", 10, 1),
+}
+POLICY_LEVELS = [(90, "Compliant"), (60, "Partially Compliant"), (0, "Non-Compliant")]
+UNSET_LIMITS = ['NULL', 'NONE', 'NAN', '']
+DATABASE_COLUMNS = ["DATABASE", "DB_NAME", "CON_NAME"]
+
+def database_name(file_name):
+    """Database key for an export file: 'PROD1_dba_profiles.xlsx' -> 'PROD1'."""
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return re.sub(r'[_\-\s]*(dba[_\-\s]*)?(profiles?|users?)[_\-\s]*', '', stem, flags=re.IGNORECASE).upper() or stem.upper()
+
+def stack_exports(files):
+    """One frame over several databases' exports, with a Database column.
+
+    An export that already has a DATABASE / DB_NAME / CON_NAME column keeps it; otherwise
+    the database is named after the file.
+    """
+    frames = []
+    for file in files:
+        df = load_excel(file)
+        column = next((c for c in (matching_column(df, name) for name in DATABASE_COLUMNS) if c is not None), None)
+        database = upper_strip(df[column]) if column else database_name(file.name)
+        frames.append(df.drop(columns=[column] if column else []).assign(Database=database))
+    return pd.concat(frames, ignore_index=True)
+
+def resolve_profile_limits(profiles, database_col=None):
+    """Profile x resource LIMIT matrix, with 'DEFAULT' limits taken from the DEFAULT profile.
+
+    With `database_col` (several exports stacked) the index is (Database, Profile) and each
+    database's profiles resolve against that database's own DEFAULT profile.
+    """
+    cols = [matching_column(profiles, name) for name in ("PROFILE", "RESOURCE_NAME", "LIMIT")]
+    if None in cols:
+        raise ValueError("DBA_PROFILES needs PROFILE, RESOURCE_NAME and LIMIT columns")
+    profile_col, resource_col, limit_col = cols
+    limits = pd.DataFrame({"Database": upper_strip(profiles[database_col]) if database_col else "",
+                           "Profile": upper_strip(profiles[profile_col]), "Resource": upper_strip(profiles[resource_col]),
+                           "Limit": upper_strip(profiles[limit_col])})
+    limits = (limits.drop_duplicates(["Database", "Profile", "Resource"], keep="last")
+              .pivot(index=["Database", "Profile"], columns="Resource", values="Limit"))
+    limits.columns.name = None
+    defaults = limits.xs("DEFAULT", level="Profile") if "DEFAULT" in limits.index.get_level_values("Profile") else None
+    if defaults is not None:
+        inherited = defaults.reindex(limits.index.get_level_values("Database"))
+        inherited.index = limits.index
+        limits = limits.mask(limits.eq("DEFAULT") | limits.isna(), inherited)
+    return limits if database_col else limits.droplevel("Database")
+
+@profiled("evaluate_password_policy")
+def evaluate_password_policy(limits, baseline=PASSWORD_POLICY_BASELINE):
+    """Score every profile of a resolved limit matrix against the baseline.
+
+    All profiles and resources are tested at once as arrays. Returns (passed, scores): passed
+    is the profile x resource pass/fail frame (NaN where neither the profile nor DEFAULT sets
+    the resource); scores has the weighted Score (0-100), Level and Failed resources.
+    """
+    resources = [resource for resource in baseline if resource in limits.columns]
+    values = limits[resources]
+    tests = np.array([baseline[r][0] for r in resources])
+    thresholds = np.array([np.nan if baseline[r][1] is None else baseline[r][1] for r in resources], dtype=float)
+    weights = np.array([baseline[r][2] for r in resources], dtype=float)
+
+    numeric = values.apply(pd.to_numeric, errors="coerce").mask(values.eq("UNLIMITED"), np.inf).to_numpy(dtype=float)
+    configured = (values.notna() & ~values.isin(UNSET_LIMITS)).to_numpy()
+    with np.errstate(invalid="ignore"):
+        passed = np.where(tests == "max", numeric <= thresholds,
+                          np.where(tests == "min", (numeric >= thresholds) & np.isfinite(numeric), configured))
+    known = (tests == "set") | ~np.isnan(numeric)
+
+    scored = (weights * known).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.round(100 * (weights * (passed & known)).sum(axis=1) / scored, 1)
+    failed = known & ~passed
+    failed_names = pd.DataFrame(np.where(failed, np.array(resources, dtype=object) + ", ", ""), index=limits.index).sum(axis=1)
+    scores = pd.DataFrame({
+        "Score": score,
+        "Level": pd.cut(score, [-1] + [bound for bound, _ in reversed(POLICY_LEVELS[:-1])] + [101],
+                        labels=[level for _, level in reversed(POLICY_LEVELS)], right=False),
+        "Failed": failed_names.str[:-2],
+    }, index=limits.index)
+    return pd.DataFrame(np.where(known, passed, np.nan), index=limits.index, columns=resources), scores
+
+def user_password_policy(users, limits, scores, database_col=None):
+    """Attach each DBA_USERS row's effective profile limits and score, joined on (Database,) Profile.
+
+    When the profiles cover a single database every user is joined to it, whatever the
+    users' export was named.
+    """
+    cols = [matching_column(users, name) for name in ("USERNAME", "PROFILE")]
+    if None in cols:
+        raise ValueError("DBA_USERS needs USERNAME and PROFILE columns")
+    username_col, profile_col = cols
+    status_col = matching_column(users, "ACCOUNT_STATUS")
+    profile = upper_strip(users[profile_col])
+    if database_col:
+        databases = limits.index.get_level_values("Database").unique()
+        database = upper_strip(users[database_col]) if len(databases) > 1 else pd.Series(databases[0], index=users.index)
+        keys = pd.MultiIndex.from_arrays([database, profile])
+    else:
+        keys = pd.Index(profile)
+    rows = limits.index.get_indexer(keys)
+    found = rows >= 0
+    joined = pd.DataFrame({"Username": users[username_col].to_numpy(), "Profile": profile.to_numpy()})
+    if database_col:
+        joined.insert(0, "Database", users[database_col].to_numpy())
+    if status_col:
+        joined["Status"] = users[status_col].to_numpy()
+    for name, frame in (("Score", scores["Score"]), ("Level", scores["Level"].astype(object)), ("Failed", scores["Failed"])):
+        joined[name] = np.where(found, frame.to_numpy()[rows], np.nan)
+    policy = limits[[r for r in PASSWORD_POLICY_BASELINE if r in limits.columns]].to_numpy(dtype=object)
+    for i, resource in enumerate(r for r in PASSWORD_POLICY_BASELINE if r in limits.columns):
+        joined[resource] = np.where(found, policy[rows, i], np.nan)
+    return joined
+
+# ---------------------------
+# Fleet batch audit (one DBA_USERS export per instance)
+# ---------------------------
+# Check-suite inputs of run_dba_user_checks: (field, label, Oracle column name)
+FLEET_FIELDS = [
+    ("username", "👤 Username", "USERNAME"),
+    ("status", "🔒 Account Status", "ACCOUNT_STATUS"),
+    ("profile", "👥 Profile", "PROFILE"),
+    ("created", "📅 Created Date", "CREATED"),
+    ("password", "🔐 Password Versions", "PASSWORD_VERSIONS"),
+]
+FLEET_EXTENSIONS = (".xls", ".xlsx")
+
+def name_exports(entries):
+    """(instance, fingerprint, read) triples named after each file's database, suffixing repeated names.
+
+    entries are (path, fingerprint, read): the fingerprint identifies the file's
+    content without reading it, and read() returns its bytes.
+    """
+    named, seen = [], defaultdict(int)
+    for path, fingerprint, read in entries:
+        instance = database_name(path)
+        seen[instance] += 1
+        named.append((instance if seen[instance] == 1 else f"{instance} ({seen[instance]})", fingerprint, read))
+    return named
+
+def read_zip_member(raw, name):
+    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+        return zf.read(name)
+
+def fleet_exports_from_zip(raw):
+    """Every workbook inside a zip of per-instance exports, fingerprinted by size and CRC (nothing is decompressed)."""
+    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+        infos = sorted(zf.infolist(), key=lambda info: info.filename)
+    return name_exports((info.filename, (info.filename, info.file_size, info.CRC), functools.partial(read_zip_member, raw, info.filename))
+                        for info in infos
+                        if info.filename.lower().endswith(FLEET_EXTENSIONS) and "__MACOSX" not in info.filename)
+
+def fleet_exports_from_folder(folder):
+    """Every workbook under a folder on the machine running the app, fingerprinted by (path, size, mtime)."""
+    return name_exports((os.path.join(folder, name), (os.path.join(folder, name), size, mtime_ns),
+                         functools.partial(read_file_bytes, os.path.join(folder, name)))
+                        for name, size, mtime_ns in directory_fingerprint(folder)
+                        if name.lower().endswith(FLEET_EXTENSIONS))
+
+def fleet_columns(df, mapping):
+    """Columns of one export for each check-suite field: the mapped name, else the Oracle default."""
+    columns = {}
+    for field, _, default in FLEET_FIELDS:
+        column = None
+        for name in (mapping.get(field), default):
+            if name and column is None:
+                column = matching_column(df, name)
+        columns[field] = column or ''
+    return columns
+
+def fleet_instance_checks(instance, read, mapping):
+    """Read and parse one instance's export and run the DBA_USERS check suite; returns (rollup row, findings)."""
+    raw = read()
+    upload_key = content_digest(raw)
+    db_users = get_shared_cache().get_or_compute(content_digest("read_excel", raw), lambda: parse_workbook(raw))
+    cols = fleet_columns(db_users, mapping)
+    # Same cache key as the Database Groups page, so opening one instance there is a cache hit
+    checks = get_shared_cache().get_or_compute(
+        content_digest("dba_user_checks", upload_key, cols["username"], cols["status"], cols["profile"], cols["created"], cols["password"], "", ""),
+        lambda: run_dba_user_checks(db_users, cols["username"], cols["status"], cols["profile"], cols["created"], cols["password"])
+    )
+    row = {
+        "Instance": instance,
+        "Users": len(db_users),
+        "Open": int(upper_in(db_users[cols["status"]], ACTIVE_STATUSES).sum()) if cols["status"] else None,
+        "Default Accounts": len(checks.get("default_accounts", [])),
+        "DBA Profile Users": len(checks.get("dba_users", [])),
+        "Old Active Accounts": len(checks.get("account_age", {}).get("old_active", [])),
+        "Outdated Passwords": len(checks.get("password", {}).get("outdated", [])),
+        "Non-Service in Default Profiles": len(checks.get("group_integrity", {}).get("non_service_in_default", [])),
+        "Unknown Admin Users": len(checks.get("privilege_escalation", {}).get("unknown", [])),
+        "Findings": len(checks["findings"]),
+        "Critical/High": int(checks["findings"].severity_counts()[["Critical", "High"]].sum()),
+        "Unmapped": ", ".join(field for field, column in cols.items() if not column),
+        "Check Errors": ", ".join(checks["errors"]),
+    }
+    return row, checks["findings"].frame
+
+@profiled("fleet_dba_checks")
+def run_fleet_dba_checks(exports, mapping):
+    """Run the DBA_USERS check suite over every instance of a fleet.
+
+    exports is a list of (instance, read) where read() returns the export's bytes, so
+    each file is read only when its instance is checked. Instances run side by side in
+    a thread pool whose threads hand workbook parsing to the parse process pool. Returns
+    (rollup, findings, failures) frames.
+    """
+    rows, findings, failures = [], [], []
+    with ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="fleet") as pool:
+        futures = {pool.submit(contextvars.copy_context().run, fleet_instance_checks, instance, read, mapping): instance
+                   for instance, read in exports}
+        for done, future in enumerate(as_completed(futures), 1):
+            instance = futures[future]
+            report_job_progress(done / len(futures), f"Checked {instance} ({done}/{len(futures)})")
+            try:
+                row, instance_findings = future.result()
+            except Exception as e:
+                failures.append((instance, str(e)))
+                continue
+            rows.append(row)
+            findings.append(instance_findings.assign(Instance=instance))
+    rollup = pd.DataFrame(rows, columns=["Instance", "Users", "Open", "Default Accounts", "DBA Profile Users",
+                                         "Old Active Accounts", "Outdated Passwords", "Non-Service in Default Profiles",
+                                         "Unknown Admin Users", "Findings", "Critical/High", "Unmapped", "Check Errors"])
+    rollup = rollup.sort_values(["Critical/High", "Findings", "Instance"], ascending=[False, False, True], ignore_index=True)
+    findings = pd.concat(findings, ignore_index=True) if findings else FindingsStore().frame
+    findings = findings.reindex(columns=["Instance", "Rule", "Severity", "Check", "Count", "Finding"])
+    return rollup, findings, pd.DataFrame(failures, columns=["Instance", "Error"])
+
+# ---------------------------
+# Oracle account model (DBA_USERS + DBA_ROLE_PRIVS + DBA_PROFILES)
+# ---------------------------
+SAMPLE_DB_USERS = [name for name, check in DEFAULT_ACCOUNT_CHECKS.items() if check['expected_status'] == 'LOCKED']
+
+ACCOUNT_MODEL_CHECKS = {
+    "AM-01": ("Critical", "Open account holds a powerful role and its password never expires"),
+    "AM-02": ("High", "Open account can re-grant a powerful role (holds its grant with admin option)"),
+    "AM-03": ("High", "Open account on a profile without a failed-login limit"),
+    "AM-04": ("High", "Sample account that should be locked is open and holds roles"),
+    "AM-05": ("Medium", "Locked or expired account still holds a powerful role"),
+    "AM-06": ("Medium", "Account profile is missing from DBA_PROFILES"),
+    "AM-07": ("Low", "Role granted to an account missing from DBA_USERS"),
+}
+
+class OracleAccountModel:
+    """DBA_USERS, DBA_ROLE_PRIVS and DBA_PROFILES loaded once into keyed tables.
+
+    - users: one row per USERNAME (the user key) with status, profile key, an Open flag
+      and the row of its profile in `profiles`
+    - grants: effective roles per user (resolve_role_grants) plus the user's row position
+    - profiles: resolved limits per profile (the profile key)
+    Cross-cutting checks are hash joins between the three (Index.get_indexer / reindex).
+    """
+
+    def __init__(self, users, role_privs=None, profiles=None):
+        username_col = matching_column(users, "USERNAME")
+        if username_col is None:
+            raise ValueError("DBA_USERS needs a USERNAME column")
+        status_col, profile_col = matching_column(users, "ACCOUNT_STATUS"), matching_column(users, "PROFILE")
+        usernames = upper_strip(users[username_col])
+        first = ~usernames.duplicated()
+        self.users = pd.DataFrame({
+            "Status": upper_strip(users[status_col])[first].to_numpy() if status_col else "",
+            "Profile": upper_strip(users[profile_col])[first].to_numpy() if profile_col else "DEFAULT",
+        }, index=pd.Index(usernames[first].to_numpy(), name="Username"))
+        self.users["Open"] = self.users["Status"].str.startswith("OPEN")
+
+        self.grants = pd.DataFrame({"Grantee": pd.Series(dtype=object), "Role": pd.Series(dtype=object),
+                                    "Depth": pd.Series(dtype=np.int64), "Admin Path": pd.Series(dtype=bool),
+                                    "Powerful": pd.Series(dtype=bool), "Path": pd.Series(dtype=object)})
+        if role_privs is not None:
+            grantee_col, role_col = matching_column(role_privs, "GRANTEE"), matching_column(role_privs, "GRANTED_ROLE")
+            if grantee_col is None or role_col is None:
+                raise ValueError("DBA_ROLE_PRIVS needs GRANTEE and GRANTED_ROLE columns")
+            self.grants = resolve_role_grants(role_privs, grantee_col, role_col, matching_column(role_privs, "ADMIN_OPTION"))
+        self.grants["User"] = self.users.index.get_indexer(self.grants["Grantee"])
+
+        self.profiles = resolve_profile_limits(profiles) if profiles is not None else None
+        self.users["Profile Row"] = self.profiles.index.get_indexer(self.users["Profile"]) if self.profiles is not None else -1
+
+    @property
+    def nbytes(self):
+        return sum(estimate_nbytes(frame) for frame in (self.users, self.grants, self.profiles) if frame is not None)
+
+    def user_limit(self, resource):
+        """Resolved profile limit per user, aligned with self.users (NaN if unknown)."""
+        if self.profiles is None or resource not in self.profiles.columns:
+            return pd.Series(np.nan, index=self.users.index, dtype=object)
+        limits = np.append(self.profiles[resource].to_numpy(dtype=object), np.nan)  # row -1 -> NaN
+        return pd.Series(limits[self.users["Profile Row"].to_numpy()], index=self.users.index)
+
+    def user_flags(self, grants):
+        """Boolean per user row: holds any of the given grant rows."""
+        flags = np.zeros(len(self.users), dtype=bool)
+        flags[grants["User"][grants["User"] >= 0].to_numpy()] = True
+        return flags
+
+    def user_roles(self, grants):
+        """', '-joined roles per user row position among the given grant rows."""
+        grants = grants[grants["User"] >= 0]
+        return join_by_group(grants["Role"], grants["User"])
+
+    @profiled("account_model_findings")
+    def findings(self):
+        """One row per (user, check) across the three tables, most severe first."""
+        users = self.users
+        open_ = users["Open"].to_numpy()
+        inactive = users["Status"].str.contains("LOCKED|EXPIRED|INACTIVE").to_numpy()  # incl. 'EXPIRED & LOCKED'
+        powerful = self.grants[self.grants["Powerful"]]
+        has_powerful = self.user_flags(powerful)
+        powerful_roles = self.user_roles(powerful)
+        checks = []
+        if len(self.grants):
+            admin_powerful = powerful[powerful["Admin Path"]]
+            sample_grants = self.grants[self.grants["Grantee"].isin(SAMPLE_DB_USERS)]
+            checks += [
+                ("AM-02", open_ & self.user_flags(admin_powerful), self.user_roles(admin_powerful)),
+                ("AM-04", open_ & self.user_flags(sample_grants), self.user_roles(sample_grants)),
+                ("AM-05", inactive & has_powerful, powerful_roles),
+            ]
+        if self.profiles is not None:
+            life = self.user_limit("PASSWORD_LIFE_TIME")
+            failed = self.user_limit("FAILED_LOGIN_ATTEMPTS")
+            checks += [
+                ("AM-01", open_ & has_powerful & life.eq("UNLIMITED").to_numpy(), powerful_roles),
+                ("AM-03", open_ & failed.eq("UNLIMITED").to_numpy(), "FAILED_LOGIN_ATTEMPTS UNLIMITED"),
+                ("AM-06", users["Profile Row"].to_numpy() < 0, "Profile " + users["Profile"]),
+            ]
+
+        frames = []
+        usernames, status, profile = users.index.to_numpy(), users["Status"].to_numpy(), users["Profile"].to_numpy()
+        for rule, flagged, detail in checks:
+            rows = np.flatnonzero(flagged)
+            if isinstance(detail, pd.Series) and detail.index.equals(users.index):
+                detail = detail.to_numpy()[rows]
+            elif isinstance(detail, pd.Series):
+                detail = detail.reindex(rows).to_numpy()
+            frames.append(pd.DataFrame({"Username": usernames[rows], "Status": status[rows], "Profile": profile[rows],
+                                        "Rule": rule, "Detail": detail}))
+        unknown = self.grants[self.grants["User"] < 0]
+        if len(unknown):
+            unknown = unknown[["Grantee", "Role"]].drop_duplicates("Grantee")
+            frames.append(pd.DataFrame({"Username": unknown["Grantee"].to_numpy(), "Status": "", "Profile": "",
+                                        "Rule": "AM-07", "Detail": unknown["Role"].to_numpy()}))
+        if not frames:
+            return pd.DataFrame(columns=["Severity", "Rule", "Check", "Username", "Status", "Profile", "Detail"])
+        findings = pd.concat(frames, ignore_index=True)
+        findings["Severity"] = pd.Categorical(findings["Rule"].map({r: c[0] for r, c in ACCOUNT_MODEL_CHECKS.items()}),
+                                              categories=SEVERITY_ORDER, ordered=True)
+        findings["Check"] = findings["Rule"].map({r: c[1] for r, c in ACCOUNT_MODEL_CHECKS.items()})
+        findings = findings.sort_values(["Severity", "Rule", "Username"], kind="stable", ignore_index=True)
+        return findings[["Severity", "Rule", "Check", "Username", "Status", "Profile", "Detail"]]
+
+    def user_report(self, findings):
+        """One row per user: keys, role counts, key profile limits and number of findings."""
+        report = self.users[["Status", "Profile"]].reset_index()
+        report["Roles"] = np.bincount(self.grants["User"][self.grants["User"] >= 0], minlength=len(report))
+        report["Powerful Roles"] = self.user_roles(self.grants[self.grants["Powerful"]]).reindex(np.arange(len(report))).to_numpy()
+        for resource in ("PASSWORD_LIFE_TIME", "FAILED_LOGIN_ATTEMPTS"):
+            report[resource] = self.user_limit(resource).to_numpy()
+        report["Findings"] = findings["Username"].value_counts().reindex(report["Username"]).fillna(0).astype(int).to_numpy()
+        return report
+
+def segregation_of_duties(effective_roles=None, roles_key=None):
+    """SoD section: conflicting-privilege rules over DBA_SYS_PRIVS / DBA_TAB_PRIVS uploads."""
+    st.header("⚖️ Segregation of Duties")
+    st.markdown("Upload **DBA_SYS_PRIVS** and/or **DBA_TAB_PRIVS** to check every grantee against the conflicting-privilege rule library. "
+                "Roles from the DBA_ROLE_PRIVS export above are expanded, so privileges held through a role count too.")
+    col1, col2 = st.columns(2)
+    with col1:
+        sys_file = st.file_uploader("📂 Upload ORACLE DBA_SYS_PRIVS", type=["xls", "xlsx"], key="sys_privs")
+    with col2:
+        tab_file = st.file_uploader("📂 Upload ORACLE DBA_TAB_PRIVS", type=["xls", "xlsx"], key="tab_privs")
+    rules_file = st.file_uploader("📂 Upload SoD rule library (optional: Rule, Side, Privilege, Conflict columns)",
+                                  type=["xls", "xlsx"], key="sod_rules")
+
+    try:
+        rules = sod_rules_from_frame(load_excel(rules_file)) if rules_file else SOD_RULES
+    except Exception as e:
+        st.error(f"Error loading SoD rule library: {str(e)}")
+        return
+    with st.expander("📚 SoD Rule Library"):
+        st.dataframe(pd.DataFrame([(rule, conflict, " ✕ ".join(", ".join(side) for side in sides))
+                                   for rule, conflict, sides in rules], columns=["Rule", "Conflict", "Sides"]),
+                     hide_index=True)
+    if not sys_file and not tab_file:
+        return
+
+    try:
+        sys_privs = load_excel(sys_file) if sys_file else None
+        tab_privs = load_excel(tab_file) if tab_file else None
+        key = content_digest("sod_conflicts", sys_file.getvalue() if sys_file else b"",
+                             tab_file.getvalue() if tab_file else b"",
+                             rules_file.getvalue() if rules_file else b"", roles_key or "")
+
+        def check():
+            grants = privilege_grants(sys_privs, tab_privs)
+            return grants, sod_conflicts(grants, rules, effective_roles)
+
+        grants, conflicts = get_shared_cache().get_or_compute(key, check)
+    except Exception as e:
+        st.error(f"Error checking segregation of duties: {str(e)}")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Grantees Checked", grants["Grantee"].nunique())
+    with col2:
+        st.metric("Rules", len(rules))
+    with col3:
+        st.metric("Grantees in Conflict", conflicts["Grantee"].nunique())
+
+    if conflicts.empty:
+        st.success("✅ No segregation-of-duties conflicts found")
+        return
+    st.error(f"🚨 {conflicts['Grantee'].nunique()} grantees hold conflicting privileges ({len(conflicts)} rule violations)")
+    by_rule = conflicts.groupby(["Rule", "Conflict"]).size().rename("Grantees").reset_index()
+    st.dataframe(by_rule, hide_index=True)
+    st.dataframe(conflicts, hide_index=True)
+    st.download_button(
+        label="📥 Download SoD Conflicts (CSV)",
+        data=lambda: conflicts.to_csv(index=False).encode("utf-8"),
+        file_name="sod_conflicts.csv",
+        mime="text/csv",
+        on_click="ignore"
+    )
+
 def database_privilege_users():
     st.title("🔑 Database Privilege Users")
     uploaded_file = st.file_uploader("📂 Upload ORACLE DBA_ROLE_PRIVS", type=["xlsx"], key="db_priv")
     st.markdown("""
                 """)
+    effective, roles_key = None, None
     if uploaded_file:
-        db_priv_df = pd.read_excel(uploaded_file)
+        db_priv_df = load_excel(uploaded_file)
 
         # Extract Unique Admin Options 
         unique_admin_names = db_priv_df['ADMIN OPTION'].unique()
@@ -1978,12 +5993,61 @@ def database_privilege_users():
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+        # Effective roles through role-to-role grants
+        st.header("🕸️ Effective Roles Through Nested Grants")
+        grantee_col = matching_column(db_priv_df, "GRANTEE")
+        role_col = matching_column(db_priv_df, "GRANTED_ROLE")
+        if grantee_col is None or role_col is None:
+            st.info("Nested grants need GRANTEE and GRANTED ROLE columns in the export.")
+        else:
+            roles_key = content_digest("resolve_role_grants", uploaded_file.getvalue())
+            effective = get_shared_cache().get_or_compute(
+                roles_key,
+                lambda: resolve_role_grants(db_priv_df, grantee_col, role_col, matching_column(db_priv_df, "ADMIN_OPTION"))
+            )
+            nested_powerful = effective[effective["Powerful"] & (effective["Depth"] > 1)]
+            admin_paths = effective[effective["Admin Path"]]
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Users", effective["Grantee"].nunique())
+            with col2:
+                st.metric("Powerful Roles via Nesting", nested_powerful["Grantee"].nunique())
+            with col3:
+                st.metric("Admin-Option Paths", len(admin_paths))
+
+            if not nested_powerful.empty:
+                st.error(f"🚨 {nested_powerful['Grantee'].nunique()} users hold powerful roles only visible through nested grants")
+                st.dataframe(nested_powerful, hide_index=True)
+            else:
+                st.success("✅ No powerful roles reached through nested grants")
+
+            if not admin_paths.empty:
+                st.warning(f"⚠️ {admin_paths['Grantee'].nunique()} users can re-grant roles through an admin-option grant on the path")
+                st.dataframe(admin_paths, hide_index=True)
+
+            selected_grantee = st.selectbox("🔎 Select a user to see effective roles", sorted(effective["Grantee"].unique()), key="effective_grantee")
+            st.dataframe(effective[effective["Grantee"] == selected_grantee], hide_index=True)
+
+            st.download_button(
+                label="📥 Download Effective Roles (CSV)",
+                data=lambda: effective.to_csv(index=False).encode("utf-8"),
+                file_name="effective_roles.csv",
+                mime="text/csv",
+                on_click="ignore"
+            )
+
+    segregation_of_duties(effective, roles_key)
+
 def database_profiles():
     st.title("🗂 Database Profiles")
-    uploaded_file = st.file_uploader("📂 Upload ORACLE_DBA_PROFILES", type=["xls", "xlsx"])
+    uploaded_files = st.file_uploader("📂 Upload ORACLE_DBA_PROFILES (one export per database)", type=["xls", "xlsx"],
+                                      accept_multiple_files=True)
 
-    if uploaded_file:
-        database_profile = pd.read_excel(uploaded_file)
+    if uploaded_files:
+        # File names are part of the key: stack_exports names databases after them
+        profiles_key = content_digest("dba_profiles", *(part for f in uploaded_files for part in (f.name, f.getvalue())))
+        database_profile = get_shared_cache().get_or_compute(profiles_key, lambda: stack_exports(uploaded_files))
 
         # 🎯 Extract Unique Resource Names
         unique_resource_names = database_profile['RESOURCE NAME'].unique()
@@ -2015,6 +6079,280 @@ def database_profiles():
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+        password_policy_compliance(database_profile, profiles_key)
+
+def password_policy_compliance(database_profile, profiles_key):
+    """Profiles scored against the password baseline, optionally joined to DBA_USERS."""
+    st.header("🛡️ Password Policy Compliance")
+    with st.expander("⚙️ Password Policy Baseline"):
+        st.caption("Limits set to DEFAULT take the DEFAULT profile's value from the same database. "
+                   "UNLIMITED fails every numeric check.")
+        baseline = {}
+        col1, col2 = st.columns(2)
+        for i, (resource, (test, value, weight)) in enumerate(PASSWORD_POLICY_BASELINE.items()):
+            with (col1 if i % 2 == 0 else col2):
+                if test == "set":
+                    required = st.checkbox(f"{resource} required", value=True, key=f"baseline_{resource}")
+                    if required:
+                        baseline[resource] = (test, value, weight)
+                else:
+                    label = f"{resource} {'at most' if test == 'max' else 'at least'}"
+                    baseline[resource] = (test, st.number_input(label, min_value=0, value=value, step=1, key=f"baseline_{resource}"), weight)
+
+    try:
+        limits = get_shared_cache().get_or_compute(content_digest("profile_limits", profiles_key),
+                                                   lambda: resolve_profile_limits(database_profile, "Database"))
+        passed, scores = get_shared_cache().get_or_compute(
+            content_digest("password_policy", profiles_key, sorted(baseline.items())),
+            lambda: evaluate_password_policy(limits, baseline)
+        )
+    except Exception as e:
+        st.error(f"Error evaluating password policy: {str(e)}")
+        return
+
+    levels = scores["Level"].value_counts()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Databases", limits.index.get_level_values("Database").nunique())
+    with col2:
+        st.metric("Profiles", len(limits))
+    with col3:
+        st.metric("Compliant", int(levels.get("Compliant", 0)))
+    with col4:
+        st.metric("Average Score", f"{scores['Score'].mean():.1f}")
+
+    non_compliant = int(levels.get("Non-Compliant", 0))
+    if non_compliant:
+        st.error(f"🚨 {non_compliant} profiles are non-compliant with the password baseline")
+    else:
+        st.success("✅ No non-compliant profiles")
+
+    scorecard = scores.join(passed.replace({1.0: "✅", 0.0: "❌"})).reset_index().sort_values("Score", kind="stable")
+    page, page_size, _ = page_controls(len(scorecard), "policy_profiles")
+    page_df = scorecard.iloc[(page - 1) * page_size:page * page_size]
+    st.dataframe(page_df, hide_index=True)
+    st.caption(page_caption(page, page_size, len(page_df), len(scorecard), "profiles"))
+    with st.expander("🧮 Effective Limits (DEFAULT resolved)"):
+        st.dataframe(limits.reset_index(), hide_index=True)
+
+    # Effective policy per user
+    st.subheader("👤 Effective Policy per User")
+    users_files = st.file_uploader("📂 Upload ORACLE DBA_USERS to attach each user's effective policy (one export per database)",
+                                   type=["xls", "xlsx"], accept_multiple_files=True, key="policy_users")
+    user_policy = None
+    if users_files:
+        try:
+            users_key = content_digest("dba_users", *(part for f in users_files for part in (f.name, f.getvalue())))
+            user_policy = get_shared_cache().get_or_compute(
+                content_digest("user_password_policy", users_key, profiles_key, sorted(baseline.items())),
+                lambda: user_password_policy(stack_exports(users_files), limits, scores, "Database")
+            )
+        except Exception as e:
+            st.error(f"Error joining users to profiles: {str(e)}")
+        if user_policy is not None:
+            st.dataframe(user_policy["Level"].value_counts(dropna=False).rename_axis("Level").reset_index(name="Users"), hide_index=True)
+            unmatched = user_policy["Score"].isna().sum()
+            if unmatched:
+                st.warning(f"⚠️ {unmatched} users have a profile missing from the uploaded DBA_PROFILES")
+            rows = user_policy[user_policy["Level"] != "Compliant"]
+            page, page_size, _ = page_controls(len(rows), "policy_users_table")
+            page_df = rows.iloc[(page - 1) * page_size:page * page_size]
+            st.dataframe(page_df, hide_index=True)
+            st.caption(page_caption(page, page_size, len(page_df), len(rows), f"users not on a compliant profile ({len(user_policy):,} total)"))
+
+    st.download_button(
+        label="📥 Download Password Policy Report",
+        data=lambda: excel_workbook([("Profiles", scorecard), ("Effective Limits", limits.reset_index())]
+                                    + ([("Users", user_policy)] if user_policy is not None else [])),
+        file_name="Password_Policy_Compliance.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+
+def oracle_account_model():
+    st.title("🧩 Oracle Account Model")
+    st.markdown("""
+    Loads **DBA_USERS**, **DBA_ROLE_PRIVS** and **DBA_PROFILES** once into one account model keyed by user, role
+    and profile, then runs checks that need all three at once, such as an open account holding DBA on a
+    profile whose password never expires. Role and profile exports are optional; checks that need them are skipped.
+    """)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        users_file = st.file_uploader("📂 Upload ORACLE DBA_USERS", type=["xls", "xlsx"], key="model_users")
+    with col2:
+        roles_file = st.file_uploader("📂 Upload ORACLE DBA_ROLE_PRIVS", type=["xls", "xlsx"], key="model_role_privs")
+    with col3:
+        profiles_file = st.file_uploader("📂 Upload ORACLE DBA_PROFILES", type=["xls", "xlsx"], key="model_profiles")
+    if not users_file:
+        st.info("Upload a DBA_USERS export to build the account model.")
+        return
+
+    try:
+        model_key = content_digest("oracle_account_model", *(f.getvalue() if f else b"" for f in (users_file, roles_file, profiles_file)))
+        model = get_shared_cache().get_or_compute(model_key, lambda: OracleAccountModel(
+            load_excel(users_file),
+            load_excel(roles_file) if roles_file else None,
+            load_excel(profiles_file) if profiles_file else None
+        ))
+        findings = get_shared_cache().get_or_compute(content_digest("account_model_findings", model_key), model.findings)
+    except Exception as e:
+        st.error(f"Error building the account model: {str(e)}")
+        return
+    register_identity_source("Oracle DBA_USERS", "account", model.users.index.to_series(), users_file.getvalue())
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Users", len(model.users))
+    with col2:
+        st.metric("Effective Role Grants", len(model.grants))
+    with col3:
+        st.metric("Profiles", 0 if model.profiles is None else len(model.profiles))
+    with col4:
+        st.metric("Findings", len(findings))
+
+    if findings.empty:
+        st.success("✅ No cross-cutting account findings")
+    else:
+        by_rule = findings.groupby(["Severity", "Rule", "Check"], observed=True).size().rename("Accounts").reset_index()
+        st.dataframe(by_rule, hide_index=True)
+        critical = findings["Severity"].isin(["Critical", "High"]).sum()
+        if critical:
+            st.error(f"🚨 {critical} critical/high findings across {findings['Username'].nunique()} accounts")
+        rules = st.multiselect("Rule", list(by_rule["Rule"]), key="model_rules")
+        rows = findings[findings["Rule"].isin(rules)] if rules else findings
+        page, page_size, _ = page_controls(len(rows), "model_findings")
+        page_df = rows.iloc[(page - 1) * page_size:page * page_size]
+        st.dataframe(page_df, hide_index=True)
+        st.caption(page_caption(page, page_size, len(page_df), len(rows), "findings"))
+
+    st.subheader("🔎 Account Lookup")
+    username = st.text_input("Username", key="model_lookup").strip().upper()
+    if username:
+        if username not in model.users.index:
+            st.warning(f"⚠️ {username} is not in DBA_USERS")
+        else:
+            st.dataframe(model.users.loc[[username], ["Status", "Profile"]])
+            st.dataframe(model.grants[model.grants["Grantee"] == username].drop(columns="User"), hide_index=True)
+            if model.profiles is not None and model.users.at[username, "Profile"] in model.profiles.index:
+                st.dataframe(model.profiles.loc[[model.users.at[username, "Profile"]]])
+            st.dataframe(findings[findings["Username"] == username], hide_index=True)
+
+    st.download_button(
+        label="📥 Download Combined Account Report",
+        data=lambda: excel_workbook([
+            ("Findings", findings),
+            ("Users", model.user_report(findings)),
+        ] + ([("Profiles", model.profiles.reset_index())] if model.profiles is not None else [])),
+        file_name="Oracle_Account_Model.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+
+def database_fleet_audit():
+    st.title("🛰️ Database Fleet Audit")
+    st.markdown("""
+    Runs the **Database Groups** check suite over every instance of an audit at once. Upload a ZIP of
+    per-instance **DBA_USERS** exports (or point at a folder of them); each workbook is one instance, named
+    after its file (`PROD1_dba_users.xlsx` → `PROD1`). One column mapping profile applies to every export.
+    """)
+    fleet_zip = st.file_uploader("📦 Upload a ZIP of DBA_USERS exports (one workbook per instance)", type=["zip"], key="fleet_zip")
+    folder = data_path_input(f"📁 Or read every workbook under a folder in {DATA_ROOT}", "fleet_folder") if DATA_ROOT else ""
+
+    with st.expander("🗺️ Column Mapping Profile"):
+        st.caption("Column names used in every export; blank fields fall back to the Oracle default name. "
+                   "Save the profile to reuse it next audit.")
+        mapping_file = st.file_uploader("📂 Load a saved mapping profile (.json)", type=["json"], key="fleet_mapping_file")
+        if mapping_file:
+            mapping_digest = content_digest(mapping_file.getvalue())
+            if st.session_state.get("fleet_mapping_loaded") != mapping_digest:
+                try:
+                    saved = json.loads(mapping_file.getvalue())
+                    for field, _, _ in FLEET_FIELDS:
+                        st.session_state[f"fleet_map_{field}"] = str(saved.get(field, ""))
+                    st.session_state["fleet_mapping_loaded"] = mapping_digest
+                except Exception as e:
+                    st.error(f"Error loading mapping profile: {str(e)}")
+        mapping = {}
+        for col, (field, label, default) in zip(st.columns(len(FLEET_FIELDS)), FLEET_FIELDS):
+            with col:
+                mapping[field] = st.text_input(label, placeholder=default, key=f"fleet_map_{field}").strip()
+        st.download_button(
+            label="💾 Save Mapping Profile",
+            data=json.dumps(mapping, indent=2),
+            file_name="dba_users_mapping.json",
+            mime="application/json",
+            on_click="ignore"
+        )
+
+    try:
+        if fleet_zip:
+            exports = fleet_exports_from_zip(fleet_zip.getvalue())
+        elif folder:
+            if not os.path.isdir(folder):
+                st.error(f"Folder not found: {folder}")
+                return
+            exports = fleet_exports_from_folder(folder)
+        else:
+            st.info("Upload a ZIP of exports" + (" or enter a folder" if DATA_ROOT else "") + " to audit the fleet.")
+            return
+    except Exception as e:
+        st.error(f"Error reading exports: {str(e)}")
+        return
+    if not exports:
+        st.warning("⚠️ No .xls/.xlsx exports found")
+        return
+    st.success(f"✅ Found {len(exports)} instance exports")
+
+    # Keyed on file fingerprints; the exports themselves are read inside the job
+    fleet_key = content_digest("fleet_dba_checks", json.dumps(mapping, sort_keys=True),
+                               *(part for instance, fingerprint, _ in exports for part in (instance, *fingerprint)))
+    result = ensure_job("fleet_audit", fleet_key, f"Fleet audit ({len(exports)} instances)", run_fleet_dba_checks,
+                        [(instance, read) for instance, _, read in exports], mapping)
+    if result is None:
+        return
+    rollup, findings, failures = result
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Instances", len(rollup))
+    with col2:
+        st.metric("Users", int(rollup["Users"].sum()))
+    with col3:
+        st.metric("Findings", len(findings))
+    with col4:
+        st.metric("Failed Exports", len(failures))
+
+    if not failures.empty:
+        st.error(f"❌ {len(failures)} exports could not be checked")
+        st.dataframe(failures, hide_index=True)
+    unmapped = rollup[rollup["Unmapped"] != ""]
+    if not unmapped.empty:
+        st.warning(f"⚠️ {len(unmapped)} instances are missing mapped columns; their checks were skipped. Adjust the column mapping profile.")
+
+    st.subheader("📊 Fleet Rollup")
+    page, page_size, _ = page_controls(len(rollup), "fleet_rollup", default_size=50)
+    page_df = rollup.iloc[(page - 1) * page_size:page * page_size]
+    st.dataframe(page_df, hide_index=True)
+    st.caption(page_caption(page, page_size, len(page_df), len(rollup), "instances"))
+
+    if not findings.empty:
+        st.subheader("🧾 Most Common Findings")
+        common = (findings.groupby(["Rule", "Severity", "Check"], observed=True)
+                  .agg(Instances=("Instance", "nunique"), Affected=("Count", "sum"))
+                  .reset_index().sort_values(["Instances", "Severity"], ascending=[False, True], kind="stable"))
+        st.dataframe(common, hide_index=True)
+
+        selected_instance = st.selectbox("🔎 Findings for instance", list(rollup["Instance"]), key="fleet_instance")
+        st.dataframe(findings[findings["Instance"] == selected_instance], hide_index=True)
+
+    st.download_button(
+        label="📥 Download Fleet Report",
+        data=lambda: excel_workbook([("Fleet Rollup", rollup), ("Findings", findings), ("Failures", failures)]),
+        file_name="Database_Fleet_Audit.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+
 # =============================================================================
 # MAIN APPLICATION ROUTING
 # =============================================================================
@@ -2023,6 +6361,9 @@ def main():
     # Main title
     st.title("🔐 Your-IT-Auditor")
     st.markdown("---")
+    render_cache_stats()
+    profiler = diagnostics_profiler()
+    _current_profiler.set(profiler)
     
     # Route to appropriate page based on selection
     if main_category == "🔐 Network Security":
@@ -2035,12 +6376,22 @@ def main():
             iam_main_page()
         elif page == "🔁 Duplicate User Provisioning":
             duplicate_user_provisioning()
+        elif page == "🧬 Identity Resolution":
+            identity_resolution()
         elif page == "📂 Database Groups":
             database_groups()
+        elif page == "🛰️ Database Fleet Audit":
+            database_fleet_audit()
         elif page == "🔑 Database Privilege Users":
             database_privilege_users()
         elif page == "🗂 Database Profiles":
             database_profiles()
+        elif page == "🧩 Oracle Account Model":
+            oracle_account_model()
+
+    if profiler is not None:
+        render_diagnostics(profiler)
+        render_session_memory()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,545 @@
+"""Synthetic benchmark suite for Your-IT-Auditor.
+
+Generates realistic inputs (IOS configs, HR leaver lists, system user exports
+and Oracle DBA_* sheets) at several size tiers and times the audit engines and
+report generators against them, reporting throughput and peak memory.
+
+    python benchmark.py                      # all tiers
+    python benchmark.py --tiers small medium --seed 7 --json bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+import streamlit.logger
+
+# app.py renders its sidebar on import; keep bare-mode ScriptRunContext warnings out of the results
+streamlit.logger.set_log_level("error")
+import app
+streamlit.logger.set_log_level("error")
+
+# =============================================================================
+# SIZE TIERS
+# =============================================================================
+
+TIERS = {
+    "small": dict(devices=5, interfaces=24, acl_lines=20, system_users=500, leavers=25, db_users=200, fleet=1000),
+    "medium": dict(devices=25, interfaces=96, acl_lines=200, system_users=5000, leavers=100, db_users=5000, fleet=10000),
+    "large": dict(devices=100, interfaces=384, acl_lines=2000, system_users=20000, leavers=250, db_users=50000, fleet=50000),
+}
+
+FIRST_NAMES = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "william", "elizabeth",
+               "david", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "kwame", "ama",
+               "kofi", "akosua", "yaw", "abena", "kojo", "efua", "nana", "esi", "kwabena", "adwoa"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "mensah", "owusu",
+              "boateng", "asante", "osei", "appiah", "addo", "tetteh", "quaye", "danso", "agyeman", "darko"]
+
+# =============================================================================
+# SYNTHETIC GENERATORS
+# =============================================================================
+
+MIXED_VENDORS = ["ios", "nxos", "eos", "junos", "junos_hier", "fortios"]
+
+# Secure/insecure line pairs; insecure_ratio picks which one each device gets
+IOS_GLOBAL_CONTROLS = [
+    ("service password-encryption", None),
+    ("aaa new-model", None),
+    ("ip ssh version 2", None),
+    ("ip dhcp snooping", None),
+    ("ip arp inspection vlan 10-20", None),
+    ("logging host 10.0.0.5", None),
+    ("ntp server 10.0.0.1", None),
+    ("snmp-server group NETOPS v3 priv", "snmp-server community public RO"),
+    ("archive", None),
+    ("spanning-tree mode rapid-pvst", None),
+    (None, "ip http server"),
+    (None, "ip ftp username backup"),
+    ("username admin secret 5 $1$abcd$efgh", "username admin password 7 0822455D0A16"),
+]
+
+
+def generate_ios_config(rng, hostname, interfaces=24, acl_lines=20, insecure_ratio=0.3):
+    """Return an IOS-style running config with a controllable share of insecure settings."""
+    lines = ["!", f"hostname {hostname}", "!"]
+    for secure, insecure in IOS_GLOBAL_CONTROLS:
+        line = insecure if rng.random() < insecure_ratio else secure
+        if line:
+            lines.append(line)
+    lines.append("!")
+
+    for i in range(interfaces):
+        lines.append(f"interface GigabitEthernet1/0/{i + 1}")
+        lines.append(f" description {rng.choice(['USER', 'PRINTER', 'AP', 'UPLINK', 'CAMERA'])}-{i + 1}")
+        if rng.random() < 0.1:
+            lines.append(" switchport mode trunk")
+            native = 1 if rng.random() < insecure_ratio else rng.randint(2, 999)
+            lines.append(f" switchport trunk native vlan {native}")
+        else:
+            lines.append(" switchport mode access")
+            lines.append(f" switchport access vlan {rng.randint(10, 20)}")
+            if rng.random() >= insecure_ratio:
+                lines.append(" switchport port-security")
+                lines.append(" switchport port-security maximum 2")
+            if rng.random() >= insecure_ratio:
+                lines.append(" storm-control broadcast level 5.00")
+        if rng.random() < 0.2:
+            lines.append(" shutdown")
+        lines.append("!")
+
+    lines.append("ip access-list extended EDGE-IN")
+    for i in range(acl_lines):
+        action = "deny" if rng.random() < 0.2 else "permit"
+        lines.append(f" {i * 10 + 10} {action} tcp 10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.0 0.0.0.255 any eq {rng.choice([22, 80, 443, 3389, 8080])}")
+    lines.append("!")
+
+    lines.append("line vty 0 4")
+    lines.append(" transport input telnet ssh" if rng.random() < insecure_ratio else " transport input ssh")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+
+def generate_junos_set_lines(rng, hostname, interfaces=24, acl_lines=20, insecure_ratio=0.3):
+    lines = ["set version 21.4R3", f"set system host-name {hostname}", "set system services ssh",
+             "set system syslog host 10.0.0.5 any any", "set system ntp server 10.0.0.1"]
+    if rng.random() < insecure_ratio:
+        lines.append("set system services telnet")
+    if rng.random() < insecure_ratio:
+        lines.append("set snmp community public authorization read-only")
+    for i in range(interfaces):
+        name = f"ge-0/0/{i}"
+        lines.append(f"set interfaces {name} description PORT-{i}")
+        lines.append(f"set interfaces {name} unit 0 family ethernet-switching vlan members V{rng.randint(10, 20)}")
+        if rng.random() < 0.2:
+            lines.append(f"set interfaces {name} disable")
+    for i in range(acl_lines):
+        lines.append(f"set firewall family inet filter EDGE-IN term T{i} from source-address 10.{rng.randint(0, 255)}.0.0/16")
+        lines.append(f"set firewall family inet filter EDGE-IN term T{i} then {rng.choice(['accept', 'discard'])}")
+    return lines
+
+
+def render_junos_hierarchy(set_lines):
+    """Render 'set' lines as a brace-style Junos config."""
+    tree = {}
+    for line in set_lines:
+        words = line.split()[1:]
+        node = tree
+        for word in words[:-2]:
+            node = node.setdefault(word, {})
+        node.setdefault(" ".join(words[-2:]), None)
+
+    out = []
+
+    def walk(node, depth):
+        for key, child in node.items():
+            if child is None:
+                out.append("    " * depth + f"{key};")
+            else:
+                out.append("    " * depth + f"{key} {{")
+                walk(child, depth + 1)
+                out.append("    " * depth + "}")
+
+    walk(tree, 0)
+    return out
+
+
+def generate_fortios_config(rng, hostname, interfaces=24, acl_lines=20, insecure_ratio=0.3):
+    lines = ["#config-version=FGT60F-7.2.5-FW-build1517:opmode=0:vdom=0:user=admin",
+             "config system global", f'    set hostname "{hostname}"']
+    if rng.random() < insecure_ratio:
+        lines.append("    set strong-crypto disable")
+    lines += ["end", "config system interface"]
+    for i in range(interfaces):
+        access = "ping https ssh http telnet" if rng.random() < insecure_ratio else "ping https ssh"
+        lines += [f'    edit "port{i + 1}"', f"        set allowaccess {access}"]
+        if rng.random() < 0.2:
+            lines.append("        set status down")
+        lines.append("    next")
+    lines += ["end", "config firewall policy"]
+    for i in range(acl_lines):
+        lines += [f"    edit {i + 1}", '        set srcintf "internal"', '        set dstintf "wan1"',
+                  f'        set action {rng.choice(["accept", "deny"])}', "    next"]
+    lines += ["end", "config log syslogd setting", "    set status enable", "end"]
+    return "\n".join(lines) + "\n"
+
+
+VENDOR_HEADERS = {
+    "nxos": "!Command: show running-config\nfeature interface-vlan\nfeature lacp\n",
+    "eos": "! Command: show running-config\n! device: leaf (DCS-7050SX3, EOS-4.28.3M)\n",
+}
+
+
+def generate_vendor_config(rng, vendor, hostname, interfaces=24, acl_lines=20, insecure_ratio=0.3):
+    """Return a config in the given CONFIG_VENDORS syntax (NX-OS/EOS reuse the IOS-style body)."""
+    if vendor == "fortios":
+        return generate_fortios_config(rng, hostname, interfaces, acl_lines, insecure_ratio)
+    if vendor in ("junos", "junos_hier"):
+        lines = generate_junos_set_lines(rng, hostname, interfaces, acl_lines, insecure_ratio)
+        if vendor == "junos_hier":
+            lines = render_junos_hierarchy(lines)
+        return "\n".join(lines) + "\n"
+    return VENDOR_HEADERS.get(vendor, "") + generate_ios_config(rng, hostname, interfaces, acl_lines, insecure_ratio)
+
+
+def generate_person(rng):
+    return f"{rng.choice(FIRST_NAMES).title()} {rng.choice(LAST_NAMES).title()}"
+
+
+def add_typo(rng, name):
+    """Apply one random edit (swap, drop, duplicate or replace) to a name."""
+    if len(name) < 3:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    edit = rng.choice(["swap", "drop", "double", "replace"])
+    if edit == "swap":
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if edit == "drop":
+        return name[:i] + name[i + 1:]
+    if edit == "double":
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+
+
+def generate_iam_inputs(rng, system_users=500, leavers=25, typo_rate=0.2):
+    """Return (system_users_df, leaver_names); some leavers are typo'd copies of real accounts."""
+    people = [generate_person(rng) for _ in range(system_users)]
+    users_df = pd.DataFrame({
+        "Full Name": people,
+        "User ID": [f"U{i:06d}" for i in range(system_users)],
+        "Department": [rng.choice(["Finance", "IT", "HR", "Operations", "Sales"]) for _ in range(system_users)],
+        "Status": [rng.choice(["Active", "Active", "Active", "Disabled"]) for _ in range(system_users)],
+    })
+    leaver_names = []
+    for name in rng.sample(people, min(leavers, system_users)):
+        leaver_names.append(add_typo(rng, name) if rng.random() < typo_rate else name)
+    return users_df, leaver_names
+
+
+def generate_system_accounts(rng, accounts=500, systems=3, overlap=0.6, variant_rate=0.3):
+    """Return [(system name, Series of logins)]; shared people get DOMAIN\\, dotted, upper-case or typo'd spellings."""
+    people = [f"{rng.choice(FIRST_NAMES)[0]}{rng.choice(LAST_NAMES)}{rng.randint(0, 99)}" for _ in range(accounts)]
+
+    def spell(login):
+        if rng.random() >= variant_rate:
+            return login
+        variant = rng.choice(["domain", "dotted", "upper", "typo"])
+        if variant == "domain":
+            return f"CORP\\{login}"
+        if variant == "dotted":
+            return f"{login[0]}.{login[1:]}"
+        if variant == "upper":
+            return login.upper()
+        return add_typo(rng, login)
+
+    return [
+        (f"system{s}", pd.Series([spell(login) for login in people if rng.random() < overlap]))
+        for s in range(systems)
+    ]
+
+
+def oracle_date(dt):
+    return dt.strftime("%d-%b-%y").upper()
+
+
+def generate_dba_users(rng, rows=200, default_ratio=0.05):
+    """Return a DBA_USERS export with Oracle-style DD-MON-YY dates."""
+    now = datetime.now()
+    profiles = ["DEFAULT", "APP_USER", "APP_USER", "REPORTING", "DBA_PROFILE", "SERVICE_ACCOUNT", "MONITORING"]
+    default_users = sorted(app.DEFAULT_DB_USERS)
+    records = []
+    for i in range(rows):
+        if rng.random() < default_ratio:
+            username = rng.choice(default_users)
+        else:
+            username = f"{rng.choice(FIRST_NAMES)[0]}{rng.choice(LAST_NAMES)}{i}".upper()
+        created = now - timedelta(days=rng.randint(1, 3650))
+        last_login = created + timedelta(days=rng.randint(0, max(1, (now - created).days)))
+        records.append({
+            "USERNAME": username,
+            "ACCOUNT_STATUS": rng.choice(["OPEN", "OPEN", "OPEN", "LOCKED", "EXPIRED & LOCKED", "EXPIRED(GRACE)"]),
+            "PROFILE": rng.choice(profiles),
+            "CREATED": oracle_date(created),
+            "EXPIRY_DATE": oracle_date(now + timedelta(days=rng.randint(-200, 200))) if rng.random() < 0.7 else "",
+            "LAST_LOGIN": oracle_date(last_login) if rng.random() < 0.9 else "",
+            "PASSWORD_VERSIONS": rng.choice(["11G 12C", "12C", "10G 11G", "10G", "11G"]),
+        })
+    return pd.DataFrame(records)
+
+
+def generate_role_privs(rng, usernames, roles=40, grants_per_user=3, nesting=0.3):
+    """Return a DBA_ROLE_PRIVS export, including role-to-role grants."""
+    role_names = ["DBA", "CONNECT", "RESOURCE", "SELECT_CATALOG_ROLE"] + [f"APP_ROLE_{i}" for i in range(roles)]
+    rows = []
+    for user in usernames:
+        for role in rng.sample(role_names, min(grants_per_user, len(role_names))):
+            rows.append((user, role, "YES" if rng.random() < 0.05 else "NO"))
+    for role in role_names[4:]:
+        if rng.random() < nesting:
+            rows.append((role, rng.choice(role_names), "YES" if rng.random() < 0.1 else "NO"))
+    return pd.DataFrame(rows, columns=["GRANTEE", "GRANTED ROLE", "ADMIN OPTION"])
+
+
+SYSTEM_PRIVILEGES = ["CREATE SESSION", "CREATE TABLE", "CREATE VIEW", "CREATE PROCEDURE", "CREATE USER", "ALTER USER",
+                     "GRANT ANY ROLE", "GRANT ANY PRIVILEGE", "SELECT ANY TABLE", "UPDATE ANY TABLE", "DELETE ANY TABLE",
+                     "AUDIT SYSTEM", "ALTER SYSTEM", "BECOME USER", "CREATE ANY PROCEDURE", "ALTER ANY TABLE"]
+
+
+def generate_privileges(rng, grantees, sys_per_grantee=4, tab_per_grantee=20, tables=2000):
+    """Return DBA_SYS_PRIVS and DBA_TAB_PRIVS exports; powerful system privileges are rare."""
+    weights = [20, 5, 5, 5] + [1] * (len(SYSTEM_PRIVILEGES) - 4)
+    sys_rows, tab_rows = [], []
+    for grantee in grantees:
+        for privilege in set(rng.choices(SYSTEM_PRIVILEGES, weights, k=sys_per_grantee)):
+            sys_rows.append((grantee, privilege, "NO"))
+        for _ in range(tab_per_grantee):
+            tab_rows.append((grantee, "APP", f"TABLE_{rng.randrange(tables)}", rng.choice(["SELECT", "INSERT", "UPDATE", "DELETE"]), "NO"))
+    return (pd.DataFrame(sys_rows, columns=["GRANTEE", "PRIVILEGE", "ADMIN_OPTION"]),
+            pd.DataFrame(tab_rows, columns=["GRANTEE", "OWNER", "TABLE_NAME", "PRIVILEGE", "GRANTABLE"]))
+
+
+PROFILE_RESOURCES = [
+    ("FAILED_LOGIN_ATTEMPTS", "PASSWORD", ["3", "5", "10", "UNLIMITED"]),
+    ("PASSWORD_LIFE_TIME", "PASSWORD", ["60", "90", "180", "UNLIMITED"]),
+    ("PASSWORD_REUSE_MAX", "PASSWORD", ["5", "10", "UNLIMITED"]),
+    ("PASSWORD_LOCK_TIME", "PASSWORD", ["1", "0.0208", "UNLIMITED"]),
+    ("PASSWORD_GRACE_TIME", "PASSWORD", ["7", "UNLIMITED"]),
+    ("PASSWORD_VERIFY_FUNCTION", "PASSWORD", ["ORA12C_VERIFY_FUNCTION", "NULL"]),
+    ("SESSIONS_PER_USER", "KERNEL", ["2", "10", "UNLIMITED"]),
+    ("IDLE_TIME", "KERNEL", ["15", "30", "UNLIMITED"]),
+]
+
+
+def generate_profiles(rng, profiles=10):
+    """Return a DBA_PROFILES export; non-DEFAULT profiles inherit some limits with 'DEFAULT'."""
+    names = ["DEFAULT"] + [f"PROFILE_{i}" for i in range(1, profiles)]
+    rows = []
+    for name in names:
+        for resource, resource_type, limits in PROFILE_RESOURCES:
+            limit = rng.choice(limits)
+            if name != "DEFAULT" and rng.random() < 0.3:
+                limit = "DEFAULT"
+            rows.append((name, resource, resource_type, limit))
+    return pd.DataFrame(rows, columns=["PROFILE", "RESOURCE NAME", "RESOURCE_TYPE", "LIMIT"])
+
+
+def to_xlsx_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+# =============================================================================
+# TIMING HARNESS
+# =============================================================================
+
+def measure(name, fn, items, unit, repeat=1):
+    """Run fn 'repeat' times; return best wall time, throughput and tracemalloc peak."""
+    best = None
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "benchmark": name,
+        "items": items,
+        "unit": unit,
+        "seconds": round(best, 4),
+        "throughput": round(items / best, 1) if best else None,
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }, result
+
+
+def generate_fleet_findings(rng, devices=1000):
+    """Return a findings table for a large fleet, sampling each device's findings from all rule packs."""
+    rules = [rule for vendor in app.CONFIG_VENDORS.values() for rule in vendor["rules"]]
+    rows = []
+    for i in range(devices):
+        for rule in rng.sample(rules, rng.randint(0, 12)):
+            rows.append(app.config_finding(rule, f"dev{i:06d}"))
+    return pd.DataFrame(rows, columns=["Finding", "File", "RiskDesc", "Recommendation", "Category"])
+
+
+def build_report_inputs(results):
+    """Mirror the Config Audit page's dataframe/summary preparation."""
+    df = pd.DataFrame(results, columns=["Finding", "File", "RiskDesc", "Recommendation", "Category"])
+    summary_df = app.score_devices(df)
+    return summary_df, df, summary_df["Risk Score"].value_counts().to_dict(), df["Category"].value_counts().to_dict()
+
+
+def run_tier(tier, params, rng, repeat=1):
+    rows = []
+
+    # Network config audit
+    configs = [(f"sw{i:03d}.txt", generate_ios_config(rng, f"sw{i:03d}", params["interfaces"], params["acl_lines"], rng.uniform(0.1, 0.6)))
+               for i in range(params["devices"])]
+    total_lines = sum(text.count("\n") for _, text in configs)
+    row, results = measure("audit_config", lambda: [f for name, text in configs for f in app.audit_config(name, text)],
+                           total_lines, "lines", repeat)
+    rows.append(row)
+    rows.append(measure("audit_interfaces", lambda: [app.audit_interfaces(text) for name, text in configs],
+                        params["devices"] * params["interfaces"], "ports", repeat)[0])
+
+    # Same device count across all supported platforms: detection + dispatch overhead
+    mixed = [(f"dev{i:03d}.txt", generate_vendor_config(rng, rng.choice(MIXED_VENDORS), f"dev{i:03d}", params["interfaces"],
+                                                        params["acl_lines"], rng.uniform(0.1, 0.6)))
+             for i in range(params["devices"])]
+    rows.append(measure("audit_config (mixed vendors)", lambda: [f for name, text in mixed for f in app.audit_config(name, text)],
+                        len(mixed), "devices", repeat)[0])
+    with tempfile.TemporaryDirectory() as directory:
+        for name, text in configs:
+            with open(os.path.join(directory, name), "w") as fh:
+                fh.write(text)
+        rows.append(measure("audit_config_directory (mmap)", lambda: app.audit_config_directory(directory),
+                            total_lines, "lines", repeat)[0])
+    rows.append(measure("audit_config (IOS devices)", lambda: [f for name, text in configs for f in app.audit_config(name, text)],
+                        len(configs), "devices", repeat)[0])
+
+    summary_df, df, risk_counts, category_counts = build_report_inputs(results)
+    rows.append(measure("generate_heatmap_figure", lambda: app.generate_heatmap_figure(df), len(df), "findings", repeat)[0])
+    rows.append(measure("generate_pdf_report", lambda: app.generate_pdf_report(summary_df, df, risk_counts, category_counts),
+                        len(df), "findings", repeat)[0])
+    rows.append(measure("generate_word_report", lambda: app.generate_word_report(summary_df, df, risk_counts, category_counts),
+                        len(df), "findings", repeat)[0])
+
+    fleet = generate_fleet_findings(rng, params["fleet"])
+    rows.append(measure("score_devices", lambda: app.score_devices(fleet), params["fleet"], "devices", repeat)[0])
+    fleet_results = [finding + (None, "") for finding in fleet.itertuples(index=False, name=None)]
+    row, table = measure("build_findings_table", lambda: app.build_findings_table(fleet_results), len(fleet_results), "findings", repeat)
+    rows.append(row)
+    rows.append(measure(
+        "query_findings (filter + sort)",
+        lambda: app.query_findings(table, "dev00", ["Logging", "AAA"], ["Medium"], sort_by="File", descending=True),
+        len(table), "findings", repeat
+    )[0])
+
+    # IAM leaver matching
+    users_df, leavers = generate_iam_inputs(rng, params["system_users"], params["leavers"])
+    rows.append(measure("find_matching_rows", lambda: app.find_matching_rows(users_df, "Full Name", leavers),
+                        len(leavers) * len(users_df), "comparisons", repeat)[0])
+    candidates = app.score_match_candidates(users_df, "Full Name", leavers)
+    rows.append(measure("filter_matches (re-threshold)",
+                        lambda: app.filter_matches(users_df, "Full Name", candidates, "Jaro-Winkler", 85),
+                        len(candidates), "candidates", repeat)[0])
+    rows.append(measure("match_index (re-threshold, index only)",
+                        lambda: app.match_index(users_df, "Full Name", candidates, "Jaro-Winkler", 85),
+                        len(candidates), "candidates", repeat)[0])
+
+    systems = generate_system_accounts(rng, params["system_users"])
+    total = sum(len(accounts) for _, accounts in systems)
+    rows.append(measure("find_duplicate_accounts", lambda: app.find_duplicate_accounts(systems), total, "accounts", repeat)[0])
+
+    def build_identity_graph():
+        graph = app.IdentityGraph()
+        graph.add_source("HR roster", "person", users_df["Full Name"], "roster")
+        graph.add_source("Leavers", "leaver", pd.Series(leavers), "leavers")
+        for name, accounts in systems:
+            graph.add_source(name, "account", accounts, name)
+        return graph.leaver_accounts(), graph.orphan_accounts(), graph.duplicate_accounts()
+
+    rows.append(measure("identity graph (build + lookups)", build_identity_graph,
+                        len(users_df) + len(leavers) + total, "records", repeat)[0])
+
+    # Oracle DBA_* sheets
+    db_users = generate_dba_users(rng, params["db_users"])
+    role_privs = generate_role_privs(rng, db_users["USERNAME"].tolist())
+    profiles = generate_profiles(rng)
+    for sheet, frame in [("DBA_USERS", db_users), ("DBA_ROLE_PRIVS", role_privs), ("DBA_PROFILES", profiles)]:
+        raw = to_xlsx_bytes(frame)
+        rows.append(measure(f"read_excel: {sheet}", lambda: app.read_excel_bytes(raw), len(frame), "rows", repeat)[0])
+
+    exports = [(f"DB{i}", to_xlsx_bytes(generate_dba_users(rng, params["db_users"] // 10)))
+               for i in range(params["fleet"] // 200)]
+
+    def fleet_audit():
+        app.get_shared_cache.clear()  # cold: parse and check every instance
+        return app.run_fleet_dba_checks([(instance, lambda raw=raw: raw) for instance, raw in exports], {})
+
+    rows.append(measure("run_fleet_dba_checks", fleet_audit, len(exports), "instances", repeat)[0])
+
+    rows.append(measure("parse_dates (DD-MON-YY)", lambda: [app.parse_dates(db_users[col])
+                                                            for col in ("CREATED", "EXPIRY_DATE", "LAST_LOGIN")],
+                        3 * len(db_users), "values", repeat)[0])
+    rows.append(measure("run_dba_user_checks", lambda: app.run_dba_user_checks(
+        db_users, "USERNAME", "ACCOUNT_STATUS", "PROFILE", "CREATED", "PASSWORD_VERSIONS"), len(db_users), "rows", repeat)[0])
+    with tempfile.TemporaryDirectory() as directory:
+        extract = os.path.join(directory, "dba_users.csv")
+        db_users.to_csv(extract, index=False)
+        chunk_cols = {field: default for field, _, default in app.FLEET_FIELDS}
+        rows.append(measure("run_chunked_dba_checks (CSV)", lambda: app.run_chunked_dba_checks(
+            extract, chunk_cols, chunk_rows=max(1000, len(db_users) // 10), spill_dir=os.path.join(directory, "spill")),
+            len(db_users), "rows", repeat)[0])
+    # Next quarter's export with ~2% churn; only those rows are re-checked
+    delta_cols = {"username": "USERNAME", "status": "ACCOUNT_STATUS", "profile": "PROFILE",
+                  "created": "CREATED", "password": "PASSWORD_VERSIONS", "privilege": ""}
+    next_users = db_users.copy()
+    churned = rng.sample(range(len(db_users)), max(1, len(db_users) // 50))
+    next_users.loc[churned, "ACCOUNT_STATUS"] = "LOCKED"
+    previous_keyed = app.keyed_dba_users(db_users, delta_cols)
+    previous_flags = app.dba_user_flags(previous_keyed, delta_cols)
+    def snapshot_delta():
+        current = app.keyed_dba_users(next_users, delta_cols)
+        changes, changed = app.diff_dba_users(previous_keyed, current, delta_cols)
+        return app.findings_delta(previous_flags, app.incremental_user_flags(previous_flags, current, changed, delta_cols))
+    rows.append(measure("snapshot delta (2% churn)", snapshot_delta, len(next_users), "rows", repeat)[0])
+    rows.append(measure("resolve_role_grants", lambda: app.resolve_role_grants(
+        role_privs, "GRANTEE", "GRANTED ROLE", "ADMIN OPTION"), len(role_privs), "grants", repeat)[0])
+    fleet_profiles = pd.concat([generate_profiles(rng).assign(Database=f"DB{i}") for i in range(params["fleet"] // 10)],
+                               ignore_index=True)
+    rows.append(measure("password policy (resolve + score)",
+                        lambda: app.evaluate_password_policy(app.resolve_profile_limits(fleet_profiles, "Database")),
+                        len(fleet_profiles), "rows", repeat)[0])
+    rows.append(measure("OracleAccountModel (build + findings)",
+                        lambda: app.OracleAccountModel(db_users, role_privs, profiles).findings(),
+                        len(db_users) + len(role_privs), "rows", repeat)[0])
+    effective_roles = app.resolve_role_grants(role_privs, "GRANTEE", "GRANTED ROLE", "ADMIN OPTION")
+    sys_privs, tab_privs = generate_privileges(rng, db_users["USERNAME"].tolist() + role_privs["GRANTED ROLE"].unique().tolist())
+    grants = app.privilege_grants(sys_privs, tab_privs)
+    rows.append(measure("sod_conflicts (bitsets)", lambda: app.sod_conflicts(grants, app.SOD_RULES, effective_roles),
+                        len(grants), "grants", repeat)[0])
+
+    for row in rows:
+        row["tier"] = tier
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the IT-Auditor engines on synthetic data.")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=list(TIERS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark; the best time is kept")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    all_rows = []
+    for tier in args.tiers:
+        print(f"== {tier} ==", file=sys.stderr)
+        all_rows.extend(run_tier(tier, TIERS[tier], rng, args.repeat))
+
+    table = pd.DataFrame(all_rows, columns=["tier", "benchmark", "items", "unit", "seconds", "throughput", "peak_mb"])
+    print(table.to_string(index=False))
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({"seed": args.seed, "repeat": args.repeat, "results": all_rows}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_punctuation_only_names_are_skipped():
+    graph = app.IdentityGraph()
+    graph.add_source("HR", "person", pd.Series(["John Smith", "-", "Mary Jones", "Ama Mensah"]), "d1")
+    records = graph.frame()
+    assert list(records["Name"]) == ["John Smith", "Mary Jones", "Ama Mensah"]
+    assert list(records.index) == [0, 1, 2]
+    assert len(graph.labels) == len(graph.records)
+
+
+def test_empty_keys_in_later_sources_keep_ids_positional():
+    graph = app.IdentityGraph()
+    graph.add_source("HR", "person", pd.Series(["John Smith", "-", "Mary Jones", "Ama Mensah"]), "d1")
+    graph.add_source("SAP", "account", pd.Series(["", "jsmith", None, "...", "mary.jones", " "]), "d2")
+    graph.add_source("Leavers", "leaver", pd.Series(["--", "Mary Jones"]), "d3")
+    records = graph.frame()
+    assert np.array_equal(records.index.to_numpy(), np.arange(len(records)))
+    assert len(records) == 3 + 2 + 1
+    assert graph.leaver_accounts()["Name"].tolist() == ["mary.jones"]
+    assert graph.orphan_accounts().empty
+
+
+def test_replacing_a_source_with_empty_keys():
+    graph = app.IdentityGraph()
+    graph.add_source("SAP", "account", pd.Series(["jsmith", "-"]), "d1")
+    graph.add_source("HR", "person", pd.Series(["John Smith"]), "d2")
+    graph.add_source("SAP", "account", pd.Series(["?", "jsmith", "", "ajones"]), "d3")
+    records = graph.frame()
+    assert sorted(records["Name"]) == ["John Smith", "ajones", "jsmith"]
+    assert graph.orphan_accounts()["Name"].tolist() == ["ajones"]
+
+
+def test_only_empty_keys():
+    graph = app.IdentityGraph()
+    graph.add_source("SAP", "account", pd.Series(["-", "", "!!"]), "d1")
+    assert graph.stats()["records"] == 0
+    graph.add_source("HR", "person", pd.Series(["John Smith"]), "d2")
+    assert graph.stats()["records"] == 1
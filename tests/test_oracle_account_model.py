@@ -0,0 +1,35 @@
+import pandas as pd
+
+import app
+
+
+def role_privs(rows):
+    return pd.DataFrame(rows, columns=["GRANTEE", "GRANTED_ROLE", "ADMIN_OPTION"])
+
+
+def test_admin_option_covers_only_the_granted_role():
+    grants = app.resolve_role_grants(
+        role_privs([("ALICE", "R1", "NO"), ("R1", "R2", "YES"), ("R2", "DBA", "NO")]),
+        "GRANTEE", "GRANTED_ROLE", "ADMIN_OPTION",
+    ).set_index("Role")
+    assert not grants.loc["R1", "Admin Path"]
+    assert grants.loc["R2", "Admin Path"]
+    assert not grants.loc["DBA", "Admin Path"]
+
+
+def test_admin_option_through_any_grant_of_the_role():
+    grants = app.resolve_role_grants(
+        role_privs([("BOB", "R1", "NO"), ("R1", "DBA", "NO"), ("BOB", "R3", "NO"), ("R3", "DBA", "YES")]),
+        "GRANTEE", "GRANTED_ROLE", "ADMIN_OPTION",
+    ).set_index("Role")
+    assert grants.loc["DBA", "Admin Path"]
+
+
+def test_am02_ignores_admin_on_an_intermediate_role():
+    users = pd.DataFrame({"USERNAME": ["ALICE", "BOB"], "ACCOUNT_STATUS": ["OPEN", "OPEN"], "PROFILE": ["DEFAULT", "DEFAULT"]})
+    model = app.OracleAccountModel(users, role_privs([
+        ("ALICE", "R1", "NO"), ("R1", "R2", "YES"), ("R2", "DBA", "NO"),
+        ("BOB", "DBA", "YES"),
+    ]))
+    am02 = model.findings().query("Rule == 'AM-02'")
+    assert am02["Username"].tolist() == ["BOB"]